@@ -1,10 +1,29 @@
-from typing import Optional
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Literal, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
-from src.common.config import load_settings
-from src.db.database import get_connection, init_db, query_listings
+from src.common.config import Settings, load_settings
+from src.common.metrics import render_prometheus
+from src.common.tracing import capture
+from src.db.database import (
+    facet_counts,
+    get_connection,
+    get_listing,
+    init_db,
+    listing_as_of,
+    listing_history,
+    neighbour_radius_limit,
+    price_drops,
+    query_listings,
+)
+from src.db.sharding import ShardedConnection
+from src.jobs.neighbours import refresh_suburb_neighbours
 
 
 class SearchRequest(BaseModel):
@@ -13,32 +32,128 @@ class SearchRequest(BaseModel):
     max_price: Optional[int] = None
     bedrooms: Optional[int] = None
     property_type: Optional[str] = None
+    radius_km: Optional[float] = None
     limit: int = 50
+    collapse_duplicates: bool = True
+    sort: Literal["newest", "relevance"] = "newest"
+    facets: bool = False
 
 
 app = FastAPI(title="PropertyHunter API")
 
+# One sharded handle serves every request; it owns a thread pool and a
+# connection per shard, which are too costly to set up per request.
+_sharded: ShardedConnection | None = None
+_sharded_lock = threading.Lock()
+
+
+def _sharded_connection(settings: Settings) -> ShardedConnection:
+    global _sharded
+    with _sharded_lock:
+        if _sharded is None:
+            conn = ShardedConnection(settings.db_path, settings.shard_dir)
+            init_db(conn)
+            _sharded = conn
+        return _sharded
+
+
+@contextmanager
+def _listings_db(settings: Settings) -> Iterator[sqlite3.Connection | ShardedConnection]:
+    if settings.shard_dir:
+        yield _sharded_connection(settings)
+        return
+    conn = get_connection(settings.db_path)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
 
 @app.on_event("startup")
 def _startup() -> None:
     settings = load_settings()
     conn = get_connection(settings.db_path)
     init_db(conn)
+    refresh_suburb_neighbours(conn, settings)
     conn.close()
+    if settings.shard_dir:
+        _sharded_connection(settings)
+
+
+@app.on_event("shutdown")
+def _shutdown() -> None:
+    global _sharded
+    with _sharded_lock:
+        if _sharded is not None:
+            _sharded.close()
+            _sharded = None
 
 
 @app.post("/search")
-def search(request: SearchRequest) -> list[dict]:
+def search(request: SearchRequest, x_trace: bool = Header(False)) -> list[dict] | dict:
     settings = load_settings()
-    conn = get_connection(settings.db_path)
-    rows = query_listings(
-        conn,
-        suburb=request.suburb,
-        min_price=request.min_price,
-        max_price=request.max_price,
-        bedrooms=request.bedrooms,
-        property_type=request.property_type,
-        limit=request.limit,
-    )
-    conn.close()
-    return [dict(row) for row in rows]
+    filters = {
+        "suburb": request.suburb,
+        "min_price": request.min_price,
+        "max_price": request.max_price,
+        "bedrooms": request.bedrooms,
+        "property_type": request.property_type,
+        "radius_km": request.radius_km,
+        "collapse_duplicates": request.collapse_duplicates,
+    }
+    with capture("api-search", settings, x_trace), _listings_db(settings) as conn:
+        radius_limit = neighbour_radius_limit(conn)
+        if request.suburb and request.radius_km and radius_limit is not None:
+            if request.radius_km > radius_limit:
+                raise HTTPException(
+                    status_code=422, detail=f"radius_km cannot exceed {radius_limit:g} km"
+                )
+        rows = query_listings(conn, limit=request.limit, sort=request.sort, **filters)
+        facets = facet_counts(conn, **filters) if request.facets else None
+        results = [dict(row) for row in rows]
+        if facets is None:
+            return results
+        return {"results": results, "facets": facets}
+
+
+@app.get("/listings/{listing_id}")
+def listing(listing_id: str, as_of: Optional[str] = None) -> dict:
+    settings = load_settings()
+    with _listings_db(settings) as conn:
+        if as_of:
+            state = listing_as_of(conn, listing_id, as_of)
+        else:
+            row = get_listing(conn, listing_id)
+            state = dict(row) if row is not None else None
+    if state is None:
+        raise HTTPException(status_code=404, detail="Listing not found")
+    return state
+
+
+@app.get("/listings/{listing_id}/history")
+def history(listing_id: str) -> list[dict]:
+    settings = load_settings()
+    with _listings_db(settings) as conn:
+        changes = listing_history(conn, listing_id)
+    if not changes:
+        raise HTTPException(status_code=404, detail="No history for listing")
+    return changes
+
+
+@app.get("/price-drops")
+def recent_price_drops(
+    days: float = 7,
+    suburb: Optional[str] = None,
+    limit: int = 50,
+    x_trace: bool = Header(False),
+) -> list[dict]:
+    settings = load_settings()
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    with capture("api-price-drops", settings, x_trace), _listings_db(settings) as conn:
+        rows = price_drops(conn, since, suburb=suburb, limit=limit)
+        return [dict(row) for row in rows]
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    return render_prometheus()
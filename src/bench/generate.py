@@ -0,0 +1,215 @@
+import argparse
+import csv
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+from src.common.gazetteer import display_name, state_for_postcode
+from src.common.price import parse_price_range
+from src.db.database import Listing, get_connection, init_db, upsert_listings
+
+STATE_MEDIAN_PRICES = {
+    "NSW": 1_250_000,
+    "VIC": 950_000,
+    "QLD": 800_000,
+    "SA": 700_000,
+    "WA": 720_000,
+    "TAS": 650_000,
+    "ACT": 950_000,
+    "NT": 520_000,
+}
+
+PROPERTY_TYPE_WEIGHTS = {
+    "House": 0.55,
+    "Apartment": 0.2,
+    "Unit": 0.1,
+    "Townhouse": 0.1,
+    "Villa": 0.03,
+    "Land": 0.02,
+}
+
+BEDROOM_WEIGHTS = {
+    "House": {2: 0.08, 3: 0.42, 4: 0.35, 5: 0.12, 6: 0.03},
+    "Apartment": {1: 0.35, 2: 0.5, 3: 0.15},
+    "Unit": {1: 0.3, 2: 0.55, 3: 0.15},
+    "Townhouse": {2: 0.25, 3: 0.6, 4: 0.15},
+    "Villa": {2: 0.5, 3: 0.45, 4: 0.05},
+}
+
+TYPE_PRICE_FACTORS = {
+    "House": 1.15,
+    "Apartment": 0.6,
+    "Unit": 0.55,
+    "Townhouse": 0.85,
+    "Villa": 0.7,
+    "Land": 0.5,
+}
+
+STREET_NAMES = [
+    "High", "Station", "Park", "Church", "Victoria", "Albert", "Railway",
+    "Queen", "King", "Elizabeth", "George", "William", "Main", "Hill", "Grove",
+]
+STREET_TYPES = ["St", "Rd", "Ave", "Ct", "Cres", "Dr", "Pde", "Pl"]
+
+
+@dataclass(frozen=True)
+class SyntheticSuburb:
+    suburb: str
+    state: str
+    postcode: str
+    median_price: int
+    weight: float
+
+
+def load_synthetic_suburbs(
+    path: Path = Path("data/suburbs.csv"), seed: int = 7
+) -> list[SyntheticSuburb]:
+    rng = random.Random(seed)
+    rows: list[tuple[str, str]] = []
+    seen: set[str] = set()
+    with path.open("r", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            suburb = display_name((row.get("suburb") or "").strip())
+            postcode = (row.get("postcode") or "").strip()
+            if not suburb or suburb in seen:
+                continue
+            seen.add(suburb)
+            rows.append((suburb, postcode))
+    rng.shuffle(rows)
+
+    suburbs: list[SyntheticSuburb] = []
+    for rank, (suburb, postcode) in enumerate(rows):
+        state = state_for_postcode(postcode)
+        median = STATE_MEDIAN_PRICES.get(state, 800_000) * rng.lognormvariate(0, 0.35)
+        suburbs.append(
+            SyntheticSuburb(
+                suburb=suburb,
+                state=state,
+                postcode=postcode,
+                median_price=int(median),
+                # Zipf-like popularity: a few suburbs carry most of the stock.
+                weight=1.0 / (rank + 1) ** 0.8,
+            )
+        )
+    return suburbs
+
+
+def generate_listings(
+    count: int, suburbs: list[SyntheticSuburb], seed: int = 7
+) -> Iterator[Listing]:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    types = list(PROPERTY_TYPE_WEIGHTS)
+    type_weights = list(PROPERTY_TYPE_WEIGHTS.values())
+    cumulative_weights: list[float] = []
+    total = 0.0
+    for item in suburbs:
+        total += item.weight
+        cumulative_weights.append(total)
+
+    for index in range(count):
+        area = rng.choices(suburbs, cum_weights=cumulative_weights)[0]
+        property_type = rng.choices(types, weights=type_weights)[0]
+        bedrooms = _pick_bedrooms(rng, property_type)
+        price = _pick_price(rng, area, property_type, bedrooms)
+        price_text = _format_price_text(rng, price)
+        price_min, price_max = parse_price_range(price_text)
+        scraped_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 60))
+        listed_at = scraped_at - timedelta(days=rng.randint(0, 90))
+        street = f"{rng.randint(1, 250)} {rng.choice(STREET_NAMES)} {rng.choice(STREET_TYPES)}"
+        listing_id = f"synth-{index}"
+        slug = area.suburb.lower().replace(" ", "+")
+        yield Listing(
+            id=listing_id,
+            url=(
+                "https://www.realestate.com.au/property-"
+                f"{property_type.lower()}-{area.state.lower()}-{slug}-{listing_id}"
+            ),
+            title=f"{street}, {area.suburb}",
+            address=f"{street}, {area.suburb}, {area.state} {area.postcode}",
+            suburb=area.suburb,
+            state=area.state,
+            postcode=area.postcode,
+            price_text=price_text,
+            price_min=price_min,
+            price_max=price_max,
+            bedrooms=bedrooms,
+            bathrooms=max(1, (bedrooms or 1) - rng.randint(0, 2)) if bedrooms else None,
+            parking=rng.randint(0, 3) if property_type != "Land" else None,
+            property_type=property_type,
+            land_size=rng.randint(150, 1200) if property_type in {"House", "Land"} else None,
+            listing_status="for_sale",
+            listed_at=listed_at.isoformat(),
+            scraped_at=scraped_at.isoformat(),
+        )
+
+
+def populate(db_path: str, count: int, seed: int, batch_size: int = 5000) -> float:
+    suburbs = load_synthetic_suburbs(seed=seed)
+    conn = get_connection(db_path)
+    init_db(conn)
+    start = time.perf_counter()
+    batch: list[Listing] = []
+    for listing in generate_listings(count, suburbs, seed=seed):
+        batch.append(listing)
+        if len(batch) >= batch_size:
+            upsert_listings(conn, batch)
+            batch = []
+    if batch:
+        upsert_listings(conn, batch)
+    conn.close()
+    return time.perf_counter() - start
+
+
+def _pick_bedrooms(rng: random.Random, property_type: str) -> int | None:
+    weights = BEDROOM_WEIGHTS.get(property_type)
+    if not weights:
+        return None
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _pick_price(
+    rng: random.Random, area: SyntheticSuburb, property_type: str, bedrooms: int | None
+) -> int:
+    factor = TYPE_PRICE_FACTORS.get(property_type, 1.0)
+    if bedrooms:
+        factor *= 1 + 0.15 * (bedrooms - 3)
+    price = area.median_price * factor * rng.lognormvariate(0, 0.25)
+    return max(100_000, int(round(price / 5_000) * 5_000))
+
+
+def _format_price_text(rng: random.Random, price: int) -> str:
+    roll = rng.random()
+    if roll < 0.1:
+        return "Contact agent"
+    if roll < 0.18:
+        return "Auction"
+    if roll < 0.4:
+        low = int(math.floor(price * 0.95 / 10_000) * 10_000)
+        high = int(math.ceil(price * 1.05 / 10_000) * 10_000)
+        return f"${low:,} - ${high:,}"
+    if roll < 0.5:
+        return f"Offers over ${price:,}"
+    return f"${price:,}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fill a database with synthetic listings.")
+    parser.add_argument("--db", default="data/bench.db", help="Target SQLite path.")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Listings to generate.")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed.")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per upsert batch.")
+    args = parser.parse_args()
+    elapsed = populate(args.db, args.count, args.seed, args.batch_size)
+    print(
+        f"Wrote {args.count} listings to {args.db} in {elapsed:.1f}s "
+        f"({args.count / elapsed:.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+import requests
+
+from src.bench.generate import PROPERTY_TYPE_WEIGHTS, load_synthetic_suburbs
+
+DEFAULT_MIX = [
+    {"name": "suburb", "weight": 0.3, "fields": ["suburb"]},
+    {"name": "suburb+max_price", "weight": 0.25, "fields": ["suburb", "max_price"]},
+    {
+        "name": "suburb+bedrooms+property_type",
+        "weight": 0.2,
+        "fields": ["suburb", "bedrooms", "property_type"],
+    },
+    {"name": "price_range", "weight": 0.1, "fields": ["min_price", "max_price"]},
+    {
+        "name": "property_type+bedrooms",
+        "weight": 0.1,
+        "fields": ["property_type", "bedrooms"],
+    },
+    {"name": "unfiltered", "weight": 0.05, "fields": []},
+]
+
+
+@dataclass(frozen=True)
+class RequestResult:
+    shape: str
+    seconds: float
+    ok: bool
+
+
+class CriteriaSampler:
+    def __init__(self, mix: list[dict[str, Any]], seed: int) -> None:
+        self.mix = mix
+        self.weights = [float(entry.get("weight", 1.0)) for entry in mix]
+        self.suburbs = load_synthetic_suburbs(seed=seed)
+        self.suburb_weights = [item.weight for item in self.suburbs]
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sample(self) -> tuple[str, dict[str, Any]]:
+        with self.lock:
+            entry = self.rng.choices(self.mix, weights=self.weights)[0]
+            area = self.rng.choices(self.suburbs, weights=self.suburb_weights)[0]
+            payload: dict[str, Any] = {"limit": int(entry.get("limit", 50))}
+            for field in entry.get("fields", []):
+                if field == "suburb":
+                    payload["suburb"] = area.suburb
+                elif field == "min_price":
+                    payload["min_price"] = int(area.median_price * self.rng.uniform(0.5, 0.9))
+                elif field == "max_price":
+                    payload["max_price"] = int(area.median_price * self.rng.uniform(1.0, 1.6))
+                elif field == "bedrooms":
+                    payload["bedrooms"] = self.rng.choice([1, 2, 3, 4])
+                elif field == "property_type":
+                    payload["property_type"] = self.rng.choice(list(PROPERTY_TYPE_WEIGHTS))
+            name = entry.get("name") or "+".join(entry.get("fields", [])) or "unfiltered"
+            return name, payload
+
+
+def run_load_test(
+    base_url: str,
+    total_requests: int,
+    concurrency: int,
+    sampler: CriteriaSampler,
+    timeout: float = 30.0,
+) -> dict[str, Any]:
+    local = threading.local()
+    endpoint = f"{base_url.rstrip('/')}/search"
+
+    def one_request(_: int) -> RequestResult:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = requests.Session()
+            local.session = session
+        shape, payload = sampler.sample()
+        start = time.perf_counter()
+        try:
+            response = session.post(endpoint, json=payload, timeout=timeout)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return RequestResult(shape=shape, seconds=time.perf_counter() - start, ok=ok)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one_request, range(total_requests)))
+    elapsed = time.perf_counter() - start
+    return summarize(results, elapsed, concurrency)
+
+
+def summarize(
+    results: list[RequestResult], elapsed: float, concurrency: int
+) -> dict[str, Any]:
+    by_shape: dict[str, list[float]] = defaultdict(list)
+    for result in results:
+        if result.ok:
+            by_shape[result.shape].append(result.seconds)
+    latencies = sorted(result.seconds for result in results if result.ok)
+    errors = sum(1 for result in results if not result.ok)
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": _latency_report(latencies),
+        "by_shape": {
+            shape: _latency_report(sorted(values))
+            for shape, values in sorted(by_shape.items())
+        },
+    }
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def _latency_report(sorted_values: list[float]) -> dict[str, float]:
+    return {
+        "count": len(sorted_values),
+        "p50": round(percentile(sorted_values, 0.50) * 1000, 2),
+        "p95": round(percentile(sorted_values, 0.95) * 1000, 2),
+        "p99": round(percentile(sorted_values, 0.99) * 1000, 2),
+    }
+
+
+def _load_mix(path: str | None) -> list[dict[str, Any]]:
+    if not path:
+        return DEFAULT_MIX
+    with open(path, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    if not isinstance(data, list) or not data:
+        raise ValueError("Mix file must contain a non-empty JSON list.")
+    return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the /search API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API base URL.")
+    parser.add_argument("--requests", type=int, default=2000, help="Total requests.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Parallel clients.")
+    parser.add_argument(
+        "--mix",
+        help="JSON file with a list of {name, weight, fields, limit} criteria shapes.",
+    )
+    parser.add_argument("--seed", type=int, default=7, help="Random seed.")
+    parser.add_argument("--output", help="Write the JSON report to this path.")
+    args = parser.parse_args()
+
+    sampler = CriteriaSampler(_load_mix(args.mix), args.seed)
+    report = run_load_test(args.url, args.requests, args.concurrency, sampler)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Iterator
+
+from src.bench.generate import generate_listings, load_synthetic_suburbs
+from src.db.database import Listing, get_connection, init_db, upsert_listings_with_result
+from src.ingest.parser import parse_listing_cards
+
+SCENARIOS = ("retain", "stream")
+
+
+def synthetic_pages(pages: int, per_page: int, seed: int) -> Iterator[str]:
+    listings = generate_listings(pages * per_page, load_synthetic_suburbs(seed=seed), seed=seed)
+    for _ in range(pages):
+        items = [_argonaut_item(next(listings)) for _ in range(per_page)]
+        yield _argonaut_page(items)
+
+
+def run_scenario(scenario: str, pages: int, per_page: int, seed: int, trace: bool) -> dict:
+    if trace:
+        tracemalloc.start()
+    rss_before = _max_rss_mb()
+    start = time.perf_counter()
+    if scenario == "retain":
+        # Mirrors the bulk re-ingest: every parsed listing is held until the write.
+        latest: dict[str, Listing] = {}
+        for html in synthetic_pages(pages, per_page, seed):
+            for listing in parse_listing_cards(html):
+                latest[listing.id] = listing
+        held = len(latest)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            conn = get_connection(os.path.join(directory, "bench.db"))
+            init_db(conn)
+            held = 0
+            for html in synthetic_pages(pages, per_page, seed):
+                held += upsert_listings_with_result(conn, parse_listing_cards(html)).rows
+            conn.close()
+    result: dict[str, Any] = {
+        "scenario": scenario,
+        "pages": pages,
+        "listings": held,
+        "seconds": round(time.perf_counter() - start, 2),
+        "rss_before_mb": round(rss_before, 1),
+        "rss_peak_mb": round(_max_rss_mb(), 1),
+    }
+    if trace:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["python_current_mb"] = round(current / 2**20, 1)
+        result["python_peak_mb"] = round(peak / 2**20, 1)
+        result["bytes_per_listing"] = int(current / held) if held else None
+    return result
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _argonaut_item(listing: Listing) -> dict[str, Any]:
+    return {
+        "listing": {
+            "id": listing.id,
+            "_links": {"canonical": {"href": listing.url}},
+            "address": {
+                "suburb": listing.suburb,
+                "state": listing.state,
+                "postcode": listing.postcode,
+                "display": {"fullAddress": listing.address, "shortAddress": listing.title},
+            },
+            "price": {"display": listing.price_text},
+            "generalFeatures": {
+                "bedrooms": {"value": listing.bedrooms},
+                "bathrooms": {"value": listing.bathrooms},
+                "parkingSpaces": {"value": listing.parking},
+            },
+            "propertyType": {"display": listing.property_type},
+            "propertySizes": {
+                "land": {"displayValue": str(listing.land_size or ""), "sizeUnit": {"id": "M2"}}
+            },
+            "description": f"{listing.title}. " * 20,
+            "media": {
+                "images": [
+                    {"templatedUrl": f"https://i.example/{listing.id}/{index}/{{size}}.jpg"}
+                    for index in range(12)
+                ]
+            },
+            "listingCompany": {"name": "Example Realty", "id": "ER1", "phone": "0800 000 000"},
+        }
+    }
+
+
+def _argonaut_page(items: list[dict[str, Any]]) -> str:
+    data = json.dumps({"buySearch": {"results": {"exact": {"items": items}}}})
+    exchange = {
+        "resi-property_listing-experience-web": {
+            "urqlClientCache": json.dumps({"search": {"data": data}})
+        }
+    }
+    return (
+        "<html><head><title>Search</title></head><body>"
+        + "<div class='card'><span>placeholder</span></div>" * 500
+        + f"<script>window.ArgonautExchange={json.dumps(exchange)};</script></body></html>"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure parser and ingest memory use.")
+    parser.add_argument("--pages", type=int, default=400, help="Synthetic pages to parse.")
+    parser.add_argument("--per-page", type=int, default=25, help="Listings per page.")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed.")
+    parser.add_argument(
+        "--scenario",
+        choices=SCENARIOS,
+        action="append",
+        help="Scenario to run (repeatable; defaults to all).",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="Also report Python heap usage (slower).",
+    )
+    args = parser.parse_args()
+
+    # Each scenario runs in a fresh interpreter so peak RSS is not shared.
+    context = multiprocessing.get_context("spawn")
+    report = []
+    for scenario in args.scenario or SCENARIOS:
+        with context.Pool(1) as pool:
+            report.append(
+                pool.apply(
+                    run_scenario,
+                    (scenario, args.pages, args.per_page, args.seed, args.tracemalloc),
+                )
+            )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
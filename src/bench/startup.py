@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Cold-import budgets in milliseconds, measured as the best of several runs.
+ENTRY_POINTS = {
+    "main": ("src.main", 100),
+    "ingest": ("src.ingest.pipeline", 100),
+    "notify": ("src.jobs.notify", 150),
+    "refresh": ("src.jobs.refresh", 120),
+    "prices": ("src.jobs.prices", 100),
+    "neighbours": ("src.jobs.neighbours", 100),
+    "lifecycle": ("src.jobs.lifecycle", 100),
+    "archive": ("src.ingest.archive", 120),
+    "api": ("src.api.app", 800),
+    "ui": ("src.ui.app", 700),
+}
+
+
+@dataclass(frozen=True)
+class ImportTiming:
+    module: str
+    cumulative_us: int
+    top: list[tuple[str, int]]
+
+
+def measure(module: str, repeat: int = 5, top: int = 8) -> ImportTiming:
+    best: ImportTiming | None = None
+    startup = _interpreter_modules()
+    for _ in range(repeat):
+        timing = _parse_importtime(module, _importtime(f"import {module}"), top, startup)
+        if best is None or timing.cumulative_us < best.cumulative_us:
+            best = timing
+    assert best is not None
+    return best
+
+
+def _importtime(code: str) -> str:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return completed.stderr
+
+
+def _interpreter_modules() -> set[str]:
+    modules = set()
+    for line in _importtime("pass").splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return modules
+
+
+def _parse_importtime(
+    module: str, stderr: str, top: int, startup: set[str]
+) -> ImportTiming:
+    cumulative = 0
+    roots: dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_text, name = line[len("import time:") :].split("|", 2)
+        if not cumulative_text.strip().isdigit():
+            continue
+        value = int(cumulative_text)
+        stripped = name.strip()
+        if stripped == module:
+            cumulative = value
+        # A package's first import carries its whole subtree, so the maximum
+        # per top-level name is what that dependency costs the entry point.
+        package = stripped.split(".")[0]
+        if package != "src" and package not in startup:
+            roots[package] = max(roots.get(package, 0), value)
+    heaviest = sorted(roots.items(), key=lambda item: item[1], reverse=True)[:top]
+    return ImportTiming(module, cumulative, heaviest)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold import time of entry points.")
+    parser.add_argument(
+        "entry_points",
+        nargs="*",
+        help=f"Entry points to measure (default: all of {', '.join(ENTRY_POINTS)}).",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per entry point.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit non-zero if any entry point exceeds its budget.",
+    )
+    parser.add_argument("--output", help="Write the JSON report to this path.")
+    args = parser.parse_args()
+
+    report = []
+    over_budget = []
+    for name in args.entry_points or list(ENTRY_POINTS):
+        if name not in ENTRY_POINTS:
+            parser.error(f"Unknown entry point: {name}")
+        module, budget_ms = ENTRY_POINTS[name]
+        timing = measure(module, args.repeat)
+        milliseconds = timing.cumulative_us / 1000
+        report.append(
+            {
+                "entry_point": name,
+                "module": module,
+                "import_ms": round(milliseconds, 1),
+                "budget_ms": budget_ms,
+                "heaviest": [
+                    {"package": package, "ms": round(value / 1000, 1)}
+                    for package, value in timing.top
+                ],
+            }
+        )
+        if milliseconds > budget_ms:
+            over_budget.append(f"{name}: {milliseconds:.1f} ms > {budget_ms} ms")
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text)
+    print(text)
+    if args.check and over_budget:
+        print("Import budget exceeded:\n  " + "\n  ".join(over_budget), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
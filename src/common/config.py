@@ -16,8 +16,22 @@ class Settings:
     smtp_password: str | None
     smtp_from: str | None
     smtp_use_tls: bool
+    smtp_pool_size: int
+    smtp_max_retries: int
+    notify_workers: int
+    notify_poll_minutes: float
+    refresh_requests_per_hour: int
+    refresh_interval_minutes: float
+    refresh_max_pages: int
+    delist_after_crawls: int
+    lifecycle_interval_hours: float
     suburbs_path: str | None
     suburb_profiles_path: str | None
+    trace_dir: str | None
+    archive_dir: str | None
+    shard_dir: str | None
+    gazetteer_snapshot_path: str | None
+    neighbour_max_radius_km: float
 
 
 def load_settings() -> Settings:
@@ -34,8 +48,24 @@ def load_settings() -> Settings:
     smtp_password = os.getenv("SMTP_PASSWORD") or None
     smtp_from = os.getenv("SMTP_FROM") or None
     smtp_use_tls = os.getenv("SMTP_USE_TLS", "true").lower() in {"1", "true", "yes"}
+    smtp_pool_size = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    smtp_max_retries = int(os.getenv("SMTP_MAX_RETRIES", "3"))
+    notify_workers = int(os.getenv("NOTIFY_WORKERS", "1"))
+    notify_poll_minutes = float(os.getenv("NOTIFY_POLL_MINUTES", "5"))
+    refresh_requests_per_hour = int(os.getenv("REFRESH_REQUESTS_PER_HOUR", "120"))
+    refresh_interval_minutes = float(os.getenv("REFRESH_INTERVAL_MINUTES", "15"))
+    refresh_max_pages = int(os.getenv("REFRESH_MAX_PAGES", "3"))
+    delist_after_crawls = int(os.getenv("DELIST_AFTER_CRAWLS", "3"))
+    lifecycle_interval_hours = float(os.getenv("LIFECYCLE_INTERVAL_HOURS", "24"))
     suburbs_path = os.getenv("SUBURBS_PATH") or None
     suburb_profiles_path = os.getenv("SUBURB_PROFILES_PATH") or None
+    trace_dir = os.getenv("TRACE_DIR") or None
+    archive_dir = os.getenv("ARCHIVE_DIR") or None
+    shard_dir = os.getenv("SHARD_DIR") or None
+    gazetteer_snapshot_path = (
+        os.getenv("GAZETTEER_SNAPSHOT_PATH", "data/gazetteer.snapshot.json") or None
+    )
+    neighbour_max_radius_km = float(os.getenv("NEIGHBOUR_MAX_RADIUS_KM", "50"))
     return Settings(
         db_path=db_path,
         http_user_agent=http_user_agent,
@@ -47,6 +77,20 @@ def load_settings() -> Settings:
         smtp_password=smtp_password,
         smtp_from=smtp_from,
         smtp_use_tls=smtp_use_tls,
+        smtp_pool_size=smtp_pool_size,
+        smtp_max_retries=smtp_max_retries,
+        notify_workers=notify_workers,
+        notify_poll_minutes=notify_poll_minutes,
+        refresh_requests_per_hour=refresh_requests_per_hour,
+        refresh_interval_minutes=refresh_interval_minutes,
+        refresh_max_pages=refresh_max_pages,
+        delist_after_crawls=delist_after_crawls,
+        lifecycle_interval_hours=lifecycle_interval_hours,
         suburbs_path=suburbs_path,
         suburb_profiles_path=suburb_profiles_path,
+        trace_dir=trace_dir,
+        archive_dir=archive_dir,
+        shard_dir=shard_dir,
+        gazetteer_snapshot_path=gazetteer_snapshot_path,
+        neighbour_max_radius_km=neighbour_max_radius_km,
     )
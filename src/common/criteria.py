@@ -1,10 +1,10 @@
 import re
 from dataclasses import dataclass
-import csv
-from functools import lru_cache
-from pathlib import Path
 
+from src.common.fuzzy_suburbs import FuzzySuburbIndex, SuburbMatch
+from src.common.gazetteer import get_gazetteer
 from src.common.price import parse_price_range
+from src.common.suburb_matcher import SuburbMatcher
 
 
 @dataclass(frozen=True)
@@ -15,8 +15,13 @@ class SearchCriteria:
     bedrooms: int | None
     property_type: str | None
     radius_km: float | None
+    suburb_confidence: float | None = None
 
 
+FUZZY_SUBURB_MIN_SCORE = 0.65
+FUZZY_SUBURB_MIN_MARGIN = 0.05
+FUZZY_SUBURB_MIN_LENGTH_RATIO = 0.8
+
 PROPERTY_TYPE_KEYWORDS = {
     "house": "House",
     "townhouse": "Townhouse",
@@ -28,8 +33,12 @@ PROPERTY_TYPE_KEYWORDS = {
 
 
 def parse_search_query(text: str) -> SearchCriteria:
-    radius_km, radius_suburb = _extract_radius_query(text)
-    suburb = radius_suburb or _match_suburb_from_list(text) or _extract_suburb(text)
+    radius_km, suburb, confidence = _extract_radius_query(text)
+    if not suburb:
+        suburb = _match_suburb_from_list(text)
+        confidence = 1.0 if suburb else None
+    if not suburb:
+        suburb, confidence = _resolve_guess(_extract_suburb(text))
     bedrooms = _extract_bedrooms(text)
     property_type = _extract_property_type(text)
     price_phrase = _extract_price_phrase(text)
@@ -41,9 +50,30 @@ def parse_search_query(text: str) -> SearchCriteria:
         bedrooms=bedrooms,
         property_type=property_type,
         radius_km=radius_km,
+        suburb_confidence=confidence,
+    )
+
+
+def resolve_suburb(text: str) -> SuburbMatch | None:
+    if not text or not text.strip():
+        return None
+    return _fuzzy_index().resolve(
+        text,
+        min_score=FUZZY_SUBURB_MIN_SCORE,
+        min_margin=FUZZY_SUBURB_MIN_MARGIN,
+        min_length_ratio=FUZZY_SUBURB_MIN_LENGTH_RATIO,
     )
 
 
+def _resolve_guess(guess: str | None) -> tuple[str | None, float | None]:
+    if not guess:
+        return None, None
+    match = resolve_suburb(guess)
+    if match:
+        return match.name, match.score
+    return guess, None
+
+
 def _extract_suburb(text: str) -> str | None:
     match = re.search(
         r"\bin\s+([a-zA-Z\s]+?)(?=(?:,|\bunder\b|\bover\b|\bfrom\b|\bbetween\b|\bwith\b|$))",
@@ -59,16 +89,7 @@ def _extract_suburb(text: str) -> str | None:
 
 
 def _match_suburb_from_list(text: str) -> str | None:
-    suburbs = _load_suburbs()
-    lowered = text.lower()
-    matches: list[str] = []
-    for suburb in suburbs:
-        pattern = rf"\b{re.escape(suburb.lower())}\b"
-        if re.search(pattern, lowered):
-            matches.append(suburb)
-    if not matches:
-        return None
-    return max(matches, key=len)
+    return _suburb_matcher().longest(text)
 
 
 def _extract_bedrooms(text: str) -> int | None:
@@ -107,59 +128,42 @@ def _titlecase_words(text: str) -> str:
     return " ".join(word.capitalize() for word in text.split())
 
 
-def _extract_radius_query(text: str) -> tuple[float | None, str | None]:
+def _extract_radius_query(text: str) -> tuple[float | None, str | None, float | None]:
     match = re.search(
         r"(\d+(?:\.\d+)?)\s*km\s*(?:to|from|of)\s+([a-zA-Z\s]+)",
         text,
         re.IGNORECASE,
     )
     if not match:
-        return None, None
+        return None, None, None
     try:
         radius_km = float(match.group(1))
     except ValueError:
-        return None, None
+        return None, None, None
     suburb_text = match.group(2).strip()
-    suburb = _match_suburb_from_list(suburb_text) or _extract_suburb(suburb_text)
-    return radius_km, suburb
+    suburb = _match_suburb_from_list(suburb_text)
+    if suburb:
+        return radius_km, suburb, 1.0
+    suburb, confidence = _resolve_guess(
+        _extract_suburb(suburb_text) or _leading_place(suburb_text)
+    )
+    return radius_km, suburb, confidence
 
 
-@lru_cache(maxsize=1)
-def _load_suburbs() -> list[str]:
-    suburbs: list[str] = []
-    default_path = Path(__file__).with_name("suburbs_vic.txt")
-    _load_suburbs_from_path(default_path, suburbs)
-    data_path = Path("data/suburbs.csv")
-    _load_suburbs_from_path(data_path, suburbs)
-    extra_path = _load_extra_suburbs_path()
-    if extra_path:
-        _load_suburbs_from_path(extra_path, suburbs)
-    return suburbs
+def _leading_place(text: str) -> str | None:
+    match = re.match(
+        r"\s*([a-zA-Z\s]+?)(?=(?:,|\bunder\b|\bover\b|\bfrom\b|\bbetween\b|\bwith\b|$))",
+        text,
+        re.IGNORECASE,
+    )
+    if not match or not match.group(1).strip():
+        return None
+    return _titlecase_words(match.group(1).strip())
 
 
-def _load_extra_suburbs_path() -> Path | None:
-    from src.common.config import load_settings
+def _suburb_matcher() -> SuburbMatcher:
+    return get_gazetteer().matcher
 
-    settings = load_settings()
-    if not settings.suburbs_path:
-        return None
-    path = Path(settings.suburbs_path)
-    return path if path.exists() else None
-
-
-def _load_suburbs_from_path(path: Path, suburbs: list[str]) -> None:
-    if not path.exists():
-        return
-    if path.suffix.lower() == ".csv":
-        with path.open("r", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
-            for row in reader:
-                value = (row.get("suburb") or "").strip()
-                if value and value not in suburbs:
-                    suburbs.append(value)
-        return
-    with path.open("r", encoding="utf-8") as handle:
-        for line in handle:
-            value = line.strip()
-            if value and value not in suburbs:
-                suburbs.append(value)
+
+def _fuzzy_index() -> FuzzySuburbIndex:
+    return get_gazetteer().fuzzy_index
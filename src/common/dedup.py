@@ -0,0 +1,139 @@
+import re
+from difflib import SequenceMatcher
+from typing import Any, Iterable, Mapping, TypeVar
+
+DUPLICATE_THRESHOLD = 0.9
+# Bumped whenever block_key changes, so stored clusters are redone under it.
+BLOCK_KEY_VERSION = "2"
+
+STREET_TYPES = {
+    "st": "street",
+    "rd": "road",
+    "ave": "avenue",
+    "av": "avenue",
+    "dr": "drive",
+    "ct": "court",
+    "crt": "court",
+    "pl": "place",
+    "cres": "crescent",
+    "cr": "crescent",
+    "hwy": "highway",
+    "pde": "parade",
+    "tce": "terrace",
+    "cl": "close",
+    "gr": "grove",
+    "gve": "grove",
+    "blvd": "boulevard",
+    "bvd": "boulevard",
+    "ln": "lane",
+    "sq": "square",
+    "cct": "circuit",
+    "esp": "esplanade",
+    "wy": "way",
+}
+
+_UNIT_PREFIX = re.compile(
+    r"\b(?:unit|apartment|apt|flat|suite|villa|townhouse|u)\s*(\w+)(?:\s*[,/]\s*|\s+)(?=\d)"
+)
+_STREET = re.compile(r"\d+[a-z]?\s+[a-z]", re.IGNORECASE)
+_SLASH = re.compile(r"\s*/\s*")
+_PUNCTUATION = re.compile(r"[^\w/\- ]+")
+_STREET_NUMBER = re.compile(r"^(?:(\w+)/)?(\d+)[a-z]?(?:-\d+[a-z]?)?$")
+
+Row = TypeVar("Row", bound=Mapping[str, Any])
+
+
+def address_key(address: str | None, suburb: str | None = None) -> str | None:
+    if not address:
+        return None
+    street = _street_part(address, suburb).lower()
+    street = _UNIT_PREFIX.sub(r"\1/", street)
+    street = _SLASH.sub("/", _PUNCTUATION.sub(" ", street))
+    tokens = [STREET_TYPES.get(token, token) for token in street.split()]
+    return " ".join(tokens) or None
+
+
+def block_key(key: str | None, suburb: str | None, postcode: str | None) -> str | None:
+    # Most postcodes cover several suburbs, and a busy street number recurs on
+    # many streets, so the suburb and the street's initial keep blocks small.
+    number = street_number(key)
+    place = _normalise_suburb(suburb)
+    area = (postcode or "").strip()
+    if key is None or number is None or not (area or place):
+        return None
+    street = _split_number(key)[1]
+    return f"{area}:{place}:{number}:{street[:1]}"
+
+
+def street_number(key: str | None) -> str | None:
+    if not key:
+        return None
+    for token in key.split():
+        match = _STREET_NUMBER.match(token)
+        if match:
+            return match.group(2)
+    return None
+
+
+def duplicate_score(left: Mapping[str, Any], right: Mapping[str, Any]) -> float:
+    if not left["address_key"] or not right["address_key"]:
+        return 0.0
+    left_number, left_street = _split_number(left["address_key"])
+    right_number, right_street = _split_number(right["address_key"])
+    # A different unit or lot suffix ("34" vs "34a") is a different property.
+    if left_number is None or left_number != right_number:
+        return 0.0
+    left_suburb = _normalise_suburb(left["suburb"])
+    right_suburb = _normalise_suburb(right["suburb"])
+    if left_suburb and right_suburb and left_suburb != right_suburb:
+        return 0.0
+    for field in ("bedrooms", "bathrooms"):
+        if left[field] is not None and right[field] is not None and left[field] != right[field]:
+            return 0.0
+    return SequenceMatcher(None, left_street, right_street).ratio()
+
+
+def best_duplicate(
+    listing: Mapping[str, Any], candidates: Iterable[Mapping[str, Any]]
+) -> Mapping[str, Any] | None:
+    best: Mapping[str, Any] | None = None
+    best_score = DUPLICATE_THRESHOLD
+    for candidate in candidates:
+        score = duplicate_score(listing, candidate)
+        if score >= best_score:
+            best, best_score = candidate, score
+    return best
+
+
+def collapse_duplicates(rows: Iterable[Row]) -> list[Row]:
+    seen: set[str] = set()
+    collapsed: list[Row] = []
+    for row in rows:
+        key = row["property_id"] or row["id"]
+        if key not in seen:
+            seen.add(key)
+            collapsed.append(row)
+    return collapsed
+
+
+def _street_part(address: str, suburb: str | None) -> str:
+    parts = [part.strip() for part in address.split(",")]
+    lowered = (suburb or "").strip().lower()
+    for index, part in enumerate(parts):
+        if index and lowered and part.lower().startswith(lowered):
+            return " ".join(parts[:index])
+        if _STREET.search(part):
+            return " ".join(parts[: index + 1])
+    return parts[0]
+
+
+def _normalise_suburb(suburb: str | None) -> str:
+    return " ".join((suburb or "").lower().split())
+
+
+def _split_number(key: str) -> tuple[str | None, str]:
+    tokens = key.split()
+    for index, token in enumerate(tokens):
+        if _STREET_NUMBER.match(token):
+            return token, " ".join(tokens[index + 1 :])
+    return None, key
@@ -1,24 +1,219 @@
 from email.message import EmailMessage
+import logging
+import queue
+import random
 import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Iterable
 
 from src.common.config import Settings
+from src.common.metrics import EMAILS_TOTAL
+from src.common.tracing import traced
 
+logger = logging.getLogger(__name__)
 
+SMTP_TIMEOUT_SECONDS = 20
+MAX_BACKOFF_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class OutgoingEmail:
+    to_address: str
+    subject: str
+    body: str
+    key: Any = None
+
+
+@dataclass
+class DeliveryReport:
+    sent: list[Any] = field(default_factory=list)
+    failed: dict[Any, str] = field(default_factory=dict)
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def messages_per_second(self) -> float:
+        total = len(self.sent) + len(self.failed)
+        return total / self.seconds if self.seconds else 0.0
+
+
+@traced("send_email")
 def send_email(settings: Settings, to_address: str, subject: str, body: str) -> None:
+    _check_settings(settings)
+    message = _build_message(settings, to_address, subject, body)
+    try:
+        with _open_connection(settings) as server:
+            server.send_message(message)
+    except Exception:
+        EMAILS_TOTAL.inc(outcome="failed")
+        raise
+    EMAILS_TOTAL.inc(outcome="sent")
+
+
+class SMTPConnectionPool:
+    def __init__(
+        self, settings: Settings, size: int, max_messages_per_connection: int = 100
+    ) -> None:
+        self.settings = settings
+        self.size = max(1, size)
+        self.max_messages_per_connection = max_messages_per_connection
+        self._idle: queue.LifoQueue[tuple[smtplib.SMTP, int]] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def send(self, message: EmailMessage) -> None:
+        with self._slots:
+            server, sent = self._checkout()
+            try:
+                server.send_message(message)
+            except Exception:
+                _quietly_close(server)
+                raise
+            sent += 1
+            if sent >= self.max_messages_per_connection:
+                _quietly_quit(server)
+            else:
+                self._idle.put((server, sent))
+
+    def close(self) -> None:
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _quietly_quit(server)
+
+    def _checkout(self) -> tuple[smtplib.SMTP, int]:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return _open_connection(self.settings), 0
+
+    def __enter__(self) -> "SMTPConnectionPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def send_emails(
+    settings: Settings,
+    emails: Iterable[OutgoingEmail],
+    workers: int | None = None,
+    max_retries: int | None = None,
+) -> DeliveryReport:
+    _check_settings(settings)
+    workers = workers or settings.smtp_pool_size
+    max_retries = settings.smtp_max_retries if max_retries is None else max_retries
+    report = DeliveryReport()
+    report_lock = threading.Lock()
+
+    def deliver(email: OutgoingEmail) -> None:
+        message = _build_message(settings, email.to_address, email.subject, email.body)
+        attempt = 0
+        while True:
+            try:
+                pool.send(message)
+            except Exception as exc:
+                if attempt < max_retries and _is_transient(exc):
+                    attempt += 1
+                    with report_lock:
+                        report.retries += 1
+                    EMAILS_TOTAL.inc(outcome="retried")
+                    time.sleep(_backoff_seconds(attempt))
+                    continue
+                EMAILS_TOTAL.inc(outcome="failed")
+                with report_lock:
+                    report.failed[email.key] = str(exc)
+                return
+            EMAILS_TOTAL.inc(outcome="sent")
+            with report_lock:
+                report.sent.append(email.key)
+            return
+
+    start = time.perf_counter()
+    with SMTPConnectionPool(settings, workers) as pool:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(deliver, emails))
+    report.seconds = time.perf_counter() - start
+    logger.info(
+        "Delivered %s emails (%s failed, %s retries) in %.2fs, %.1f msg/s",
+        len(report.sent),
+        len(report.failed),
+        report.retries,
+        report.seconds,
+        report.messages_per_second,
+    )
+    return report
+
+
+def _check_settings(settings: Settings) -> None:
     if not settings.smtp_host:
         raise ValueError("SMTP_HOST is not configured.")
     if not settings.smtp_from:
         raise ValueError("SMTP_FROM is not configured.")
 
+
+def _build_message(
+    settings: Settings, to_address: str, subject: str, body: str
+) -> EmailMessage:
     message = EmailMessage()
     message["From"] = settings.smtp_from
     message["To"] = to_address
     message["Subject"] = subject
     message.set_content(body)
+    return message
+
 
-    with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=20) as server:
+def _open_connection(settings: Settings) -> smtplib.SMTP:
+    server = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=SMTP_TIMEOUT_SECONDS)
+    try:
         if settings.smtp_use_tls:
             server.starttls()
         if settings.smtp_user and settings.smtp_password:
             server.login(settings.smtp_user, settings.smtp_password)
-        server.send_message(message)
+    except Exception:
+        _quietly_close(server)
+        raise
+    return server
+
+
+def _is_transient(exc: Exception) -> bool:
+    if isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return False
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    return isinstance(exc, OSError)
+
+
+def max_delivery_seconds(settings: Settings) -> float:
+    # Worst case for one message: every attempt times out opening a connection
+    # and again sending on it, with the longest backoff between attempts.
+    attempts = settings.smtp_max_retries + 1
+    backoff = sum(
+        min(MAX_BACKOFF_SECONDS, 0.5 * 2 ** (attempt - 1)) * 1.2
+        for attempt in range(1, attempts)
+    )
+    return attempts * 2 * SMTP_TIMEOUT_SECONDS + backoff
+
+
+def _backoff_seconds(attempt: int) -> float:
+    return min(MAX_BACKOFF_SECONDS, 0.5 * 2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+
+
+def _quietly_quit(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except Exception:
+        _quietly_close(server)
+
+
+def _quietly_close(server: smtplib.SMTP) -> None:
+    try:
+        server.close()
+    except Exception:
+        pass
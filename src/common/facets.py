@@ -0,0 +1,73 @@
+from typing import Any, Iterable, Mapping
+
+FACETS = ("property_type", "bedrooms", "price_band", "suburb")
+
+UNKNOWN = "unknown"
+
+MAX_BEDROOMS = 5
+
+PRICE_BANDS = (
+    (500_000, "under $500k"),
+    (750_000, "$500k-$750k"),
+    (1_000_000, "$750k-$1m"),
+    (1_500_000, "$1m-$1.5m"),
+    (2_000_000, "$1.5m-$2m"),
+)
+TOP_PRICE_BAND = "$2m+"
+
+
+def bedroom_bucket(bedrooms: int | None) -> str:
+    if bedrooms is None:
+        return UNKNOWN
+    if bedrooms >= MAX_BEDROOMS:
+        return f"{MAX_BEDROOMS}+"
+    return str(bedrooms)
+
+
+def price_band(price_min: int | None, price_max: int | None) -> str:
+    price = price_min if price_min is not None else price_max
+    if price is None:
+        return UNKNOWN
+    for upper, label in PRICE_BANDS:
+        if price < upper:
+            return label
+    return TOP_PRICE_BAND
+
+
+def facet_values(listing: Mapping[str, Any]) -> dict[str, str]:
+    return {
+        "property_type": listing["property_type"] or UNKNOWN,
+        "bedrooms": bedroom_bucket(listing["bedrooms"]),
+        "price_band": price_band(listing["price_min"], listing["price_max"]),
+        "suburb": listing["suburb"] or UNKNOWN,
+    }
+
+
+def facet_columns_sql() -> str:
+    # The same buckets as facet_values, so a grouped query and the maintained
+    # per-suburb counts agree.
+    bedrooms = (
+        f"CASE WHEN bedrooms IS NULL THEN '{UNKNOWN}' "
+        f"WHEN bedrooms >= {MAX_BEDROOMS} THEN '{MAX_BEDROOMS}+' "
+        "ELSE CAST(bedrooms AS TEXT) END"
+    )
+    price = "COALESCE(price_min, price_max)"
+    bands = " ".join(f"WHEN {price} < {upper} THEN '{label}'" for upper, label in PRICE_BANDS)
+    band = f"CASE WHEN {price} IS NULL THEN '{UNKNOWN}' {bands} ELSE '{TOP_PRICE_BAND}' END"
+    return (
+        f"COALESCE(NULLIF(property_type, ''), '{UNKNOWN}') AS property_type, "
+        f"{bedrooms} AS bedrooms, "
+        f"{band} AS price_band, "
+        f"COALESCE(NULLIF(suburb, ''), '{UNKNOWN}') AS suburb"
+    )
+
+
+def merge_counts(rows: Iterable[tuple[str, str, int]]) -> dict[str, dict[str, int]]:
+    counts: dict[str, dict[str, int]] = {facet: {} for facet in FACETS}
+    for facet, value, count in rows:
+        if count:
+            counts[facet][value] = counts[facet].get(value, 0) + count
+    return {
+        facet: dict(sorted(values.items(), key=lambda item: (-item[1], item[0])))
+        for facet, values in counts.items()
+    }
@@ -0,0 +1,115 @@
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Iterable
+
+from src.common.suburb_matcher import tokenize
+
+
+@dataclass(frozen=True)
+class SuburbMatch:
+    name: str
+    score: float
+
+
+class FuzzySuburbIndex:
+    """Trigram inverted index over suburb names for typo-tolerant lookups."""
+
+    def __init__(self, names: Iterable[str], posting_budget: int = 20_000) -> None:
+        self.posting_budget = posting_budget
+        self._names: list[str] = []
+        self._keys: list[str] = []
+        self._gram_counts: list[int] = []
+        self._by_key: dict[str, int] = {}
+        self._postings: dict[str, list[int]] = {}
+        for name in names:
+            key = normalize_name(name)
+            if not key or key in self._by_key:
+                continue
+            index = len(self._names)
+            self._by_key[key] = index
+            self._names.append(name)
+            self._keys.append(key)
+            grams = _trigrams(key)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(index)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def exact(self, text: str) -> str | None:
+        index = self._by_key.get(normalize_name(text))
+        return self._names[index] if index is not None else None
+
+    def resolve(
+        self,
+        text: str,
+        min_score: float = 0.0,
+        max_candidates: int = 25,
+        min_margin: float = 0.0,
+        min_length_ratio: float = 0.0,
+    ) -> SuburbMatch | None:
+        key = normalize_name(text)
+        if not key:
+            return None
+        index = self._by_key.get(key)
+        if index is not None:
+            return SuburbMatch(self._names[index], 1.0)
+
+        grams = _trigrams(key)
+        overlap: dict[int, int] = {}
+        budget = self.posting_budget
+        # Rare grams first: they are the most selective and the cheapest to walk,
+        # so a capped budget still sees the candidates that matter.
+        for gram in sorted(grams, key=lambda item: len(self._postings.get(item, ()))):
+            postings = self._postings.get(gram)
+            if not postings:
+                continue
+            if len(postings) > budget:
+                break
+            budget -= len(postings)
+            for candidate in postings:
+                overlap[candidate] = overlap.get(candidate, 0) + 1
+        if not overlap:
+            return None
+
+        shortlist = sorted(
+            overlap,
+            key=lambda candidate: -_dice(overlap[candidate], len(grams), self._gram_counts[candidate]),
+        )[:max_candidates]
+        best: SuburbMatch | None = None
+        best_key = ""
+        runner_up = 0.0
+        for candidate in shortlist:
+            dice = _dice(overlap[candidate], len(grams), self._gram_counts[candidate])
+            ratio = SequenceMatcher(None, key, self._keys[candidate]).ratio()
+            score = round((dice + ratio) / 2, 4)
+            if best is None or score > best.score:
+                runner_up = best.score if best is not None else 0.0
+                best = SuburbMatch(self._names[candidate], score)
+                best_key = self._keys[candidate]
+            else:
+                runner_up = max(runner_up, score)
+        if best is None or best.score < min_score:
+            return None
+        # A generic word such as "north" scores well against every name that
+        # contains it; those matches are much longer than the text or barely
+        # ahead of the next candidate.
+        if min(len(key), len(best_key)) / max(len(key), len(best_key)) < min_length_ratio:
+            return None
+        if best.score - runner_up < min_margin:
+            return None
+        return best
+
+
+def normalize_name(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+def _trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+def _dice(shared: int, left: int, right: int) -> float:
+    return 2.0 * shared / (left + right) if left + right else 0.0
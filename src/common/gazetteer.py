@@ -0,0 +1,292 @@
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+
+from src.common.config import Settings, load_settings
+from src.common.fuzzy_suburbs import FuzzySuburbIndex, normalize_name
+from src.common.suburb_matcher import SuburbMatcher
+from src.common.suburb_profiles import SuburbProfile, read_profiles
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 3
+# How long a loaded gazetteer is trusted before its source files are
+# checked for changes again.
+SIGNATURE_TTL_SECONDS = 60.0
+DEFAULT_SUBURBS_PATH = Path(__file__).with_name("suburbs_vic.txt")
+DATA_SUBURBS_PATH = Path("data/suburbs.csv")
+DATA_PROFILES_PATH = Path("data/suburb_profiles.csv")
+SAMPLE_PROFILES_PATH = Path(__file__).with_name("suburb_profiles_sample.csv")
+
+Signature = tuple[tuple[str, int, int], ...]
+
+
+@dataclass(frozen=True)
+class GazetteerSources:
+    suburb_paths: tuple[str, ...]
+    profiles_path: str | None
+    snapshot_path: str | None
+
+    def signature(self) -> Signature:
+        paths = list(self.suburb_paths)
+        if self.profiles_path:
+            paths.append(self.profiles_path)
+        entries = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                entries.append((path, -1, -1))
+                continue
+            entries.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+
+class Gazetteer:
+    def __init__(
+        self,
+        suburbs: list[str],
+        postcodes: dict[str, list[str]],
+        profiles: list[SuburbProfile],
+        signature: Signature = (),
+    ) -> None:
+        self.suburbs = suburbs
+        self.signature = signature
+        self.by_key: dict[str, str] = {normalize_name(name): name for name in suburbs}
+        self.postcodes_by_key: dict[str, frozenset[str]] = {
+            key: frozenset(values) for key, values in postcodes.items()
+        }
+        self.suburbs_by_postcode: dict[str, list[str]] = {}
+        for key, values in postcodes.items():
+            name = self.by_key.get(key)
+            if not name:
+                continue
+            for postcode in values:
+                self.suburbs_by_postcode.setdefault(postcode, []).append(name)
+        self.profiles = profiles
+        self.profiles_by_key: dict[str, SuburbProfile] = {}
+        for profile in profiles:
+            self.profiles_by_key.setdefault(normalize_name(profile.suburb), profile)
+
+    def __len__(self) -> int:
+        return len(self.suburbs)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and normalize_name(name) in self.by_key
+
+    @cached_property
+    def matcher(self) -> SuburbMatcher:
+        return SuburbMatcher(self.suburbs)
+
+    @cached_property
+    def fuzzy_index(self) -> FuzzySuburbIndex:
+        return FuzzySuburbIndex(self.suburbs)
+
+    def canonical(self, name: str) -> str | None:
+        return self.by_key.get(normalize_name(name))
+
+    def postcodes(self, name: str) -> frozenset[str]:
+        return self.postcodes_by_key.get(normalize_name(name), frozenset())
+
+    def states(self, name: str) -> set[str]:
+        states = {state_for_postcode(postcode) for postcode in self.postcodes(name)}
+        profile = self.profile(name)
+        if profile and profile.state:
+            states.add(profile.state.upper())
+        states.discard("")
+        return states
+
+    def profile(self, name: str) -> SuburbProfile | None:
+        return self.profiles_by_key.get(normalize_name(name))
+
+
+_LOCK = threading.Lock()
+_LOADED: dict[GazetteerSources, Gazetteer] = {}
+_CHECKED_AT: dict[GazetteerSources, float] = {}
+_DEFAULT_SOURCES: GazetteerSources | None = None
+
+
+def get_gazetteer(settings: Settings | None = None) -> Gazetteer:
+    global _DEFAULT_SOURCES
+    if settings is None:
+        if _DEFAULT_SOURCES is None:
+            _DEFAULT_SOURCES = sources_for(load_settings())
+        sources = _DEFAULT_SOURCES
+    else:
+        sources = sources_for(settings)
+    cached = _LOADED.get(sources)
+    now = time.monotonic()
+    if cached is not None and now - _CHECKED_AT.get(sources, 0.0) < SIGNATURE_TTL_SECONDS:
+        return cached
+    signature = sources.signature()
+    if cached is not None and cached.signature == signature:
+        _CHECKED_AT[sources] = now
+        return cached
+    with _LOCK:
+        cached = _LOADED.get(sources)
+        if cached is None or cached.signature != signature:
+            cached = _read_snapshot(sources, signature)
+            if cached is None:
+                cached = build_gazetteer(sources, signature)
+                _write_snapshot(sources, cached)
+            _LOADED[sources] = cached
+        _CHECKED_AT[sources] = now
+        return cached
+
+
+def sources_for(settings: Settings) -> GazetteerSources:
+    suburb_paths = [str(DEFAULT_SUBURBS_PATH), str(DATA_SUBURBS_PATH)]
+    if settings.suburbs_path and Path(settings.suburbs_path).exists():
+        suburb_paths.append(settings.suburbs_path)
+    return GazetteerSources(
+        suburb_paths=tuple(suburb_paths),
+        profiles_path=_profiles_path(settings),
+        snapshot_path=settings.gazetteer_snapshot_path,
+    )
+
+
+def build_gazetteer(sources: GazetteerSources, signature: Signature = ()) -> Gazetteer:
+    suburbs: list[str] = []
+    postcodes: dict[str, list[str]] = {}
+    seen: set[str] = set()
+    for path in sources.suburb_paths:
+        for name, postcode in _read_suburb_names(Path(path)):
+            key = normalize_name(name)
+            if not key:
+                continue
+            if key not in seen:
+                seen.add(key)
+                suburbs.append(display_name(name))
+            if postcode:
+                values = postcodes.setdefault(key, [])
+                if postcode not in values:
+                    values.append(postcode)
+    profiles = read_profiles(Path(sources.profiles_path)) if sources.profiles_path else []
+    return Gazetteer(suburbs, postcodes, profiles, signature)
+
+
+def state_for_postcode(postcode: str | None) -> str:
+    try:
+        value = int(postcode or "")
+    except ValueError:
+        return ""
+    if 200 <= value <= 299 or 2600 <= value <= 2618 or 2900 <= value <= 2920:
+        return "ACT"
+    if 800 <= value <= 999:
+        return "NT"
+    if 1000 <= value <= 2999:
+        return "NSW"
+    if 3000 <= value <= 3999 or 8000 <= value <= 8999:
+        return "VIC"
+    if 4000 <= value <= 4999 or 9000 <= value <= 9999:
+        return "QLD"
+    if 5000 <= value <= 5999:
+        return "SA"
+    if 6000 <= value <= 6999:
+        return "WA"
+    if 7000 <= value <= 7999:
+        return "TAS"
+    return ""
+
+
+def _profiles_path(settings: Settings) -> str | None:
+    if settings.suburb_profiles_path and Path(settings.suburb_profiles_path).exists():
+        return settings.suburb_profiles_path
+    if DATA_PROFILES_PATH.exists():
+        return str(DATA_PROFILES_PATH)
+    if SAMPLE_PROFILES_PATH.exists():
+        return str(SAMPLE_PROFILES_PATH)
+    return None
+
+
+def _read_suburb_names(path: Path) -> list[tuple[str, str | None]]:
+    if not path.exists():
+        return []
+    entries: list[tuple[str, str | None]] = []
+    with path.open("r", encoding="utf-8") as handle:
+        if path.suffix.lower() == ".csv":
+            for row in csv.DictReader(handle):
+                value = (row.get("suburb") or "").strip()
+                if value:
+                    entries.append((value, (row.get("postcode") or "").strip() or None))
+        else:
+            for line in handle:
+                value = line.strip()
+                if value:
+                    entries.append((value, None))
+    return entries
+
+
+def display_name(name: str) -> str:
+    if not name.isupper():
+        return name
+    words = []
+    for word in name.split():
+        parts = [part.capitalize() for part in word.lower().split("'")]
+        word = "'".join(parts)
+        word = "-".join(part[:1].upper() + part[1:] for part in word.split("-"))
+        if word.startswith("Mc") and len(word) > 2:
+            word = "Mc" + word[2].upper() + word[3:]
+        words.append(word)
+    return " ".join(words)
+
+
+def _read_snapshot(sources: GazetteerSources, signature: Signature) -> Gazetteer | None:
+    # The snapshot holds plain data only; the matcher and fuzzy index are
+    # rebuilt from the suburb names when first used.
+    if not sources.snapshot_path:
+        return None
+    try:
+        with open(sources.snapshot_path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(payload, dict)
+        or payload.get("version") != SNAPSHOT_VERSION
+        or payload.get("signature") != [list(entry) for entry in signature]
+    ):
+        return None
+    try:
+        profiles = [SuburbProfile(*fields) for fields in payload["profiles"]]
+        return Gazetteer(payload["suburbs"], payload["postcodes"], profiles, signature)
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+
+def _write_snapshot(sources: GazetteerSources, gazetteer: Gazetteer) -> None:
+    if not sources.snapshot_path:
+        return
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "signature": gazetteer.signature,
+        "suburbs": gazetteer.suburbs,
+        "postcodes": {key: sorted(values) for key, values in gazetteer.postcodes_by_key.items()},
+        "profiles": [
+            (
+                profile.suburb,
+                profile.state,
+                profile.latitude,
+                profile.longitude,
+                profile.median_price,
+                profile.median_rent,
+            )
+            for profile in gazetteer.profiles
+        ],
+    }
+    target = Path(sources.snapshot_path)
+    temp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with temp.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle, separators=(",", ":"))
+        os.replace(temp, target)
+    except OSError as exc:
+        logger.warning("Could not write gazetteer snapshot %s: %s", target, exc)
+        temp.unlink(missing_ok=True)
@@ -0,0 +1,246 @@
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self._values: dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+    def summary(self) -> dict[str, float]:
+        with self._lock:
+            return {_summary_key(key): value for key, value in sorted(self._values.items())}
+
+
+class Histogram:
+    def __init__(
+        self, name: str, help_text: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series: dict[LabelKey, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Bucket counts followed by total count and sum.
+                series = [0.0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(_label_key(labels))
+        return int(series[-2]) if series else 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            for bound, bucket_count in zip(self.buckets, series):
+                bucket_key = key + (("le", _format_value(bound)),)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(bucket_key)} "
+                    f"{_format_value(bucket_count)}"
+                )
+            inf_key = key + (("le", "+Inf"),)
+            lines.append(
+                f"{self.name}_bucket{_format_labels(inf_key)} {_format_value(series[-2])}"
+            )
+            lines.append(f"{self.name}_count{_format_labels(key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series[-1])}")
+        return lines
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        result: dict[str, dict[str, float]] = {}
+        for key, series in items:
+            count = series[-2]
+            total = series[-1]
+            result[_summary_key(key)] = {
+                "count": int(count),
+                "sum": round(total, 6),
+                "avg": round(total / count, 6) if count else 0.0,
+            }
+        return result
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(name, lambda: Counter(name, help_text))
+
+    def histogram(
+        self, name: str, help_text: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(name, lambda: Histogram(name, help_text, buckets))
+
+    def _register(self, name: str, factory: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = factory()
+                self._metrics[name] = metric
+            return metric
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict[str, Any]:
+        result: dict[str, Any] = {}
+        for name, metric in sorted(self._metrics.items()):
+            values = metric.summary()
+            if values:
+                result[name] = values
+        return result
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+REGISTRY = Registry()
+
+FETCH_SECONDS = REGISTRY.histogram(
+    "propertyhunter_fetch_seconds", "Time spent fetching a page, by HTTP status."
+)
+FETCH_TOTAL = REGISTRY.counter(
+    "propertyhunter_fetch_total", "Pages fetched, by HTTP status."
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "propertyhunter_parse_seconds", "Time spent parsing a page, by format path."
+)
+PARSED_LISTINGS_TOTAL = REGISTRY.counter(
+    "propertyhunter_parsed_listings_total", "Listings extracted, by format path."
+)
+INGEST_PAGES_TOTAL = REGISTRY.counter(
+    "propertyhunter_ingest_pages_total", "Ingested pages, by outcome (ok/blocked/failed)."
+)
+UPSERT_SECONDS = REGISTRY.histogram(
+    "propertyhunter_upsert_seconds", "Time spent in one upsert batch."
+)
+UPSERT_ROWS_TOTAL = REGISTRY.counter(
+    "propertyhunter_upsert_rows_total",
+    "Listing rows upserted, by kind (new/changed/unchanged, or stale when older than stored).",
+)
+QUERY_SECONDS = REGISTRY.histogram(
+    "propertyhunter_query_seconds", "Listing query latency, by filter shape."
+)
+EMAILS_TOTAL = REGISTRY.counter(
+    "propertyhunter_emails_total", "Notification emails, by outcome (sent/failed)."
+)
+
+
+def summary() -> dict[str, Any]:
+    result = REGISTRY.summary()
+    upsert_seconds = sum(item["sum"] for item in UPSERT_SECONDS.summary().values())
+    rows = sum(UPSERT_ROWS_TOTAL.summary().values())
+    if upsert_seconds:
+        result["upsert_rows_per_second"] = round(rows / upsert_seconds, 1)
+    return result
+
+
+def summary_json() -> str:
+    return json.dumps(summary(), indent=2, sort_keys=True)
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render_prometheus()
+
+
+def _label_key(labels: dict[str, str]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    parts = []
+    for name, value in key:
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _summary_key(key: LabelKey) -> str:
+    if not key:
+        return "all"
+    return ",".join(f"{name}={value}" for name, value in key)
@@ -0,0 +1,167 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Mapping
+
+PRICE_EDGES = (
+    250_000,
+    500_000,
+    750_000,
+    1_000_000,
+    1_500_000,
+    2_000_000,
+    3_000_000,
+    5_000_000,
+)
+MAX_BEDROOM_BUCKET = 6
+
+NeighbourLookup = Callable[[str, float], list[str]]
+
+
+@dataclass(frozen=True)
+class CompiledSearch:
+    id: int
+    suburbs: frozenset[str] | None
+    min_price: int | None
+    max_price: int | None
+    bedrooms: int | None
+    property_type: str | None
+    since: str | None
+
+    def matches(self, listing: Mapping[str, Any]) -> bool:
+        if self.suburbs is not None and listing["suburb"] not in self.suburbs:
+            return False
+        if self.property_type and listing["property_type"] != self.property_type:
+            return False
+        if self.min_price is not None:
+            price_min = listing["price_min"]
+            if price_min is not None and price_min < self.min_price:
+                return False
+        if self.max_price is not None:
+            price_max = listing["price_max"]
+            if price_max is not None and price_max > self.max_price:
+                return False
+        if self.bedrooms is not None:
+            bedrooms = listing["bedrooms"]
+            if bedrooms is not None and bedrooms < self.bedrooms:
+                return False
+        if self.since and not (listing["scraped_at"] or "") > self.since:
+            return False
+        return True
+
+
+def compile_search(
+    search_id: int,
+    criteria: Mapping[str, Any],
+    since: str | None = None,
+    neighbours: NeighbourLookup | None = None,
+) -> CompiledSearch:
+    suburbs: frozenset[str] | None = None
+    if criteria.get("suburbs"):
+        suburbs = frozenset(criteria["suburbs"])
+    elif criteria.get("suburb"):
+        suburb = criteria["suburb"]
+        radius_km = criteria.get("radius_km")
+        names = {suburb}
+        if radius_km and neighbours is not None:
+            names.update(neighbours(suburb, float(radius_km)))
+        suburbs = frozenset(names)
+    return CompiledSearch(
+        id=search_id,
+        suburbs=suburbs,
+        min_price=criteria.get("min_price"),
+        max_price=criteria.get("max_price"),
+        bedrooms=criteria.get("bedrooms"),
+        property_type=criteria.get("property_type") or None,
+        since=since,
+    )
+
+
+class Percolator:
+    """Inverted index of saved searches, queried with one listing at a time.
+
+    Searches are keyed by (suburb, property type) with wildcards, then by
+    minimum-bedroom and maximum-price buckets, so a listing only visits the
+    handful of postings it could satisfy before the exact predicate check.
+    """
+
+    def __init__(self, searches: Iterable[CompiledSearch]) -> None:
+        self._postings: dict[
+            tuple[str | None, str | None], dict[int | None, dict[int | None, list[CompiledSearch]]]
+        ] = {}
+        self._size = 0
+        for search in searches:
+            self._add(search)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _add(self, search: CompiledSearch) -> None:
+        bed_bucket = _bedroom_bucket(search.bedrooms)
+        price_bucket = _price_bucket(search.max_price)
+        for suburb in search.suburbs if search.suburbs is not None else (None,):
+            beds = self._postings.setdefault((suburb, search.property_type), {})
+            beds.setdefault(bed_bucket, {}).setdefault(price_bucket, []).append(search)
+        self._size += 1
+
+    def match(
+        self, listing: Mapping[str, Any], skip: set[int] | None = None
+    ) -> list[int]:
+        suburb = listing["suburb"]
+        property_type = listing["property_type"]
+        listing_beds = _bedroom_bucket(listing["bedrooms"])
+        listing_price = _price_bucket(listing["price_max"])
+        matched: list[int] = []
+        # A search sits under exactly one of these keys for any given listing;
+        # they collapse into each other when the listing has no suburb or type.
+        for key in dict.fromkeys(
+            (
+                (suburb, property_type),
+                (suburb, None),
+                (None, property_type),
+                (None, None),
+            )
+        ):
+            beds = self._postings.get(key)
+            if not beds:
+                continue
+            for bed_bucket, prices in beds.items():
+                if bed_bucket is not None and listing_beds is not None and bed_bucket > listing_beds:
+                    continue
+                for price_bucket, searches in prices.items():
+                    if (
+                        price_bucket is not None
+                        and listing_price is not None
+                        and price_bucket < listing_price
+                    ):
+                        continue
+                    for search in searches:
+                        if skip and search.id in skip:
+                            continue
+                        if search.matches(listing):
+                            matched.append(search.id)
+        return matched
+
+    def collect(
+        self, listings: Iterable[Mapping[str, Any]], limit: int | None = None
+    ) -> dict[int, list[Mapping[str, Any]]]:
+        results: dict[int, list[Mapping[str, Any]]] = {}
+        full: set[int] = set()
+        for listing in listings:
+            for search_id in self.match(listing, full):
+                bucket = results.setdefault(search_id, [])
+                bucket.append(listing)
+                if limit is not None and len(bucket) >= limit:
+                    full.add(search_id)
+        return results
+
+
+def _bedroom_bucket(bedrooms: int | None) -> int | None:
+    if bedrooms is None:
+        return None
+    return min(int(bedrooms), MAX_BEDROOM_BUCKET)
+
+
+def _price_bucket(price: int | None) -> int | None:
+    if price is None:
+        return None
+    return bisect_left(PRICE_EDGES, price)
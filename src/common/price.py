@@ -1,14 +1,25 @@
 import re
+from functools import lru_cache
+
+PRICE_CACHE_SIZE = 16384
+
+_NO_PRICE = re.compile("contact|auction|tender|price on application|poa")
+_MAX_MARKERS = re.compile("under|up to|maximum")
+_MIN_MARKERS = re.compile("from|offers over|over|starting")
+_NUMBER = re.compile(r"(\d+(?:\.\d+)?)\s*([mk])?")
+_STRIP = str.maketrans("", "", "$,")
 
 
 def parse_price_range(text: str | None) -> tuple[int | None, int | None]:
     if not text:
         return None, None
+    return _parse_price_text(text)
+
+
+@lru_cache(maxsize=PRICE_CACHE_SIZE)
+def _parse_price_text(text: str) -> tuple[int | None, int | None]:
     lowered = text.lower()
-    if any(
-        marker in lowered
-        for marker in ["contact", "auction", "tender", "price on application", "poa"]
-    ):
+    if _NO_PRICE.search(lowered):
         return None, None
 
     numbers = _extract_price_numbers(lowered)
@@ -19,23 +30,17 @@ def parse_price_range(text: str | None) -> tuple[int | None, int | None]:
         return numbers[0], numbers[1]
 
     value = numbers[0]
-    if any(marker in lowered for marker in ["under", "up to", "maximum"]):
+    if _MAX_MARKERS.search(lowered):
         return None, value
-    if any(marker in lowered for marker in ["from", "offers over", "over", "starting"]):
+    if _MIN_MARKERS.search(lowered):
         return value, None
     return value, None
 
 
 def _extract_price_numbers(text: str) -> list[int]:
     numbers: list[int] = []
-    normalized = text.replace("$", "").replace(",", "")
-    for match in re.finditer(r"(\d+(?:\.\d+)?)\s*([mk])?", normalized):
-        raw = match.group(1)
-        suffix = match.group(2)
-        try:
-            value = float(raw)
-        except ValueError:
-            continue
+    for raw, suffix in _NUMBER.findall(text.translate(_STRIP)):
+        value = float(raw)
         if suffix == "m":
             value *= 1_000_000
         elif suffix == "k":
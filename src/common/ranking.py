@@ -0,0 +1,96 @@
+import heapq
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterable, Mapping
+
+SORT_MODES = ("newest", "relevance")
+
+RECENCY_HALF_LIFE_DAYS = 14.0
+
+# Relevance ranks only the newest matches, so a broad search scores a bounded
+# slice of the table instead of every row.
+MIN_RELEVANCE_CANDIDATES = 2000
+RELEVANCE_CANDIDATES_PER_RESULT = 20
+
+WEIGHTS = {"price": 0.35, "bedrooms": 0.25, "distance": 0.2, "recency": 0.2}
+
+
+@dataclass(frozen=True)
+class RankingCriteria:
+    min_price: int | None = None
+    max_price: int | None = None
+    bedrooms: int | None = None
+    radius_km: float | None = None
+    distances: Mapping[str, float] | None = None
+    now: datetime | None = None
+
+
+def relevance_score(listing: Mapping[str, Any], criteria: RankingCriteria) -> float:
+    return (
+        WEIGHTS["price"] * _price_fit(listing, criteria)
+        + WEIGHTS["bedrooms"] * _bedroom_fit(listing["bedrooms"], criteria.bedrooms)
+        + WEIGHTS["distance"] * _distance_fit(listing["suburb"], criteria)
+        + WEIGHTS["recency"] * _recency(listing["scraped_at"], criteria.now)
+    )
+
+
+def relevance_candidates(limit: int) -> int:
+    return max(MIN_RELEVANCE_CANDIDATES, limit * RELEVANCE_CANDIDATES_PER_RESULT)
+
+
+def top_k(
+    listings: Iterable[Mapping[str, Any]], criteria: RankingCriteria, limit: int
+) -> list[tuple[float, Mapping[str, Any]]]:
+    # nlargest keeps a heap of `limit` entries, so memory stays bounded however
+    # many candidates stream past. The index breaks ties without comparing rows.
+    scored = (
+        (relevance_score(listing, criteria), -index, listing)
+        for index, listing in enumerate(listings)
+    )
+    return [(score, listing) for score, _, listing in heapq.nlargest(limit, scored)]
+
+
+def _price_fit(listing: Mapping[str, Any], criteria: RankingCriteria) -> float:
+    if criteria.min_price is None and criteria.max_price is None:
+        return 1.0
+    price = listing["price_min"] if listing["price_min"] is not None else listing["price_max"]
+    if price is None:
+        return 0.5
+    if criteria.min_price is not None and price < criteria.min_price:
+        return max(0.0, 1.0 - (criteria.min_price - price) / criteria.min_price)
+    if criteria.max_price is not None and price > criteria.max_price:
+        return max(0.0, 1.0 - (price - criteria.max_price) / criteria.max_price)
+    return 1.0
+
+
+def _bedroom_fit(bedrooms: int | None, wanted: int | None) -> float:
+    if wanted is None:
+        return 1.0
+    if bedrooms is None:
+        return 0.5
+    if bedrooms < wanted:
+        return 0.0
+    return 1.0 / (1.0 + 0.5 * (bedrooms - wanted))
+
+
+def _distance_fit(suburb: str | None, criteria: RankingCriteria) -> float:
+    if not criteria.radius_km or criteria.distances is None:
+        return 1.0
+    distance = criteria.distances.get((suburb or "").lower())
+    if distance is None:
+        return 0.5
+    return max(0.0, 1.0 - distance / criteria.radius_km)
+
+
+def _recency(scraped_at: str | None, now: datetime | None) -> float:
+    if not scraped_at:
+        return 0.0
+    try:
+        seen = datetime.fromisoformat(scraped_at)
+    except ValueError:
+        return 0.0
+    if seen.tzinfo is None:
+        seen = seen.replace(tzinfo=timezone.utc)
+    age_days = max(0.0, ((now or datetime.now(timezone.utc)) - seen).total_seconds() / 86400)
+    return math.exp(-math.log(2) * age_days / RECENCY_HALF_LIFE_DAYS)
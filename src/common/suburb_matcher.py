@@ -0,0 +1,53 @@
+import re
+from typing import Any, Iterable
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+_TERMINAL = ""
+
+
+class SuburbMatcher:
+    """Token trie over suburb names, matched on word boundaries in one pass."""
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self._root: dict[str, Any] = {}
+        self._size = 0
+        for order, name in enumerate(names):
+            tokens = tokenize(name)
+            if not tokens:
+                continue
+            node = self._root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            if _TERMINAL not in node:
+                node[_TERMINAL] = (order, name)
+                self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def find_all(self, text: str) -> list[str]:
+        return [name for _, _, name in self._scan(tokenize(text))]
+
+    def longest(self, text: str) -> str | None:
+        best: tuple[int, int, str] | None = None
+        for order, length, name in self._scan(tokenize(text)):
+            if best is None or length > best[1] or (length == best[1] and order < best[0]):
+                best = (order, length, name)
+        return best[2] if best else None
+
+    def _scan(self, tokens: list[str]) -> Iterable[tuple[int, int, str]]:
+        count = len(tokens)
+        for start in range(count):
+            node = self._root
+            for index in range(start, count):
+                node = node.get(tokens[index])
+                if node is None:
+                    break
+                terminal = node.get(_TERMINAL)
+                if terminal:
+                    order, name = terminal
+                    yield order, len(name), name
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
@@ -1,10 +1,17 @@
 import csv
+import math
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable, Sequence
 
-from src.common.config import load_settings
-from src.common.geo import haversine_km
+from src.common.geo import haversine_km_many
+
+if TYPE_CHECKING:
+    import numpy as np
+
+KM_PER_DEGREE = 111.32
 
 
 @dataclass(frozen=True)
@@ -18,18 +25,12 @@ class SuburbProfile:
 
 
 def load_profiles() -> list[SuburbProfile]:
-    settings = load_settings()
-    path = None
-    if settings.suburb_profiles_path:
-        candidate = Path(settings.suburb_profiles_path)
-        if candidate.exists():
-            path = candidate
-    if path is None:
-        data_path = Path("data/suburb_profiles.csv")
-        if data_path.exists():
-            path = data_path
-    if path is None:
-        path = Path(__file__).with_name("suburb_profiles_sample.csv")
+    from src.common.gazetteer import get_gazetteer
+
+    return get_gazetteer().profiles
+
+
+def read_profiles(path: Path) -> list[SuburbProfile]:
     if not path.exists():
         return []
 
@@ -53,49 +54,182 @@ def load_profiles() -> list[SuburbProfile]:
     return profiles
 
 
+class ProfileIndex:
+    """Grid index over profile centroids with cached, sorted per-centre distances."""
+
+    def __init__(
+        self,
+        profiles: Sequence[SuburbProfile],
+        cell_degrees: float = 0.25,
+        cache_size: int = 256,
+    ) -> None:
+        import numpy as np
+
+        self.profiles = list(profiles)
+        self.cell_degrees = cell_degrees
+        self.cache_size = cache_size
+        self._by_name: dict[str, int] = {}
+        for index, profile in enumerate(self.profiles):
+            self._by_name.setdefault(profile.suburb.lower(), index)
+        self._lats = np.array([profile.latitude for profile in self.profiles], dtype=float)
+        self._lons = np.array([profile.longitude for profile in self.profiles], dtype=float)
+        cells: dict[tuple[int, int], list[int]] = {}
+        for index in range(len(self.profiles)):
+            cells.setdefault(self._cell(self._lats[index], self._lons[index]), []).append(index)
+        self._cells = {key: np.array(value, dtype=np.int64) for key, value in cells.items()}
+        self._sorted: OrderedDict[int, tuple[np.ndarray, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def find(self, suburb: str) -> SuburbProfile | None:
+        index = self._by_name.get(suburb.lower())
+        return self.profiles[index] if index is not None else None
+
+    def within(self, center_suburb: str, radius_km: float) -> list[SuburbProfile]:
+        center = self._by_name.get(center_suburb.lower())
+        if center is None:
+            return []
+        with self._lock:
+            cached = self._sorted.get(center)
+        if cached is not None:
+            import numpy as np
+
+            distances, order = cached
+            count = int(np.searchsorted(distances, radius_km, side="right"))
+            indices = order[:count]
+        else:
+            indices = self._grid_within(center, radius_km)
+        matches = [self.profiles[index] for index in indices.tolist()]
+        matches.sort(key=lambda item: item.suburb)
+        return matches
+
+    def distance_map(self, center_suburb: str) -> dict[str, float]:
+        center = self._by_name.get(center_suburb.lower())
+        if center is None:
+            return {}
+        distances = haversine_km_many(
+            self._lats[center], self._lons[center], self._lats, self._lons
+        )
+        # Rank the full set while the distances are at hand so that later radius
+        # lookups for this centre are a single bisection.
+        self._remember(center, distances)
+        return {
+            profile.suburb: distance
+            for profile, distance in zip(self.profiles, distances.tolist())
+        }
+
+    def neighbours(
+        self, center_suburb: str, radius_km: float
+    ) -> list[tuple[SuburbProfile, float]]:
+        center = self._by_name.get(center_suburb.lower())
+        if center is None:
+            return []
+        candidates = self._grid_candidates(center, radius_km)
+        distances = haversine_km_many(
+            self._lats[center], self._lons[center], self._lats[candidates], self._lons[candidates]
+        )
+        keep = distances <= radius_km
+        return [
+            (self.profiles[index], distance)
+            for index, distance in zip(candidates[keep].tolist(), distances[keep].tolist())
+        ]
+
+    def _remember(
+        self, center: int, distances: "np.ndarray"
+    ) -> tuple["np.ndarray", "np.ndarray"]:
+        import numpy as np
+
+        order = np.argsort(distances, kind="stable")
+        entry = (distances[order], order)
+        with self._lock:
+            self._sorted[center] = entry
+            self._sorted.move_to_end(center)
+            while len(self._sorted) > self.cache_size:
+                self._sorted.popitem(last=False)
+        return entry
+
+    def unique_profiles(self) -> list[SuburbProfile]:
+        return [self.profiles[index] for index in self._by_name.values()]
+
+    def _grid_within(self, center: int, radius_km: float) -> "np.ndarray":
+        candidates = self._grid_candidates(center, radius_km)
+        distances = haversine_km_many(
+            self._lats[center], self._lons[center], self._lats[candidates], self._lons[candidates]
+        )
+        return candidates[distances <= radius_km]
+
+    def _grid_candidates(self, center: int, radius_km: float) -> "np.ndarray":
+        import numpy as np
+
+        lat = float(self._lats[center])
+        lon = float(self._lons[center])
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = max(math.cos(math.radians(lat)), 0.01)
+        lon_span = min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+        row_low, col_low = self._cell(lat - lat_span, lon - lon_span)
+        row_high, col_high = self._cell(lat + lat_span, lon + lon_span)
+        if (row_high - row_low + 1) * (col_high - col_low + 1) > len(self._cells):
+            return np.fromiter(
+                (index for cell in self._cells.values() for index in cell.tolist()),
+                dtype=np.int64,
+            )
+        chunks = [
+            self._cells[(row, col)]
+            for row in range(row_low, row_high + 1)
+            for col in range(col_low, col_high + 1)
+            if (row, col) in self._cells
+        ]
+        if not chunks:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(chunks)
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return (
+            int(math.floor(lat / self.cell_degrees)),
+            int(math.floor(lon / self.cell_degrees)),
+        )
+
+
+_INDEX_LOCK = threading.Lock()
+_INDEXES: OrderedDict[int, tuple[Sequence[SuburbProfile], int, ProfileIndex]] = OrderedDict()
+
+
+def profile_index(profiles: Iterable[SuburbProfile]) -> ProfileIndex:
+    if isinstance(profiles, ProfileIndex):
+        return profiles
+    if not isinstance(profiles, (list, tuple)):
+        return ProfileIndex(list(profiles))
+    key = id(profiles)
+    with _INDEX_LOCK:
+        cached = _INDEXES.get(key)
+        if cached is not None and cached[0] is profiles and cached[1] == len(profiles):
+            _INDEXES.move_to_end(key)
+            return cached[2]
+    index = ProfileIndex(profiles)
+    with _INDEX_LOCK:
+        # Holding a reference to the sequence keeps its id from being reused.
+        _INDEXES[key] = (profiles, len(profiles), index)
+        while len(_INDEXES) > 8:
+            _INDEXES.popitem(last=False)
+    return index
+
+
 def find_profile(suburb: str, profiles: Iterable[SuburbProfile]) -> SuburbProfile | None:
-    suburb_lower = suburb.lower()
-    for profile in profiles:
-        if profile.suburb.lower() == suburb_lower:
-            return profile
-    return None
+    return profile_index(profiles).find(suburb)
 
 
 def suburbs_within_radius(
     center_suburb: str, radius_km: float, profiles: Iterable[SuburbProfile]
 ) -> list[SuburbProfile]:
-    center = find_profile(center_suburb, profiles)
-    if not center:
-        return []
-    matches: list[SuburbProfile] = []
-    for profile in profiles:
-        distance = haversine_km(
-            center.latitude,
-            center.longitude,
-            profile.latitude,
-            profile.longitude,
-        )
-        if distance <= radius_km:
-            matches.append(profile)
-    matches.sort(key=lambda item: item.suburb)
-    return matches
+    return profile_index(profiles).within(center_suburb, radius_km)
 
 
 def suburb_distance_map(
     center_suburb: str, profiles: Iterable[SuburbProfile]
 ) -> dict[str, float]:
-    center = find_profile(center_suburb, profiles)
-    if not center:
-        return {}
-    distances: dict[str, float] = {}
-    for profile in profiles:
-        distances[profile.suburb] = haversine_km(
-            center.latitude,
-            center.longitude,
-            profile.latitude,
-            profile.longitude,
-        )
-    return distances
+    return profile_index(profiles).distance_map(center_suburb)
 
 
 def _safe_int(value: str | None) -> int | None:
@@ -0,0 +1,129 @@
+import cProfile
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+from src.common.config import Settings
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_NOOP = nullcontext()
+
+
+class _Capture:
+    __slots__ = ("events", "origin")
+
+    def __init__(self) -> None:
+        self.events: list[dict[str, Any]] = []
+        self.origin = time.perf_counter()
+
+
+# Spans are collected only in the context that started a capture (and work it
+# hands to threads with a copy of that context), so concurrent requests and
+# jobs in the same process do not leak into each other's traces.
+_CAPTURE: ContextVar[_Capture | None] = ContextVar("trace_capture", default=None)
+_PROFILER_LOCK = threading.Lock()
+
+
+class _Span:
+    __slots__ = ("name", "args", "capture", "start")
+
+    def __init__(self, name: str, args: dict[str, Any], capture: _Capture) -> None:
+        self.name = name
+        self.args = args
+        self.capture = capture
+        self.start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        end = time.perf_counter()
+        event = {
+            "name": self.name,
+            "ph": "X",
+            "ts": round((self.start - self.capture.origin) * 1_000_000, 3),
+            "dur": round((end - self.start) * 1_000_000, 3),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if self.args:
+            event["args"] = self.args
+        self.capture.events.append(event)
+
+
+def span(name: str, **args: Any) -> Any:
+    active = _CAPTURE.get()
+    if active is None:
+        return _NOOP
+    return _Span(name, args, active)
+
+
+def traced(name: str | None = None) -> Callable[[F], F]:
+    def decorator(func: F) -> F:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            active = _CAPTURE.get()
+            if active is None:
+                return func(*args, **kwargs)
+            with _Span(span_name, {}, active):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+@contextmanager
+def capture(label: str, settings: Settings, requested: bool = True) -> Iterator[None]:
+    # One capture at a time keeps profiles of concurrent work from overlapping.
+    if (
+        not requested
+        or not settings.trace_dir
+        or _CAPTURE.get() is not None
+        or not _PROFILER_LOCK.acquire(blocking=False)
+    ):
+        yield
+        return
+    profiler = cProfile.Profile()
+    active = _Capture()
+    token = _CAPTURE.set(active)
+    try:
+        with _Span(label, {}, active):
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+    finally:
+        _CAPTURE.reset(token)
+        try:
+            _write_capture(Path(settings.trace_dir), label, active.events, profiler)
+        finally:
+            _PROFILER_LOCK.release()
+
+
+def _write_capture(
+    directory: Path, label: str, events: list[dict[str, Any]], profiler: cProfile.Profile
+) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    trace_path = directory / f"{label}-{stamp}.trace.json"
+    with trace_path.open("w", encoding="utf-8") as handle:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, handle)
+    profile_path = directory / f"{label}-{stamp}.pstats"
+    profiler.dump_stats(str(profile_path))
+    logger.info("Wrote trace %s and profile %s", trace_path, profile_path)
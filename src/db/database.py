@@ -1,11 +1,32 @@
 import json
+import logging
 import sqlite3
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Iterable
+from heapq import merge
+from itertools import chain
+from typing import Any, Iterable, Iterator
 
+from src.common.dedup import (
+    BLOCK_KEY_VERSION,
+    address_key,
+    best_duplicate,
+    block_key,
+    collapse_duplicates,
+)
+from src.common.facets import FACETS, facet_columns_sql, facet_values, merge_counts
+from src.common.metrics import QUERY_SECONDS, UPSERT_ROWS_TOTAL, UPSERT_SECONDS
+from src.common.ranking import SORT_MODES, RankingCriteria, relevance_candidates, top_k
+from src.common.suburb_profiles import SuburbProfile, profile_index
+from src.common.tracing import traced
+from src.db.sharding import ShardedConnection
 
-@dataclass(frozen=True)
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
 class Listing:
     id: str
     url: str
@@ -25,68 +46,896 @@ class Listing:
     listing_status: str | None = None
     listed_at: str | None = None
     scraped_at: str | None = None
-    raw_json: dict[str, Any] | None = None
+    raw_json: bytes | None = None
+
+
+LISTING_COLUMNS = tuple(field.name for field in fields(Listing))
+
+DELISTED_STATUS = "delisted"
+
+# A run that would archive more of a suburb than this is more likely a bad
+# crawl than a real sell-off, so that suburb is left alone.
+MAX_DELIST_SHARE = 0.5
+
+INCREMENTAL_AUTO_VACUUM = 2
+
+
+TRACKED_FIELDS = (
+    "url",
+    "title",
+    "address",
+    "suburb",
+    "state",
+    "postcode",
+    "price_text",
+    "price_min",
+    "price_max",
+    "bedrooms",
+    "bathrooms",
+    "parking",
+    "property_type",
+    "land_size",
+    "listing_status",
+    "listed_at",
+)
+
+
+@dataclass(frozen=True)
+class UpsertResult:
+    rows: int
+    new_ids: list[str]
+    changed_ids: list[str]
+    stale: int = 0
 
 
-def get_connection(db_path: str) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
+def get_connection(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
     return conn
 
 
-def init_db(conn: sqlite3.Connection) -> None:
+COLUMN_MIGRATIONS: dict[str, tuple[tuple[str, str], ...]] = {
+    "listings": (
+        ("address_key", "TEXT"),
+        ("block_key", "TEXT"),
+        ("property_id", "TEXT"),
+        ("is_representative", "INTEGER NOT NULL DEFAULT 0"),
+    ),
+    "saved_searches": (
+        ("next_run_at", "TEXT"),
+        ("claimed_by", "TEXT"),
+        ("claimed_until", "TEXT"),
+    ),
+}
+
+
+def init_db(conn: sqlite3.Connection | ShardedConnection) -> None:
+    if isinstance(conn, ShardedConnection):
+        conn.init()
+        return
+    # Only takes effect on a database that has no tables yet; older files are
+    # converted by enable_incremental_vacuum.
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
     schema_path = Path(__file__).resolve().with_name("schema.sql")
     with schema_path.open("r", encoding="utf-8") as handle:
         conn.executescript(handle.read())
+    for table, columns in COLUMN_MIGRATIONS.items():
+        _ensure_columns(conn, table, columns)
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_saved_searches_due
+          ON saved_searches(next_run_at)
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_listings_block ON listings(block_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_listings_property ON listings(property_id)")
+    # Unfiltered collapsed searches read one listing per property off this;
+    # suburb filters already narrow the rows through idx_listings_suburb.
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_listings_representative
+          ON listings(scraped_at) WHERE is_representative = 1
+        """
+    )
+    reclustered = get_meta(conn, "block_key_version") != BLOCK_KEY_VERSION
+    if reclustered:
+        # Clusters formed under an older blocking key may join different
+        # properties, so they are cleared for the dedup job to redo.
+        conn.execute(
+            """
+            UPDATE listings SET block_key = NULL, property_id = NULL
+            WHERE block_key IS NOT NULL OR property_id IS NOT NULL
+            """
+        )
+        set_meta(conn, "block_key_version", BLOCK_KEY_VERSION)
+    built = (
+        get_meta(conn, "listing_facets_built"),
+        get_meta(conn, "property_facets_built"),
+        get_meta(conn, "representatives_built"),
+    )
+    if reclustered or None in built:
+        rebuild_listing_facets(conn)
     conn.commit()
 
 
-def upsert_listings(conn: sqlite3.Connection, listings: Iterable[Listing]) -> int:
+def _ensure_columns(
+    conn: sqlite3.Connection, table: str, columns: tuple[tuple[str, str], ...]
+) -> None:
+    existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, declaration in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+
+
+def upsert_listings(
+    conn: sqlite3.Connection | ShardedConnection, listings: Iterable[Listing]
+) -> int:
+    return upsert_listings_with_result(conn, listings).rows
+
+
+@traced("upsert_listings")
+def upsert_listings_with_result(
+    conn: sqlite3.Connection | ShardedConnection, listings: Iterable[Listing]
+) -> UpsertResult:
+    if isinstance(conn, ShardedConnection):
+        return conn.upsert(listings)
+    start = time.perf_counter()
     rows = 0
-    for listing in listings:
+    stale = 0
+    new_ids: list[str] = []
+    changed_ids: list[str] = []
+    select_existing = (
+        f"SELECT {', '.join(TRACKED_FIELDS)}, scraped_at, address_key, property_id "
+        "FROM listings WHERE id = ?"
+    )
+    tracked = len(TRACKED_FIELDS)
+    now = datetime.now(timezone.utc).isoformat()
+    facet_deltas: dict[tuple[str, str, str], int] = {}
+    property_deltas: dict[tuple[str, str, str], int] = {}
+    try:
+        for listing in listings:
+            existing = conn.execute(select_existing, (listing.id,)).fetchone()
+            if (
+                existing is not None
+                and listing.scraped_at is not None
+                and listing.scraped_at < existing["scraped_at"]
+            ):
+                # An older capture, such as a re-ingested saved page, never
+                # rolls a fresher row back or reaches the change log.
+                stale += 1
+                continue
+            values = tuple(getattr(listing, field) for field in TRACKED_FIELDS)
+            previous = tuple(existing)[:tracked] if existing is not None else (None,) * tracked
+            changed_at = listing.scraped_at or now
+            history: list[tuple[str, str, str, int | None]] = []
+            relisted = False
+            if existing is None:
+                new_ids.append(listing.id)
+                relisted = (
+                    conn.execute(
+                        "DELETE FROM listings_archive WHERE id = ?", (listing.id,)
+                    ).rowcount
+                    > 0
+                )
+                history.append(_history_row(listing.id, changed_at, previous, values))
+            elif previous != values:
+                changed_ids.append(listing.id)
+                if not _has_history(conn, listing.id):
+                    # Rows stored before history was kept get their last known
+                    # state as a baseline so later deltas can be replayed.
+                    history.append(
+                        _history_row(
+                            listing.id, existing["scraped_at"], (None,) * tracked, previous
+                        )
+                    )
+                history.append(_history_row(listing.id, changed_at, previous, values))
+            params = _listing_params(listing)
+            if existing is None or previous != values:
+                if existing is not None:
+                    _count_facets(facet_deltas, existing, -1)
+                _count_facets(facet_deltas, params, 1)
+            params["address_key"] = address_key(listing.address, listing.suburb)
+            params["block_key"] = block_key(params["address_key"], listing.suburb, listing.postcode)
+            if (
+                existing is not None
+                and existing["property_id"]
+                and existing["address_key"] == params["address_key"]
+            ):
+                params["property_id"] = existing["property_id"]
+            else:
+                params["property_id"] = _resolve_property_id(conn, listing.id, params)
+            properties = {params["property_id"] or listing.id}
+            if existing is not None:
+                properties.add(existing["property_id"] or listing.id)
+            alone = existing is None and not relisted and properties == {listing.id}
+            if alone:
+                # A listing id never stored before cannot be anyone's property
+                # yet, so its own cluster starts empty and it represents it.
+                representatives: dict[str, tuple[Any, ...] | None] = {listing.id: None}
+            else:
+                representatives = _representatives(conn, properties)
+            params["is_representative"] = int(alone)
+            conn.execute(
+                """
+                INSERT INTO listings (
+                  id, url, title, address, suburb, state, postcode, price_text,
+                  price_min, price_max, bedrooms, bathrooms, parking, property_type,
+                  land_size, listing_status, listed_at, scraped_at, raw_json,
+                  address_key, block_key, property_id, is_representative
+                ) VALUES (
+                  :id, :url, :title, :address, :suburb, :state, :postcode, :price_text,
+                  :price_min, :price_max, :bedrooms, :bathrooms, :parking, :property_type,
+                  :land_size, :listing_status, :listed_at, :scraped_at, :raw_json,
+                  :address_key, :block_key, :property_id, :is_representative
+                )
+                ON CONFLICT(id) DO UPDATE SET
+                  url=excluded.url,
+                  title=excluded.title,
+                  address=excluded.address,
+                  suburb=excluded.suburb,
+                  state=excluded.state,
+                  postcode=excluded.postcode,
+                  price_text=excluded.price_text,
+                  price_min=excluded.price_min,
+                  price_max=excluded.price_max,
+                  bedrooms=excluded.bedrooms,
+                  bathrooms=excluded.bathrooms,
+                  parking=excluded.parking,
+                  property_type=excluded.property_type,
+                  land_size=excluded.land_size,
+                  listing_status=excluded.listing_status,
+                  listed_at=excluded.listed_at,
+                  scraped_at=excluded.scraped_at,
+                  raw_json=excluded.raw_json,
+                  address_key=excluded.address_key,
+                  block_key=excluded.block_key,
+                  property_id=excluded.property_id
+                WHERE excluded.scraped_at >= listings.scraped_at
+                """,
+                params,
+            )
+            written = tuple(params[column] for column in _REPRESENTATIVE_COLUMNS)
+            after = _representatives_after_upsert(
+                conn, representatives, params["property_id"] or listing.id, written
+            )
+            _count_representative_changes(property_deltas, representatives, after)
+            if not alone:
+                _move_representative_flags(conn, representatives, after)
+            if history:
+                conn.executemany(
+                    """
+                    INSERT INTO listing_history (listing_id, changed_at, changes, price_drop)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    history,
+                )
+            rows += 1
+        _record_changes(conn, new_ids, changed_ids)
+        _apply_facet_deltas(conn, facet_deltas)
+        _apply_facet_deltas(conn, property_deltas, "property_facets")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    UPSERT_SECONDS.observe(time.perf_counter() - start)
+    UPSERT_ROWS_TOTAL.inc(len(new_ids), kind="new")
+    UPSERT_ROWS_TOTAL.inc(len(changed_ids), kind="changed")
+    UPSERT_ROWS_TOTAL.inc(rows - len(new_ids) - len(changed_ids), kind="unchanged")
+    UPSERT_ROWS_TOTAL.inc(stale, kind="stale")
+    return UpsertResult(rows=rows, new_ids=new_ids, changed_ids=changed_ids, stale=stale)
+
+
+def _listing_params(listing: Listing) -> dict[str, Any]:
+    params = {name: getattr(listing, name) for name in LISTING_COLUMNS}
+    if listing.raw_json is not None:
+        params["raw_json"] = listing.raw_json.decode("utf-8")
+    return params
+
+
+def _count_facets(
+    deltas: dict[tuple[str, str, str], int], listing: Any, sign: int
+) -> None:
+    scope = listing["suburb"] or ""
+    for facet, value in facet_values(listing).items():
+        key = (scope, facet, value)
+        deltas[key] = deltas.get(key, 0) + sign
+
+
+def _apply_facet_deltas(
+    conn: sqlite3.Connection,
+    deltas: dict[tuple[str, str, str], int],
+    table: str = "listing_facets",
+) -> None:
+    changes = [(*key, delta) for key, delta in deltas.items() if delta]
+    if not changes:
+        return
+    conn.executemany(
+        f"""
+        INSERT INTO {table} (suburb, facet, value, count) VALUES (?, ?, ?, ?)
+        ON CONFLICT(suburb, facet, value) DO UPDATE SET count = count + excluded.count
+        """,
+        changes,
+    )
+    if any(delta < 0 for *_, delta in changes):
+        conn.execute(f"DELETE FROM {table} WHERE count <= 0")
+
+
+# The listing a collapsed search shows for a property: its freshest, with the
+# id breaking ties. It carries the is_representative flag.
+_REPRESENTATIVE_ORDER = "scraped_at DESC, id DESC"
+_REPRESENTATIVE_COLUMNS = (
+    "scraped_at",
+    "id",
+    "suburb",
+    "property_type",
+    "bedrooms",
+    "price_min",
+    "price_max",
+)
+
+
+def _representatives(
+    conn: sqlite3.Connection, properties: Iterable[str]
+) -> dict[str, tuple[Any, ...] | None]:
+    representatives: dict[str, tuple[Any, ...] | None] = {}
+    for key in properties:
+        row = conn.execute(
+            f"""
+            SELECT {', '.join(_REPRESENTATIVE_COLUMNS)}
+            FROM listings
+            WHERE property_id = ? OR (property_id IS NULL AND id = ?)
+            ORDER BY {_REPRESENTATIVE_ORDER}
+            LIMIT 1
+            """,
+            (key, key),
+        ).fetchone()
+        representatives[key] = tuple(row) if row is not None else None
+    return representatives
+
+
+def _count_representative_changes(
+    deltas: dict[tuple[str, str, str], int],
+    before: dict[str, tuple[Any, ...] | None],
+    after: dict[str, tuple[Any, ...] | None],
+) -> None:
+    for key, old in before.items():
+        new = after[key]
+        if old is not None and new is not None and old[2:] == new[2:]:
+            continue
+        if old is not None:
+            _count_facets(deltas, dict(zip(_REPRESENTATIVE_COLUMNS, old)), -1)
+        if new is not None:
+            _count_facets(deltas, dict(zip(_REPRESENTATIVE_COLUMNS, new)), 1)
+
+
+def _move_representative_flags(
+    conn: sqlite3.Connection,
+    before: dict[str, tuple[Any, ...] | None],
+    after: dict[str, tuple[Any, ...] | None],
+) -> None:
+    # Flags are cleared before they are set, since a listing that moved between
+    # properties can stop representing one and start representing the other.
+    cleared: set[str] = set()
+    flagged: set[str] = set()
+    for key, old in before.items():
+        new = after[key]
+        old_id = old[1] if old is not None else None
+        new_id = new[1] if new is not None else None
+        if old_id == new_id:
+            continue
+        if old_id is not None:
+            cleared.add(old_id)
+        if new_id is not None:
+            flagged.add(new_id)
+    for listing_id in cleared - flagged:
+        conn.execute("UPDATE listings SET is_representative = 0 WHERE id = ?", (listing_id,))
+    for listing_id in flagged:
+        conn.execute("UPDATE listings SET is_representative = 1 WHERE id = ?", (listing_id,))
+
+
+def _representatives_after_upsert(
+    conn: sqlite3.Connection,
+    before: dict[str, tuple[Any, ...] | None],
+    key: str,
+    written: tuple[Any, ...],
+) -> dict[str, tuple[Any, ...] | None]:
+    # Usually the outcome follows from the previous representative and the row
+    # just written; only a representative that moved or went back in time needs
+    # another lookup.
+    listing_id = written[1]
+    after: dict[str, tuple[Any, ...] | None] = {}
+    for property_key, old in before.items():
+        if old is None or old[1] != listing_id:
+            if property_key != key or (old is not None and old[:2] > written[:2]):
+                after[property_key] = old
+            else:
+                after[property_key] = written
+        elif property_key == key and written[:2] >= old[:2]:
+            after[property_key] = written
+        else:
+            after[property_key] = _representatives(conn, [property_key])[property_key]
+    return after
+
+
+def rebuild_listing_facets(conn: sqlite3.Connection | ShardedConnection) -> None:
+    if isinstance(conn, ShardedConnection):
+        conn.map_shards(rebuild_listing_facets)
+        return
+    conn.execute("UPDATE listings SET is_representative = 0 WHERE is_representative != 0")
+    conn.execute(
+        f"""
+        UPDATE listings SET is_representative = 1
+        WHERE rowid IN (
+          SELECT rowid FROM (
+            SELECT rowid, ROW_NUMBER() OVER (
+              PARTITION BY COALESCE(property_id, id) ORDER BY {_REPRESENTATIVE_ORDER}
+            ) AS duplicate_rank
+            FROM listings
+          )
+          WHERE duplicate_rank = 1
+        )
+        """
+    )
+    _rebuild_facets(conn, "listing_facets", "listings")
+    _rebuild_facets(
+        conn, "property_facets", "(SELECT * FROM listings WHERE is_representative = 1)"
+    )
+    built = datetime.now(timezone.utc).isoformat()
+    set_meta(conn, "listing_facets_built", built)
+    set_meta(conn, "property_facets_built", built)
+    set_meta(conn, "representatives_built", built)
+    conn.commit()
+
+
+def _rebuild_facets(conn: sqlite3.Connection, table: str, source: str) -> None:
+    conn.execute(f"DELETE FROM {table}")
+    grouped = " UNION ALL ".join(
+        f"SELECT scope, '{facet}', {facet}, COUNT(*) FROM buckets GROUP BY scope, {facet}"
+        for facet in FACETS
+    )
+    conn.execute(
+        f"""
+        INSERT INTO {table} (suburb, facet, value, count)
+        WITH buckets AS (
+          SELECT COALESCE(suburb, '') AS scope, {facet_columns_sql()} FROM {source}
+        )
+        {grouped}
+        """
+    )
+
+
+@traced("facet_counts")
+def facet_counts(
+    conn: sqlite3.Connection | ShardedConnection,
+    suburb: str | None = None,
+    suburbs: list[str] | None = None,
+    min_price: int | None = None,
+    max_price: int | None = None,
+    bedrooms: int | None = None,
+    property_type: str | None = None,
+    since: str | None = None,
+    radius_km: float | None = None,
+    collapse_duplicates: bool = False,
+) -> dict[str, dict[str, int]]:
+    if isinstance(conn, ShardedConnection):
+        return conn.facet_counts(
+            suburb=suburb,
+            suburbs=suburbs,
+            min_price=min_price,
+            max_price=max_price,
+            bedrooms=bedrooms,
+            property_type=property_type,
+            since=since,
+            radius_km=radius_km,
+            collapse_duplicates=collapse_duplicates,
+        )
+    where, params, filters = _listing_where(
+        suburb,
+        suburbs,
+        min_price,
+        max_price,
+        bedrooms,
+        property_type,
+        since,
+        radius_km,
+        collapse_duplicates,
+    )
+    if set(filters) <= {"suburb", "suburbs", "radius", "collapse"}:
+        # Location-only filters can be answered from the maintained per-suburb
+        # counts without touching the listings table. Collapsed searches count
+        # one listing per property, which property_facets keeps separately.
+        table = "property_facets" if collapse_duplicates else "listing_facets"
+        if suburbs:
+            scope: list[str] | None = list(suburbs)
+        elif suburb and radius_km:
+            scope = [suburb, *neighbours_within(conn, suburb, radius_km)]
+        elif suburb:
+            scope = [suburb]
+        else:
+            scope = None
+        clause = f"WHERE suburb IN ({', '.join('?' for _ in scope)})" if scope else ""
+        with QUERY_SECONDS.time(shape=_filter_shape([*filters, "facets"])):
+            return merge_counts(
+                conn.execute(
+                    f"""
+                    SELECT facet, value, SUM(count)
+                    FROM {table}
+                    {clause}
+                    GROUP BY facet, value
+                    """,
+                    scope or [],
+                )
+            )
+    query = f"""
+        SELECT property_type, bedrooms, price_band, suburb, COUNT(*) AS count
+        FROM (SELECT {facet_columns_sql()} FROM listings {where})
+        GROUP BY property_type, bedrooms, price_band, suburb
+    """
+    with QUERY_SECONDS.time(shape=_filter_shape([*filters, "facets", "grouped"])):
+        rows = conn.execute(query, params).fetchall()
+    return merge_counts(
+        (facet, row[facet], row["count"]) for row in rows for facet in FACETS
+    )
+
+
+def _history_row(
+    listing_id: str, changed_at: str, previous: tuple[Any, ...], current: tuple[Any, ...]
+) -> tuple[str, str, str, int | None]:
+    changes = {
+        field: value
+        for field, old, value in zip(TRACKED_FIELDS, previous, current)
+        if value != old
+    }
+    before = dict(zip(TRACKED_FIELDS, previous))
+    after = dict(zip(TRACKED_FIELDS, current))
+    old_price = _asking_price(before)
+    new_price = _asking_price(after)
+    price_drop = (
+        old_price - new_price
+        if old_price is not None and new_price is not None and new_price < old_price
+        else None
+    )
+    return listing_id, changed_at, json.dumps(changes, separators=(",", ":")), price_drop
+
+
+def _asking_price(values: dict[str, Any]) -> int | None:
+    return values["price_min"] if values["price_min"] is not None else values["price_max"]
+
+
+def _has_history(conn: sqlite3.Connection, listing_id: str) -> bool:
+    return (
         conn.execute(
+            "SELECT 1 FROM listing_history WHERE listing_id = ? LIMIT 1", (listing_id,)
+        ).fetchone()
+        is not None
+    )
+
+
+def get_listing(
+    conn: sqlite3.Connection | ShardedConnection, listing_id: str
+) -> sqlite3.Row | None:
+    if isinstance(conn, ShardedConnection):
+        return next(
+            (row for row in conn.map_shards(get_listing, listing_id) if row is not None), None
+        )
+    row = conn.execute("SELECT * FROM listings WHERE id = ?", (listing_id,)).fetchone()
+    if row is None:
+        row = conn.execute(
+            "SELECT * FROM listings_archive WHERE id = ?", (listing_id,)
+        ).fetchone()
+    return row
+
+
+def listing_history(
+    conn: sqlite3.Connection | ShardedConnection, listing_id: str
+) -> list[dict[str, Any]]:
+    if isinstance(conn, ShardedConnection):
+        return next(
+            (changes for changes in conn.map_shards(listing_history, listing_id) if changes), []
+        )
+    return [
+        {
+            "changed_at": row["changed_at"],
+            "changes": json.loads(row["changes"]),
+            "price_drop": row["price_drop"],
+        }
+        for row in conn.execute(
             """
-            INSERT INTO listings (
-              id, url, title, address, suburb, state, postcode, price_text,
-              price_min, price_max, bedrooms, bathrooms, parking, property_type,
-              land_size, listing_status, listed_at, scraped_at, raw_json
-            ) VALUES (
-              :id, :url, :title, :address, :suburb, :state, :postcode, :price_text,
-              :price_min, :price_max, :bedrooms, :bathrooms, :parking, :property_type,
-              :land_size, :listing_status, :listed_at, :scraped_at, :raw_json
+            SELECT changed_at, changes, price_drop
+            FROM listing_history
+            WHERE listing_id = ?
+            ORDER BY changed_at, seq
+            """,
+            (listing_id,),
+        )
+    ]
+
+
+def listing_as_of(
+    conn: sqlite3.Connection | ShardedConnection, listing_id: str, at: str
+) -> dict[str, Any] | None:
+    if isinstance(conn, ShardedConnection):
+        return next(
+            (
+                state
+                for state in conn.map_shards(listing_as_of, listing_id, at)
+                if state is not None
+            ),
+            None,
+        )
+    state: dict[str, Any] | None = None
+    for row in conn.execute(
+        """
+        SELECT changed_at, changes
+        FROM listing_history
+        WHERE listing_id = ? AND changed_at <= ?
+        ORDER BY changed_at, seq
+        """,
+        (listing_id, at),
+    ):
+        if state is None:
+            state = {"id": listing_id, "first_seen_at": row["changed_at"]}
+            state.update(dict.fromkeys(TRACKED_FIELDS))
+        state.update(json.loads(row["changes"]))
+        state["changed_at"] = row["changed_at"]
+    return state
+
+
+def price_drops(
+    conn: sqlite3.Connection | ShardedConnection,
+    since: str,
+    suburb: str | None = None,
+    limit: int = 50,
+) -> list[sqlite3.Row]:
+    if isinstance(conn, ShardedConnection):
+        rows = chain.from_iterable(conn.map_shards(price_drops, since, suburb, limit))
+        return sorted(rows, key=lambda row: row["dropped_at"], reverse=True)[:limit]
+    clauses = ["h.price_drop IS NOT NULL", "h.changed_at >= ?"]
+    params: list[Any] = [since]
+    if suburb:
+        clauses.append("l.suburb = ?")
+        params.append(suburb)
+    params.append(limit)
+    return list(
+        conn.execute(
+            f"""
+            SELECT l.*, h.changed_at AS dropped_at, h.price_drop
+            FROM listing_history h
+            JOIN listings l ON l.id = h.listing_id
+            WHERE {' AND '.join(clauses)}
+            ORDER BY h.changed_at DESC
+            LIMIT ?
+            """,
+            params,
+        )
+    )
+
+
+def _resolve_property_id(
+    conn: sqlite3.Connection, listing_id: str, listing: dict[str, Any]
+) -> str:
+    # Only listings sharing a block (postcode, suburb, street number and the
+    # street's initial) are compared, so the cost per upsert is a handful of
+    # rows rather than the whole table.
+    if listing["block_key"] is None:
+        return listing_id
+    candidates = conn.execute(
+        """
+        SELECT id, property_id, address_key, suburb, bedrooms, bathrooms
+        FROM listings
+        WHERE block_key = ? AND id != ?
+        """,
+        (listing["block_key"], listing_id),
+    )
+    match = best_duplicate(listing, candidates)
+    if match is None:
+        return listing_id
+    return match["property_id"] or match["id"]
+
+
+def assign_property_ids(
+    conn: sqlite3.Connection | ShardedConnection, limit: int = 1000
+) -> int:
+    if isinstance(conn, ShardedConnection):
+        return sum(conn.map_shards(assign_property_ids, limit))
+    rows = conn.execute(
+        """
+        SELECT id, address, suburb, postcode, bedrooms, bathrooms
+        FROM listings
+        WHERE property_id IS NULL
+        ORDER BY COALESCE(listed_at, scraped_at), id
+        LIMIT ?
+        """,
+        (limit,),
+    ).fetchall()
+    property_deltas: dict[tuple[str, str, str], int] = {}
+    try:
+        for row in rows:
+            listing = dict(row)
+            listing["address_key"] = address_key(row["address"], row["suburb"])
+            listing["block_key"] = block_key(
+                listing["address_key"], row["suburb"], row["postcode"]
             )
-            ON CONFLICT(id) DO UPDATE SET
-              url=excluded.url,
-              title=excluded.title,
-              address=excluded.address,
-              suburb=excluded.suburb,
-              state=excluded.state,
-              postcode=excluded.postcode,
-              price_text=excluded.price_text,
-              price_min=excluded.price_min,
-              price_max=excluded.price_max,
-              bedrooms=excluded.bedrooms,
-              bathrooms=excluded.bathrooms,
-              parking=excluded.parking,
-              property_type=excluded.property_type,
-              land_size=excluded.land_size,
-              listing_status=excluded.listing_status,
-              listed_at=excluded.listed_at,
-              scraped_at=excluded.scraped_at,
-              raw_json=excluded.raw_json
+            property_id = _resolve_property_id(conn, row["id"], listing)
+            properties = {row["id"], property_id}
+            representatives = _representatives(conn, properties)
+            conn.execute(
+                """
+                UPDATE listings
+                SET address_key = ?, block_key = ?, property_id = ?
+                WHERE id = ?
+                """,
+                (listing["address_key"], listing["block_key"], property_id, row["id"]),
+            )
+            after = _representatives(conn, properties)
+            _count_representative_changes(property_deltas, representatives, after)
+            _move_representative_flags(conn, representatives, after)
+        _apply_facet_deltas(conn, property_deltas, "property_facets")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows)
+
+
+def _record_changes(
+    conn: sqlite3.Connection, new_ids: list[str], changed_ids: list[str]
+) -> None:
+    if not new_ids and not changed_ids:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    conn.executemany(
+        """
+        INSERT INTO listing_changes (listing_id, change_type, changed_at)
+        VALUES (?, ?, ?)
+        """,
+        [(listing_id, "new", now) for listing_id in new_ids]
+        + [(listing_id, "changed", now) for listing_id in changed_ids],
+    )
+
+
+def read_listing_changes(
+    conn: sqlite3.Connection, after_seq: int, limit: int = 1000
+) -> list[sqlite3.Row]:
+    return list(
+        conn.execute(
+            """
+            SELECT c.seq, c.change_type, c.listing_id, l.*
+            FROM listing_changes c
+            LEFT JOIN listings l ON l.id = c.listing_id
+            WHERE c.seq > ?
+            ORDER BY c.seq
+            LIMIT ?
             """,
-            {
-                **listing.__dict__,
-                "raw_json": json.dumps(listing.raw_json) if listing.raw_json else None,
-            },
+            (after_seq, limit),
         )
-        rows += 1
+    )
+
+
+def get_change_cursor(conn: sqlite3.Connection, consumer: str) -> int:
+    row = conn.execute(
+        "SELECT last_seq FROM change_cursors WHERE consumer = ?", (consumer,)
+    ).fetchone()
+    return int(row["last_seq"]) if row else 0
+
+
+def set_change_cursor(conn: sqlite3.Connection, consumer: str, last_seq: int) -> None:
+    conn.execute(
+        """
+        INSERT INTO change_cursors (consumer, last_seq) VALUES (?, ?)
+        ON CONFLICT(consumer) DO UPDATE SET last_seq = excluded.last_seq
+        """,
+        (consumer, last_seq),
+    )
+
+
+def latest_change_seq(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT MAX(seq) AS seq FROM listing_changes").fetchone()
+    return int(row["seq"] or 0)
+
+
+def prune_listing_changes(conn: sqlite3.Connection, through_seq: int | None = None) -> int:
+    if through_seq is not None:
+        cursor = conn.execute("DELETE FROM listing_changes WHERE seq <= ?", (through_seq,))
+        return cursor.rowcount
+    cursor = conn.execute(
+        """
+        DELETE FROM listing_changes
+        WHERE seq <= (SELECT MIN(last_seq) FROM change_cursors)
+        """
+    )
+    return cursor.rowcount
+
+
+def queue_notifications(
+    conn: sqlite3.Connection, matches: Iterable[tuple[int, str]], queued_at: str
+) -> int:
+    cursor = conn.executemany(
+        """
+        INSERT OR IGNORE INTO pending_notifications (search_id, listing_id, queued_at)
+        VALUES (?, ?, ?)
+        """,
+        [(search_id, listing_id, queued_at) for search_id, listing_id in matches],
+    )
+    return cursor.rowcount
+
+
+def pending_notifications(
+    conn: sqlite3.Connection | ShardedConnection, search_id: int, limit: int = 50
+) -> list[sqlite3.Row]:
+    if isinstance(conn, ShardedConnection):
+        # The queue lives in the catalog and the listings in the shards, so
+        # the newest-per-property pick happens here instead of in SQL.
+        ids = [
+            row["listing_id"]
+            for row in conn.execute(
+                "SELECT listing_id FROM pending_notifications WHERE search_id = ?", (search_id,)
+            )
+        ]
+        rows = chain.from_iterable(conn.map_shards(listings_by_id, ids))
+        newest = sorted(rows, key=lambda row: row["scraped_at"] or "", reverse=True)
+        return collapse_duplicates(newest)[:limit]
+    return list(
+        conn.execute(
+            """
+            SELECT l.*
+            FROM listings l
+            WHERE l.rowid IN (
+              SELECT rowid FROM (
+                SELECT l.rowid, ROW_NUMBER() OVER (
+                  PARTITION BY COALESCE(l.property_id, l.id) ORDER BY l.scraped_at DESC
+                ) AS duplicate_rank
+                FROM pending_notifications p
+                JOIN listings l ON l.id = p.listing_id
+                WHERE p.search_id = ?
+              )
+              WHERE duplicate_rank = 1
+            )
+            ORDER BY l.scraped_at DESC
+            LIMIT ?
+            """,
+            (search_id, limit),
+        )
+    )
+
+
+def clear_pending_notifications(
+    conn: sqlite3.Connection | ShardedConnection,
+    search_id: int,
+    sent: list[sqlite3.Row],
+    queued_before: str,
+) -> None:
+    # Only what went out is cleared, along with queued duplicates that were
+    # collapsed into a sent listing. Matches queued after the run started
+    # wait for the next one.
+    queued = [
+        row["listing_id"]
+        for row in conn.execute(
+            "SELECT listing_id FROM pending_notifications WHERE search_id = ? AND queued_at <= ?",
+            (search_id, queued_before),
+        )
+    ]
+    if isinstance(conn, ShardedConnection):
+        listings = list(chain.from_iterable(conn.map_shards(listings_by_id, queued)))
+    else:
+        listings = listings_by_id(conn, queued)
+    keys = {row["property_id"] or row["id"] for row in sent}
+    ids = {row["id"] for row in sent} | {
+        row["id"] for row in listings if (row["property_id"] or row["id"]) in keys
+    }
+    conn.executemany(
+        """
+        DELETE FROM pending_notifications
+        WHERE search_id = ? AND listing_id = ? AND queued_at <= ?
+        """,
+        [(search_id, listing_id, queued_before) for listing_id in ids],
+    )
     conn.commit()
-    return rows
 
 
+@traced("query_listings")
 def query_listings(
-    conn: sqlite3.Connection,
+    conn: sqlite3.Connection | ShardedConnection,
     suburb: str | None = None,
     suburbs: list[str] | None = None,
     min_price: int | None = None,
@@ -95,43 +944,327 @@ def query_listings(
     property_type: str | None = None,
     since: str | None = None,
     limit: int = 50,
+    radius_km: float | None = None,
+    collapse_duplicates: bool = False,
+    sort: str = "newest",
 ) -> list[sqlite3.Row]:
+    if sort not in SORT_MODES:
+        raise ValueError(f"Unknown sort mode: {sort}")
+    if isinstance(conn, ShardedConnection):
+        return conn.query_listings(
+            limit=limit,
+            sort=sort,
+            suburb=suburb,
+            suburbs=suburbs,
+            min_price=min_price,
+            max_price=max_price,
+            bedrooms=bedrooms,
+            property_type=property_type,
+            since=since,
+            radius_km=radius_km,
+            collapse_duplicates=collapse_duplicates,
+        )
+    where, params, filters = _listing_where(
+        suburb,
+        suburbs,
+        min_price,
+        max_price,
+        bedrooms,
+        property_type,
+        since,
+        radius_km,
+        collapse_duplicates,
+    )
+    if sort == "relevance":
+        filters.append("relevance")
+        criteria = RankingCriteria(
+            min_price=min_price,
+            max_price=max_price,
+            bedrooms=bedrooms,
+            radius_km=radius_km,
+            distances=neighbour_distances(conn, suburb, radius_km)
+            if suburb and radius_km
+            else None,
+            now=datetime.now(timezone.utc),
+        )
+        with QUERY_SECONDS.time(shape=_filter_shape(filters)):
+            return _ranked_listings(conn, where, params, criteria, limit)
+    query = f"""
+        SELECT *
+        FROM listings
+        {where}
+        ORDER BY scraped_at DESC
+        LIMIT ?
+    """
+    params.append(limit)
+    with QUERY_SECONDS.time(shape=_filter_shape(filters)):
+        return list(conn.execute(query, params))
+
+
+def _listing_where(
+    suburb: str | None,
+    suburbs: list[str] | None,
+    min_price: int | None,
+    max_price: int | None,
+    bedrooms: int | None,
+    property_type: str | None,
+    since: str | None,
+    radius_km: float | None,
+    collapse_duplicates: bool,
+) -> tuple[str, list[Any], list[str]]:
     clauses: list[str] = []
     params: list[Any] = []
+    filters: list[str] = []
 
     if suburbs:
         placeholders = ", ".join("?" for _ in suburbs)
         clauses.append(f"suburb IN ({placeholders})")
+        filters.append("suburbs")
         params.extend(suburbs)
+    elif suburb and radius_km:
+        clauses.append(
+            """(suburb = ? OR suburb IN (
+                SELECT neighbour FROM suburb_neighbours
+                WHERE suburb = ? AND distance_km <= ?
+            ))"""
+        )
+        filters.append("radius")
+        params.extend([suburb, suburb, radius_km])
     elif suburb:
         clauses.append("suburb = ?")
+        filters.append("suburb")
         params.append(suburb)
     if min_price is not None:
         clauses.append("(price_min IS NULL OR price_min >= ?)")
+        filters.append("min_price")
         params.append(min_price)
     if max_price is not None:
         clauses.append("(price_max IS NULL OR price_max <= ?)")
+        filters.append("max_price")
         params.append(max_price)
     if bedrooms is not None:
         clauses.append("(bedrooms IS NULL OR bedrooms >= ?)")
+        filters.append("bedrooms")
         params.append(bedrooms)
     if property_type:
         clauses.append("property_type = ?")
+        filters.append("property_type")
         params.append(property_type)
     if since:
         clauses.append("scraped_at > ?")
+        filters.append("since")
         params.append(since)
 
+    if collapse_duplicates:
+        # Each property is shown through its freshest listing, which upserts
+        # keep flagged, so the collapse stays on an index.
+        clauses.append("is_representative = 1")
+        filters.append("collapse")
     where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
-    query = f"""
-        SELECT *
+    return where, params, filters
+
+
+def _ranked_listings(
+    conn: sqlite3.Connection,
+    where: str,
+    params: list[Any],
+    criteria: RankingCriteria,
+    limit: int,
+) -> list[sqlite3.Row]:
+    # Score on the few columns ranking needs, then load full rows for the winners.
+    candidates = conn.execute(
+        f"""
+        SELECT id, suburb, price_min, price_max, bedrooms, scraped_at
         FROM listings
         {where}
         ORDER BY scraped_at DESC
         LIMIT ?
-    """
-    params.append(limit)
-    return list(conn.execute(query, params))
+        """,
+        [*params, relevance_candidates(limit)],
+    )
+    ranked = [row["id"] for _, row in top_k(candidates, criteria, limit)]
+    if not ranked:
+        return []
+    placeholders = ", ".join("?" for _ in ranked)
+    rows = {
+        row["id"]: row
+        for row in conn.execute(f"SELECT * FROM listings WHERE id IN ({placeholders})", ranked)
+    }
+    return [rows[listing_id] for listing_id in ranked]
+
+
+def neighbour_distances(
+    conn: sqlite3.Connection, suburb: str, radius_km: float
+) -> dict[str, float]:
+    distances = {suburb.lower(): 0.0}
+    for row in conn.execute(
+        """
+        SELECT neighbour, distance_km FROM suburb_neighbours
+        WHERE suburb = ? AND distance_km <= ?
+        """,
+        (suburb, radius_km),
+    ):
+        distances[row["neighbour"].lower()] = row["distance_km"]
+    return distances
+
+
+def _filter_shape(filters: list[str]) -> str:
+    return "+".join(sorted(filters)) if filters else "none"
+
+
+def listings_by_id(conn: sqlite3.Connection, ids: list[str]) -> list[sqlite3.Row]:
+    rows: list[sqlite3.Row] = []
+    for start in range(0, len(ids), 500):
+        batch = ids[start : start + 500]
+        placeholders = ", ".join("?" for _ in batch)
+        rows.extend(conn.execute(f"SELECT * FROM listings WHERE id IN ({placeholders})", batch))
+    return rows
+
+
+def iter_listings_since(
+    conn: sqlite3.Connection | ShardedConnection, since: str | None, batch_size: int = 1000
+) -> Iterator[sqlite3.Row]:
+    if isinstance(conn, ShardedConnection):
+        yield from merge(
+            *(
+                iter_listings_since(conn.shard(name), since, batch_size)
+                for name in conn.shard_names()
+            ),
+            key=lambda row: row["scraped_at"] or "",
+            reverse=True,
+        )
+        return
+    if since:
+        cursor = conn.execute(
+            "SELECT * FROM listings WHERE scraped_at > ? ORDER BY scraped_at DESC", (since,)
+        )
+    else:
+        cursor = conn.execute("SELECT * FROM listings ORDER BY scraped_at DESC")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def neighbours_within(conn: sqlite3.Connection, suburb: str, radius_km: float) -> list[str]:
+    return [
+        row["neighbour"]
+        for row in conn.execute(
+            """
+            SELECT neighbour FROM suburb_neighbours
+            WHERE suburb = ? AND distance_km <= ?
+            """,
+            (suburb, radius_km),
+        )
+    ]
+
+
+def neighbour_radius_limit(conn: sqlite3.Connection | ShardedConnection) -> float | None:
+    # Neighbour rows are only stored up to the radius the table was built with,
+    # so larger radii would silently return the same suburbs.
+    value = get_meta(conn, "neighbour_max_radius_km")
+    return float(value) if value is not None else None
+
+
+def get_meta(conn: sqlite3.Connection, key: str) -> str | None:
+    row = conn.execute("SELECT value FROM app_meta WHERE key = ?", (key,)).fetchone()
+    return row["value"] if row else None
+
+
+def set_meta(conn: sqlite3.Connection, key: str, value: str) -> None:
+    conn.execute(
+        """
+        INSERT INTO app_meta (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """,
+        (key, value),
+    )
+
+
+def sync_suburb_neighbours(
+    conn: sqlite3.Connection,
+    profiles: Iterable[SuburbProfile],
+    max_radius_km: float,
+    full: bool = False,
+) -> int:
+    index = profile_index(profiles)
+    current = {
+        profile.suburb: (profile.latitude, profile.longitude)
+        for profile in index.unique_profiles()
+    }
+    stored = {
+        row["suburb"]: (row["latitude"], row["longitude"])
+        for row in conn.execute(
+            "SELECT suburb, latitude, longitude FROM suburb_neighbour_sources"
+        )
+    }
+    if get_meta(conn, "neighbour_max_radius_km") != repr(float(max_radius_km)):
+        full = True
+    if full:
+        conn.execute("DELETE FROM suburb_neighbours")
+        conn.execute("DELETE FROM suburb_neighbour_sources")
+        stored = {}
+
+    changed = {name for name, point in current.items() if stored.get(name) != point}
+    removed = set(stored) - set(current)
+    stale = changed | removed
+    if not stale:
+        return 0
+
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS stale_suburbs (suburb TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM stale_suburbs")
+    conn.executemany("INSERT INTO stale_suburbs (suburb) VALUES (?)", [(name,) for name in stale])
+    # The table is symmetric, so the reverse rows of a stale suburb are found
+    # through its own rows and deleted by primary key.
+    conn.execute(
+        """
+        DELETE FROM suburb_neighbours
+        WHERE (suburb, neighbour) IN (
+          SELECT neighbour, suburb FROM suburb_neighbours
+          WHERE suburb IN (SELECT suburb FROM stale_suburbs)
+        )
+        """
+    )
+    conn.execute(
+        "DELETE FROM suburb_neighbours WHERE suburb IN (SELECT suburb FROM stale_suburbs)"
+    )
+    conn.execute(
+        "DELETE FROM suburb_neighbour_sources WHERE suburb IN (SELECT suburb FROM stale_suburbs)"
+    )
+
+    rows: list[tuple[str, str, float]] = []
+    written = 0
+    for name in changed:
+        for neighbour, distance in index.neighbours(name, max_radius_km):
+            rows.append((name, neighbour.suburb, distance))
+            # Pairs between two changed suburbs are written from both sides anyway.
+            if neighbour.suburb not in changed:
+                rows.append((neighbour.suburb, name, distance))
+        if len(rows) >= 10_000:
+            written += _insert_neighbours(conn, rows)
+            rows = []
+    written += _insert_neighbours(conn, rows)
+    conn.executemany(
+        "INSERT INTO suburb_neighbour_sources (suburb, latitude, longitude) VALUES (?, ?, ?)",
+        [(name, *current[name]) for name in changed],
+    )
+    set_meta(conn, "neighbour_max_radius_km", repr(float(max_radius_km)))
+    conn.commit()
+    return written
+
+
+def _insert_neighbours(conn: sqlite3.Connection, rows: list[tuple[str, str, float]]) -> int:
+    if not rows:
+        return 0
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO suburb_neighbours (suburb, neighbour, distance_km)
+        VALUES (?, ?, ?)
+        """,
+        rows,
+    )
+    return len(rows)
 
 
 def save_search(
@@ -179,3 +1312,463 @@ def update_saved_search_last_run(conn: sqlite3.Connection, search_id: int, run_a
         {"run_at": run_at, "id": search_id},
     )
     conn.commit()
+
+
+def claim_due_searches(
+    conn: sqlite3.Connection,
+    worker: str,
+    now: str,
+    lease_until: str,
+    limit: int,
+    shard: int = 0,
+    shards: int = 1,
+) -> list[sqlite3.Row]:
+    rows = list(
+        conn.execute(
+            """
+            UPDATE saved_searches
+            SET claimed_by = :worker, claimed_until = :lease_until
+            WHERE id IN (
+              SELECT id
+              FROM saved_searches
+              WHERE (next_run_at IS NULL OR next_run_at <= :now)
+                AND (claimed_until IS NULL OR claimed_until < :now)
+                AND id % :shards = :shard
+              ORDER BY next_run_at IS NOT NULL, next_run_at, id
+              LIMIT :limit
+            )
+            RETURNING *
+            """,
+            {
+                "worker": worker,
+                "lease_until": lease_until,
+                "now": now,
+                "shards": max(1, shards),
+                "shard": shard,
+                "limit": limit,
+            },
+        )
+    )
+    conn.commit()
+    return rows
+
+
+def renew_claims(
+    conn: sqlite3.Connection,
+    search_ids: list[int],
+    worker: str,
+    lease_until: str,
+) -> set[int]:
+    if not search_ids:
+        return set()
+    placeholders = ", ".join("?" for _ in search_ids)
+    rows = conn.execute(
+        f"""
+        UPDATE saved_searches
+        SET claimed_until = ?
+        WHERE id IN ({placeholders}) AND claimed_by = ?
+        RETURNING id
+        """,
+        (lease_until, *search_ids, worker),
+    ).fetchall()
+    conn.commit()
+    return {row["id"] for row in rows}
+
+
+def complete_saved_search(
+    conn: sqlite3.Connection,
+    search_id: int,
+    worker: str,
+    run_at: str | None,
+    next_run_at: str,
+) -> None:
+    conn.execute(
+        """
+        UPDATE saved_searches
+        SET last_run_at = COALESCE(:run_at, last_run_at),
+            next_run_at = :next_run_at,
+            claimed_by = NULL,
+            claimed_until = NULL
+        WHERE id = :id AND claimed_by = :worker
+        """,
+        {"run_at": run_at, "next_run_at": next_run_at, "id": search_id, "worker": worker},
+    )
+    conn.commit()
+
+
+def refresh_candidates(conn: sqlite3.Connection | ShardedConnection) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    if isinstance(conn, ShardedConnection):
+        for shard_counts in conn.map_shards(_suburb_listing_counts):
+            for suburb, listings in shard_counts.items():
+                counts[suburb] = counts.get(suburb, 0) + listings
+    else:
+        counts = _suburb_listing_counts(conn)
+    for row in conn.execute("SELECT suburb FROM suburb_crawls"):
+        counts.setdefault(row["suburb"], 0)
+    return counts
+
+
+def _suburb_listing_counts(conn: sqlite3.Connection) -> dict[str, int]:
+    return {
+        row["suburb"]: row["listings"]
+        for row in conn.execute(
+            """
+            SELECT suburb, COUNT(*) AS listings
+            FROM listings
+            WHERE suburb IS NOT NULL AND suburb != ''
+            GROUP BY suburb
+            """
+        )
+    }
+
+
+def list_suburb_crawls(conn: sqlite3.Connection) -> dict[str, sqlite3.Row]:
+    return {
+        row["suburb"].lower(): row for row in conn.execute("SELECT * FROM suburb_crawls")
+    }
+
+
+def record_suburb_crawl(
+    conn: sqlite3.Connection,
+    suburb: str,
+    crawled_at: str,
+    churn_per_hour: float,
+    requests_per_crawl: float,
+    changes: int,
+    listings: int,
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO suburb_crawls (
+          suburb, last_crawled_at, crawls, churn_per_hour, requests_per_crawl,
+          last_changes, last_listings
+        ) VALUES (
+          :suburb, :crawled_at, 1, :churn_per_hour, :requests_per_crawl,
+          :changes, :listings
+        )
+        ON CONFLICT(suburb) DO UPDATE SET
+          last_crawled_at=excluded.last_crawled_at,
+          crawls=suburb_crawls.crawls + 1,
+          churn_per_hour=excluded.churn_per_hour,
+          requests_per_crawl=excluded.requests_per_crawl,
+          last_changes=excluded.last_changes,
+          last_listings=excluded.last_listings
+        """,
+        {
+            "suburb": suburb,
+            "crawled_at": crawled_at,
+            "churn_per_hour": churn_per_hour,
+            "requests_per_crawl": requests_per_crawl,
+            "changes": changes,
+            "listings": listings,
+        },
+    )
+    conn.commit()
+
+
+def record_full_crawl(conn: sqlite3.Connection, suburb: str, started_at: str) -> None:
+    conn.execute(
+        "INSERT OR IGNORE INTO suburb_full_crawls (suburb, started_at) VALUES (?, ?)",
+        (suburb, started_at),
+    )
+    conn.commit()
+
+
+def last_full_crawls(conn: sqlite3.Connection) -> dict[str, str]:
+    return {
+        row["suburb"].lower(): row["started_at"]
+        for row in conn.execute(
+            """
+            SELECT suburb, MAX(started_at) AS started_at
+            FROM suburb_full_crawls
+            GROUP BY suburb
+            """
+        )
+    }
+
+
+def prune_full_crawls(conn: sqlite3.Connection, keep: int) -> int:
+    cursor = conn.execute(
+        """
+        DELETE FROM suburb_full_crawls
+        WHERE (suburb, started_at) IN (
+          SELECT suburb, started_at FROM (
+            SELECT suburb, started_at, ROW_NUMBER() OVER (
+              PARTITION BY suburb ORDER BY started_at DESC
+            ) AS crawl_rank
+            FROM suburb_full_crawls
+          )
+          WHERE crawl_rank > ?
+        )
+        """,
+        (keep,),
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+# A listing last scraped before the start of the Nth most recent complete crawl
+# of its suburb was missing from each of those N crawls.
+_DELISTED_SQL = """
+    WITH cutoffs AS (
+      SELECT suburb, started_at FROM (
+        SELECT suburb, started_at, ROW_NUMBER() OVER (
+          PARTITION BY suburb ORDER BY started_at DESC
+        ) AS crawl_rank
+        FROM suburb_full_crawls
+      )
+      WHERE crawl_rank = ?
+    )
+    SELECT {columns}
+    FROM cutoffs c
+    JOIN listings l ON l.suburb = c.suburb COLLATE NOCASE AND l.scraped_at < c.started_at
+"""
+
+
+def delisted_listing_ids(
+    conn: sqlite3.Connection, crawls: int, max_share: float = MAX_DELIST_SHARE
+) -> list[str]:
+    by_suburb: dict[str, list[str]] = {}
+    for row in conn.execute(_DELISTED_SQL.format(columns="l.id, l.suburb"), (crawls,)):
+        by_suburb.setdefault(row["suburb"], []).append(row["id"])
+    ids: list[str] = []
+    for suburb, suburb_ids in by_suburb.items():
+        total = conn.execute(
+            "SELECT COUNT(*) FROM listings WHERE suburb = ?", (suburb,)
+        ).fetchone()[0]
+        if len(suburb_ids) > max_share * total:
+            logger.warning(
+                "Not archiving %s of %s listings in %s, too many missing at once",
+                len(suburb_ids),
+                total,
+                suburb,
+            )
+            continue
+        ids.extend(suburb_ids)
+    return ids
+
+
+def archive_delisted(
+    conn: sqlite3.Connection,
+    crawls: int,
+    batch_size: int = 500,
+    queue: sqlite3.Connection | None = None,
+) -> int:
+    # A shard's listings are queued for notification in the catalog, which the
+    # caller passes as queue.
+    queue = queue or conn
+    ids = delisted_listing_ids(conn, crawls)
+    columns = [
+        row["name"]
+        for row in conn.execute("PRAGMA table_info(listings)")
+        if row["name"] != "is_representative"
+    ]
+    insert_archive = (
+        f"INSERT OR REPLACE INTO listings_archive ({', '.join(columns)}, archived_at) "
+        f"VALUES ({', '.join('?' for _ in columns)}, ?)"
+    )
+    tracked = len(TRACKED_FIELDS)
+    archived = 0
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start : start + batch_size]
+        placeholders = ", ".join("?" for _ in batch)
+        archived_at = datetime.now(timezone.utc).isoformat()
+        try:
+            # The cutoff is checked again so a listing an ingest saw since the
+            # ids were read stays put.
+            rows = conn.execute(
+                _DELISTED_SQL.format(columns="l.*") + f" WHERE l.id IN ({placeholders})",
+                (crawls, *batch),
+            ).fetchall()
+            if not rows:
+                continue
+            facet_deltas: dict[tuple[str, str, str], int] = {}
+            history: list[tuple[str, str, str, int | None]] = []
+            archive_rows = []
+            for row in rows:
+                _count_facets(facet_deltas, row, -1)
+                previous = tuple(row[field] for field in TRACKED_FIELDS)
+                delisted = tuple(
+                    DELISTED_STATUS if field == "listing_status" else row[field]
+                    for field in TRACKED_FIELDS
+                )
+                if not _has_history(conn, row["id"]):
+                    history.append(
+                        _history_row(row["id"], row["scraped_at"], (None,) * tracked, previous)
+                    )
+                history.append(_history_row(row["id"], archived_at, previous, delisted))
+                archive_rows.append(
+                    (
+                        *(
+                            DELISTED_STATUS if column == "listing_status" else row[column]
+                            for column in columns
+                        ),
+                        archived_at,
+                    )
+                )
+            moved = [row["id"] for row in rows]
+            moved_placeholders = ", ".join("?" for _ in moved)
+            properties = {row["property_id"] or row["id"] for row in rows}
+            representatives = _representatives(conn, properties)
+            conn.executemany(insert_archive, archive_rows)
+            conn.executemany(
+                """
+                INSERT INTO listing_history (listing_id, changed_at, changes, price_drop)
+                VALUES (?, ?, ?, ?)
+                """,
+                history,
+            )
+            queue.execute(
+                f"DELETE FROM pending_notifications WHERE listing_id IN ({moved_placeholders})",
+                moved,
+            )
+            conn.execute(f"DELETE FROM listings WHERE id IN ({moved_placeholders})", moved)
+            property_deltas: dict[tuple[str, str, str], int] = {}
+            after = _representatives(conn, properties)
+            _count_representative_changes(property_deltas, representatives, after)
+            _move_representative_flags(conn, representatives, after)
+            _apply_facet_deltas(conn, facet_deltas)
+            _apply_facet_deltas(conn, property_deltas, "property_facets")
+            conn.commit()
+            queue.commit()
+        except Exception:
+            conn.rollback()
+            queue.rollback()
+            raise
+        archived += len(rows)
+    return archived
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection) -> bool:
+    if conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] == INCREMENTAL_AUTO_VACUUM:
+        return False
+    conn.commit()
+    conn.execute("PRAGMA main.auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+def optimize_database(conn: sqlite3.Connection) -> int:
+    freed = 0
+    if conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] == INCREMENTAL_AUTO_VACUUM:
+        before = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+        conn.execute("PRAGMA main.incremental_vacuum").fetchall()
+        freed = before - conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+    conn.execute("PRAGMA main.optimize")
+    return freed
+
+
+def distinct_price_texts(conn: sqlite3.Connection | ShardedConnection) -> list[str]:
+    if isinstance(conn, ShardedConnection):
+        return sorted(set(chain.from_iterable(conn.map_shards(distinct_price_texts))))
+    return [
+        row[0]
+        for row in conn.execute(
+            "SELECT DISTINCT price_text FROM listings WHERE price_text IS NOT NULL"
+        )
+    ]
+
+
+def apply_price_backfill(
+    conn: sqlite3.Connection | ShardedConnection,
+    prices: Iterable[tuple[str, int | None, int | None]],
+) -> int:
+    if isinstance(conn, ShardedConnection):
+        return sum(conn.map_shards(apply_price_backfill, list(prices)))
+    conn.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS price_backfill (
+          price_text TEXT PRIMARY KEY,
+          price_min INTEGER,
+          price_max INTEGER
+        ) WITHOUT ROWID
+        """
+    )
+    try:
+        conn.execute("DELETE FROM price_backfill")
+        conn.executemany("INSERT INTO price_backfill VALUES (?, ?, ?)", prices)
+        rows = conn.execute(
+            """
+            SELECT l.*, b.price_min AS new_price_min, b.price_max AS new_price_max
+            FROM listings AS l
+            JOIN price_backfill AS b ON b.price_text = l.price_text
+            WHERE l.price_min IS NOT b.price_min OR l.price_max IS NOT b.price_max
+            """
+        ).fetchall()
+        updated = _update_prices(
+            conn, [(row, row["new_price_min"], row["new_price_max"]) for row in rows]
+        )
+        conn.execute("DELETE FROM price_backfill")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return updated
+
+
+def clear_unpriced_listings(conn: sqlite3.Connection | ShardedConnection) -> int:
+    if isinstance(conn, ShardedConnection):
+        return sum(conn.map_shards(clear_unpriced_listings))
+    try:
+        rows = conn.execute(
+            """
+            SELECT * FROM listings
+            WHERE price_text IS NULL
+              AND (price_min IS NOT NULL OR price_max IS NOT NULL)
+            """
+        ).fetchall()
+        updated = _update_prices(conn, [(row, None, None) for row in rows])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return updated
+
+
+def _update_prices(
+    conn: sqlite3.Connection, updates: list[tuple[sqlite3.Row, int | None, int | None]]
+) -> int:
+    # Re-parsed prices go through the same history and facet bookkeeping as an
+    # ingest would, so the price history and maintained counts stay complete.
+    if not updates:
+        return 0
+    changed_at = datetime.now(timezone.utc).isoformat()
+    tracked = len(TRACKED_FIELDS)
+    facet_deltas: dict[tuple[str, str, str], int] = {}
+    history: list[tuple[str, str, str, int | None]] = []
+    for row, price_min, price_max in updates:
+        listing = dict(row)
+        previous = tuple(listing[field] for field in TRACKED_FIELDS)
+        _count_facets(facet_deltas, listing, -1)
+        listing.update(price_min=price_min, price_max=price_max)
+        _count_facets(facet_deltas, listing, 1)
+        if not _has_history(conn, row["id"]):
+            history.append(
+                _history_row(row["id"], row["scraped_at"], (None,) * tracked, previous)
+            )
+        history.append(
+            _history_row(
+                row["id"], changed_at, previous, tuple(listing[field] for field in TRACKED_FIELDS)
+            )
+        )
+    properties = {row["property_id"] or row["id"] for row, _, _ in updates}
+    representatives = _representatives(conn, properties)
+    conn.executemany(
+        "UPDATE listings SET price_min = ?, price_max = ? WHERE id = ?",
+        [(price_min, price_max, row["id"]) for row, price_min, price_max in updates],
+    )
+    conn.executemany(
+        """
+        INSERT INTO listing_history (listing_id, changed_at, changes, price_drop)
+        VALUES (?, ?, ?, ?)
+        """,
+        history,
+    )
+    property_deltas: dict[tuple[str, str, str], int] = {}
+    _count_representative_changes(
+        property_deltas, representatives, _representatives(conn, properties)
+    )
+    _apply_facet_deltas(conn, facet_deltas)
+    _apply_facet_deltas(conn, property_deltas, "property_facets")
+    return len(updates)
@@ -17,7 +17,10 @@ CREATE TABLE IF NOT EXISTS listings (
   listing_status TEXT,
   listed_at TEXT,
   scraped_at TEXT NOT NULL,
-  raw_json TEXT
+  raw_json TEXT,
+  address_key TEXT,
+  block_key TEXT,
+  property_id TEXT
 );
 
 CREATE TABLE IF NOT EXISTS saved_searches (
@@ -26,5 +29,124 @@ CREATE TABLE IF NOT EXISTS saved_searches (
   criteria_json TEXT NOT NULL,
   schedule TEXT NOT NULL,
   email TEXT NOT NULL,
-  last_run_at TEXT
+  last_run_at TEXT,
+  next_run_at TEXT,
+  claimed_by TEXT,
+  claimed_until TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_listings_suburb ON listings(suburb, scraped_at);
+CREATE INDEX IF NOT EXISTS idx_listings_scraped_at ON listings(scraped_at);
+
+CREATE TABLE IF NOT EXISTS suburb_neighbours (
+  suburb TEXT NOT NULL COLLATE NOCASE,
+  neighbour TEXT NOT NULL,
+  distance_km REAL NOT NULL,
+  PRIMARY KEY (suburb, neighbour)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_suburb_neighbours_distance
+  ON suburb_neighbours(suburb, distance_km, neighbour);
+
+CREATE TABLE IF NOT EXISTS suburb_neighbour_sources (
+  suburb TEXT PRIMARY KEY,
+  latitude REAL NOT NULL,
+  longitude REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS listing_changes (
+  seq INTEGER PRIMARY KEY AUTOINCREMENT,
+  listing_id TEXT NOT NULL,
+  change_type TEXT NOT NULL,
+  changed_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS listing_history (
+  seq INTEGER PRIMARY KEY,
+  listing_id TEXT NOT NULL,
+  changed_at TEXT NOT NULL,
+  changes TEXT NOT NULL,
+  price_drop INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_listing_history_listing
+  ON listing_history(listing_id, changed_at);
+
+CREATE INDEX IF NOT EXISTS idx_listing_history_price_drop
+  ON listing_history(changed_at, listing_id, price_drop)
+  WHERE price_drop IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS listing_facets (
+  suburb TEXT NOT NULL,
+  facet TEXT NOT NULL,
+  value TEXT NOT NULL,
+  count INTEGER NOT NULL,
+  PRIMARY KEY (suburb, facet, value)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS property_facets (
+  suburb TEXT NOT NULL,
+  facet TEXT NOT NULL,
+  value TEXT NOT NULL,
+  count INTEGER NOT NULL,
+  PRIMARY KEY (suburb, facet, value)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS change_cursors (
+  consumer TEXT PRIMARY KEY,
+  last_seq INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS pending_notifications (
+  search_id INTEGER NOT NULL,
+  listing_id TEXT NOT NULL,
+  queued_at TEXT NOT NULL,
+  PRIMARY KEY (search_id, listing_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS app_meta (
+  key TEXT PRIMARY KEY,
+  value TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS suburb_crawls (
+  suburb TEXT PRIMARY KEY COLLATE NOCASE,
+  last_crawled_at TEXT NOT NULL,
+  crawls INTEGER NOT NULL DEFAULT 0,
+  churn_per_hour REAL NOT NULL,
+  requests_per_crawl REAL NOT NULL,
+  last_changes INTEGER NOT NULL,
+  last_listings INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS suburb_full_crawls (
+  suburb TEXT NOT NULL COLLATE NOCASE,
+  started_at TEXT NOT NULL,
+  PRIMARY KEY (suburb, started_at)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS listings_archive (
+  id TEXT PRIMARY KEY,
+  url TEXT NOT NULL,
+  title TEXT,
+  address TEXT,
+  suburb TEXT,
+  state TEXT,
+  postcode TEXT,
+  price_text TEXT,
+  price_min INTEGER,
+  price_max INTEGER,
+  bedrooms INTEGER,
+  bathrooms INTEGER,
+  parking INTEGER,
+  property_type TEXT,
+  land_size INTEGER,
+  listing_status TEXT,
+  listed_at TEXT,
+  scraped_at TEXT NOT NULL,
+  raw_json TEXT,
+  address_key TEXT,
+  block_key TEXT,
+  property_id TEXT,
+  archived_at TEXT NOT NULL
 );
@@ -0,0 +1,357 @@
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from datetime import datetime, timezone
+from heapq import merge
+from itertools import chain, islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, TypeVar
+
+from src.common.config import Settings
+from src.common.facets import merge_counts
+from src.common.gazetteer import state_for_postcode
+from src.common.ranking import RankingCriteria, top_k
+
+if TYPE_CHECKING:
+    from src.db.database import Listing, UpsertResult
+
+STATES = ("ACT", "NSW", "NT", "QLD", "SA", "TAS", "VIC", "WA")
+OTHER_SHARD = "other"
+SHARD_SUFFIX = ".db"
+
+# Tables owned by the primary database that every shard reads through a view.
+SHARED_TABLES = ("suburb_neighbours", "suburb_full_crawls")
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Clustering and representative flags are recomputed in the destination shard.
+_UNMOVED_COLUMNS = ("block_key", "property_id", "is_representative")
+
+
+def shard_for(state: str | None, postcode: str | None) -> str:
+    code = (state or "").strip().upper()
+    if code not in STATES:
+        code = state_for_postcode(postcode)
+    return code.lower() if code in STATES else OTHER_SHARD
+
+
+class ShardedConnection:
+    """Listings split into one SQLite file per state behind a single handle.
+
+    The primary database acts as the catalog: it records which shards hold each
+    suburb, so single-suburb queries touch one file, and it keeps the shared
+    tables that shards attach read-only. Each shard has its own writer lock, so
+    ingest processes working on different states no longer queue behind one
+    another.
+
+    Statements run on the handle itself go to the catalog, which also keeps the
+    saved searches, notification queue and crawl bookkeeping; the database
+    functions that read listings fan out over the shards instead.
+    """
+
+    def __init__(self, catalog_path: str, shard_dir: str) -> None:
+        from src.db.database import get_connection
+
+        self.catalog_path = str(Path(catalog_path).resolve())
+        self.shard_dir = Path(shard_dir)
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self.catalog = get_connection(catalog_path, check_same_thread=False)
+        self.catalog.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS suburb_shards (
+              suburb TEXT NOT NULL COLLATE NOCASE,
+              shard TEXT NOT NULL,
+              PRIMARY KEY (suburb, shard)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._catalog_lock = threading.Lock()
+        self._shards: dict[str, sqlite3.Connection] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._open_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(STATES) + 1, thread_name_prefix="shard"
+        )
+
+    def init(self) -> None:
+        from src.db.database import init_db
+
+        init_db(self.catalog)
+        for name in self.shard_names():
+            self.shard(name, initialise=True)
+        with self._catalog_lock:
+            legacy = self.catalog.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+        if legacy:
+            logger.warning(
+                "%s listings in %s are not in any shard and are hidden from searches; "
+                "run python -m src.jobs.reshard to move them",
+                legacy,
+                self.catalog_path,
+            )
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        with self._catalog_lock:
+            return self.catalog.execute(sql, parameters)
+
+    def executemany(self, sql: str, parameters: Iterable[Any]) -> sqlite3.Cursor:
+        with self._catalog_lock:
+            return self.catalog.executemany(sql, parameters)
+
+    def commit(self) -> None:
+        with self._catalog_lock:
+            self.catalog.commit()
+
+    def rollback(self) -> None:
+        with self._catalog_lock:
+            self.catalog.rollback()
+
+    def map_shards(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> list[T]:
+        return self._fan_out(
+            self.shard_names(), lambda conn: function(conn, *args, **kwargs)
+        )
+
+    def shard_names(self) -> list[str]:
+        return sorted(path.stem for path in self.shard_dir.glob(f"*{SHARD_SUFFIX}"))
+
+    def shard(self, name: str, initialise: bool = False) -> sqlite3.Connection:
+        from src.db.database import get_connection, init_db
+
+        with self._open_lock:
+            conn = self._shards.get(name)
+            if conn is None:
+                path = self.shard_dir / f"{name}{SHARD_SUFFIX}"
+                created = not path.exists()
+                conn = get_connection(str(path), check_same_thread=False)
+                # The schema has to be applied before the shared views below
+                # shadow the shard's own tables.
+                if created or initialise:
+                    conn.execute("PRAGMA journal_mode = WAL")
+                    init_db(conn)
+                conn.execute("ATTACH DATABASE ? AS catalog", (self.catalog_path,))
+                for table in SHARED_TABLES:
+                    # Temp objects are resolved before main, so the shard's own
+                    # empty copy of the table is shadowed by the catalog's.
+                    conn.execute(
+                        f"CREATE TEMP VIEW IF NOT EXISTS {table} AS "
+                        f"SELECT * FROM catalog.{table}"
+                    )
+                self._shards[name] = conn
+                self._locks[name] = threading.Lock()
+            return conn
+
+    def route(self, suburbs: Iterable[str]) -> list[str]:
+        names = list(dict.fromkeys(suburbs))
+        if not names:
+            return []
+        placeholders = ", ".join("?" for _ in names)
+        with self._catalog_lock:
+            rows = self.catalog.execute(
+                f"SELECT DISTINCT shard FROM suburb_shards WHERE suburb IN ({placeholders})",
+                names,
+            ).fetchall()
+        return sorted(row["shard"] for row in rows)
+
+    def upsert(self, listings: Iterable["Listing"]) -> "UpsertResult":
+        from src.db.database import UpsertResult, upsert_listings_with_result
+
+        buckets: dict[str, list[Listing]] = {}
+        for listing in listings:
+            buckets.setdefault(shard_for(listing.state, listing.postcode), []).append(listing)
+        self._register(buckets)
+        results = self._fan_out(list(buckets), upsert_listings_with_result, buckets)
+        return UpsertResult(
+            rows=sum(result.rows for result in results),
+            new_ids=list(chain.from_iterable(result.new_ids for result in results)),
+            changed_ids=list(chain.from_iterable(result.changed_ids for result in results)),
+            stale=sum(result.stale for result in results),
+        )
+
+    def reshard_primary_listings(self, batch_size: int = 1000) -> int:
+        """Move listings stored in the primary database before sharding was
+        enabled into their state shards, together with their history."""
+        from src.db.database import assign_property_ids, rebuild_listing_facets
+
+        with self._catalog_lock:
+            columns = [
+                row["name"]
+                for row in self.catalog.execute("PRAGMA table_info(listings)")
+                if row["name"] not in _UNMOVED_COLUMNS
+            ]
+        insert_listing = (
+            f"INSERT INTO listings ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)}) ON CONFLICT(id) DO NOTHING"
+        )
+        moved = 0
+        touched: set[str] = set()
+        while True:
+            with self._catalog_lock:
+                rows = self.catalog.execute(
+                    f"SELECT {', '.join(columns)} FROM listings ORDER BY id LIMIT ?",
+                    (batch_size,),
+                ).fetchall()
+                if not rows:
+                    break
+                ids = [row["id"] for row in rows]
+                placeholders = ", ".join("?" for _ in ids)
+                history = self.catalog.execute(
+                    f"""
+                    SELECT listing_id, changed_at, changes, price_drop
+                    FROM listing_history WHERE listing_id IN ({placeholders})
+                    """,
+                    ids,
+                ).fetchall()
+            buckets: dict[str, list[sqlite3.Row]] = {}
+            for row in rows:
+                buckets.setdefault(shard_for(row["state"], row["postcode"]), []).append(row)
+            shard_of = {row["id"]: name for name, bucket in buckets.items() for row in bucket}
+            for name, bucket in buckets.items():
+                conn = self.shard(name)
+                with self._locks[name]:
+                    # A listing already in its shard was written after sharding
+                    # was enabled, so the shard's copy is the newer one.
+                    conn.executemany(insert_listing, [tuple(row) for row in bucket])
+                    conn.executemany(
+                        """
+                        INSERT INTO listing_history (listing_id, changed_at, changes, price_drop)
+                        VALUES (?, ?, ?, ?)
+                        """,
+                        [tuple(row) for row in history if shard_of[row["listing_id"]] == name],
+                    )
+                    conn.commit()
+                touched.add(name)
+            self._register_suburbs(
+                {(row["suburb"], shard_of[row["id"]]) for row in rows if row["suburb"]}
+            )
+            with self._catalog_lock:
+                self.catalog.execute(
+                    f"DELETE FROM listing_history WHERE listing_id IN ({placeholders})", ids
+                )
+                self.catalog.execute(f"DELETE FROM listings WHERE id IN ({placeholders})", ids)
+                self.catalog.commit()
+            moved += len(rows)
+        for name in sorted(touched):
+            conn = self.shard(name)
+            with self._locks[name]:
+                while assign_property_ids(conn, batch_size) == batch_size:
+                    pass
+                rebuild_listing_facets(conn)
+        if moved:
+            with self._catalog_lock:
+                rebuild_listing_facets(self.catalog)
+        return moved
+
+    def query_listings(self, limit: int = 50, sort: str = "newest", **filters: Any) -> list:
+        from src.db.database import neighbour_distances, query_listings
+
+        names = self._shards_for(filters)
+        results = self._fan_out(names, query_listings, limit=limit, sort=sort, **filters)
+        if len(results) == 1:
+            return results[0]
+        if sort == "relevance":
+            suburb, radius_km = filters.get("suburb"), filters.get("radius_km")
+            with self._catalog_lock:
+                distances = (
+                    neighbour_distances(self.catalog, suburb, radius_km)
+                    if suburb and radius_km
+                    else None
+                )
+            criteria = RankingCriteria(
+                min_price=filters.get("min_price"),
+                max_price=filters.get("max_price"),
+                bedrooms=filters.get("bedrooms"),
+                radius_km=radius_km,
+                distances=distances,
+                now=datetime.now(timezone.utc),
+            )
+            return [row for _, row in top_k(chain.from_iterable(results), criteria, limit)]
+        # Every shard returns its rows newest first, so a k-way merge is enough.
+        return list(
+            islice(
+                merge(*results, key=lambda row: row["scraped_at"] or "", reverse=True),
+                limit,
+            )
+        )
+
+    def facet_counts(self, **filters: Any) -> dict[str, dict[str, int]]:
+        from src.db.database import facet_counts
+
+        results = self._fan_out(self._shards_for(filters), facet_counts, **filters)
+        return merge_counts(
+            (facet, value, count)
+            for counts in results
+            for facet, values in counts.items()
+            for value, count in values.items()
+        )
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for conn in self._shards.values():
+            conn.close()
+        self._shards.clear()
+        self.catalog.close()
+
+    def _register(self, buckets: dict[str, list["Listing"]]) -> None:
+        self._register_suburbs(
+            {
+                (listing.suburb, name)
+                for name, listings in buckets.items()
+                for listing in listings
+                if listing.suburb
+            }
+        )
+
+    def _register_suburbs(self, pairs: set[tuple[str, str]]) -> None:
+        with self._catalog_lock:
+            self.catalog.executemany(
+                "INSERT OR IGNORE INTO suburb_shards (suburb, shard) VALUES (?, ?)", pairs
+            )
+            self.catalog.commit()
+
+    def _shards_for(self, filters: dict[str, Any]) -> list[str]:
+        from src.db.database import neighbours_within
+
+        suburb = filters.get("suburb")
+        if filters.get("suburbs"):
+            return self.route(filters["suburbs"])
+        if suburb and filters.get("radius_km"):
+            with self._catalog_lock:
+                nearby = neighbours_within(self.catalog, suburb, filters["radius_km"])
+            return self.route([suburb, *nearby])
+        if suburb:
+            return self.route([suburb])
+        return self.shard_names()
+
+    def _fan_out(
+        self,
+        names: list[str],
+        function: Callable[..., T],
+        per_shard: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> list[T]:
+        def run(name: str) -> T:
+            conn = self.shard(name)
+            with self._locks[name]:
+                if per_shard is not None:
+                    return function(conn, per_shard[name], **kwargs)
+                return function(conn, **kwargs)
+
+        if len(names) == 1:
+            return [run(names[0])]
+        # Each shard runs in a copy of the caller's context so trace spans
+        # recorded on the pool threads land in the caller's capture.
+        contexts = [copy_context() for _ in names]
+        return list(
+            self._executor.map(lambda context, name: context.run(run, name), contexts, names)
+        )
+
+
+def connect(settings: Settings) -> "sqlite3.Connection | ShardedConnection":
+    from src.db.database import get_connection
+
+    if settings.shard_dir:
+        return ShardedConnection(settings.db_path, settings.shard_dir)
+    return get_connection(settings.db_path)
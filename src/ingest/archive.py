@@ -0,0 +1,317 @@
+import argparse
+import gzip
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+from src.common.config import Settings, load_settings
+from src.common.logging import configure_logging
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+if TYPE_CHECKING:
+    from src.ingest.bulk import BulkIngestReport, PageResult
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "index.sqlite"
+SEGMENT_MAX_BYTES = 256 * 1024 * 1024
+RECORD_VERSION = "PHARC/1.0"
+
+
+@dataclass(frozen=True)
+class ArchivedFetch:
+    url: str
+    fetched_at: str
+    sha256: str
+    status: int
+
+
+class PageArchive:
+    """Append-only store of fetched pages.
+
+    Each page body is compressed as its own gzip member or zstd frame inside a
+    segment file, so any record can be read back by offset. Identical bodies are
+    stored once; every fetch still gets an index row keyed by URL and time.
+    Each process appends to its own segment, leaving the index to arbitrate.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._segment: Path | None = None
+        self._index = sqlite3.connect(
+            self.directory / INDEX_NAME, check_same_thread=False, timeout=30
+        )
+        self._index.row_factory = sqlite3.Row
+        self._index.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS pages (
+              sha256 TEXT PRIMARY KEY,
+              segment TEXT NOT NULL,
+              offset INTEGER NOT NULL,
+              length INTEGER NOT NULL,
+              size INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS fetches (
+              url TEXT NOT NULL,
+              fetched_at TEXT NOT NULL,
+              sha256 TEXT NOT NULL,
+              status INTEGER NOT NULL,
+              PRIMARY KEY (url, fetched_at)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_fetches_time ON fetches(fetched_at);
+            """
+        )
+
+    def store(
+        self, url: str, body: str, fetched_at: str | None = None, status: int = 200
+    ) -> str:
+        fetched_at = fetched_at or datetime.now(timezone.utc).isoformat()
+        data = body.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            known = self._index.execute(
+                "SELECT 1 FROM pages WHERE sha256 = ?", (digest,)
+            ).fetchone()
+            if known is None:
+                segment, offset, length = self._append(url, fetched_at, digest, data)
+                self._index.execute(
+                    """
+                    INSERT OR IGNORE INTO pages (sha256, segment, offset, length, size)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (digest, segment, offset, length, len(data)),
+                )
+            self._index.execute(
+                """
+                INSERT OR REPLACE INTO fetches (url, fetched_at, sha256, status)
+                VALUES (?, ?, ?, ?)
+                """,
+                (url, fetched_at, digest, status),
+            )
+            self._index.commit()
+        return digest
+
+    def read(self, sha256: str) -> str:
+        row = self._index.execute(
+            "SELECT segment, offset, length FROM pages WHERE sha256 = ?", (sha256,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(sha256)
+        with open(self.directory / row["segment"], "rb") as handle:
+            handle.seek(row["offset"])
+            record = _decompress(row["segment"], handle.read(row["length"]))
+        _, _, body = record.partition(b"\r\n\r\n")
+        return body.decode("utf-8")
+
+    def fetches(
+        self,
+        url_prefix: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        latest_only: bool = False,
+    ) -> Iterator[ArchivedFetch]:
+        clauses = []
+        params: list[str] = []
+        if url_prefix:
+            clauses.append("url >= ? AND url < ?")
+            params.extend([url_prefix, url_prefix + "\uffff"])
+        if since:
+            clauses.append("fetched_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("fetched_at < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        if latest_only:
+            query = f"""
+                SELECT url, MAX(fetched_at) AS fetched_at, sha256, status
+                FROM fetches {where}
+                GROUP BY url
+                ORDER BY fetched_at
+            """
+        else:
+            query = f"""
+                SELECT url, fetched_at, sha256, status
+                FROM fetches {where}
+                ORDER BY fetched_at
+            """
+        for row in self._index.execute(query, params):
+            yield ArchivedFetch(row["url"], row["fetched_at"], row["sha256"], row["status"])
+
+    def stats(self) -> dict[str, int]:
+        pages, raw = self._index.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+        ).fetchone()
+        fetches = self._index.execute("SELECT COUNT(*) FROM fetches").fetchone()[0]
+        stored = sum(path.stat().st_size for path in self.directory.glob("segment-*"))
+        return {"fetches": fetches, "pages": pages, "raw_bytes": raw, "stored_bytes": stored}
+
+    def close(self) -> None:
+        self._index.close()
+
+    def _append(
+        self, url: str, fetched_at: str, digest: str, data: bytes
+    ) -> tuple[str, int, int]:
+        header = (
+            f"{RECORD_VERSION}\r\n"
+            f"Target-URI: {url}\r\n"
+            f"Fetched-At: {fetched_at}\r\n"
+            f"Payload-Digest: sha256:{digest}\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n"
+        ).encode("utf-8")
+        segment = self._current_segment()
+        record = _compress(segment.name, header + data)
+        with open(segment, "ab") as handle:
+            offset = handle.tell()
+            handle.write(record)
+        return segment.name, offset, len(record)
+
+    def _current_segment(self) -> Path:
+        if self._segment is None or (
+            self._segment.exists() and self._segment.stat().st_size >= SEGMENT_MAX_BYTES
+        ):
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            suffix = ".zst" if zstandard is not None else ".gz"
+            self._segment = self.directory / f"segment-{stamp}-{os.getpid()}{suffix}"
+        return self._segment
+
+
+_ARCHIVES: dict[str, PageArchive] = {}
+_ARCHIVES_LOCK = threading.Lock()
+
+
+def get_archive(directory: str) -> PageArchive:
+    key = f"{os.getpid()}:{os.path.abspath(directory)}"
+    with _ARCHIVES_LOCK:
+        archive = _ARCHIVES.get(key)
+        if archive is None:
+            archive = _ARCHIVES[key] = PageArchive(directory)
+        return archive
+
+
+def archive_page(settings: Settings, url: str, body: str, status: int = 200) -> None:
+    if not settings.archive_dir:
+        return
+    try:
+        get_archive(settings.archive_dir).store(url, body, status=status)
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning("Could not archive %s: %s", url, exc)
+
+
+def _compress(segment: str, data: bytes) -> bytes:
+    if segment.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to write .zst archive segments")
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(segment: str, data: bytes) -> bytes:
+    if segment.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read .zst archive segments")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _parse_archived(args: tuple[str, ArchivedFetch]) -> "PageResult":
+    from src.ingest.bulk import PageResult, parse_html
+
+    directory, fetch = args
+    source = f"{fetch.url} @ {fetch.fetched_at}"
+    try:
+        html = get_archive(directory).read(fetch.sha256)
+    except (KeyError, OSError, RuntimeError) as exc:
+        return PageResult(source, [], error=f"{type(exc).__name__}: {exc}")
+    return parse_html(source, html, fetch.fetched_at)
+
+
+def reparse_archive(
+    settings: Settings,
+    directory: str,
+    url_prefix: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    latest_only: bool = False,
+    workers: int | None = None,
+) -> "BulkIngestReport":
+    from src.ingest.bulk import ingest_in_pool
+
+    archive = get_archive(directory)
+    fetches = [
+        (directory, fetch)
+        for fetch in archive.fetches(url_prefix, since, until, latest_only)
+        if 200 <= fetch.status < 300
+    ]
+    return ingest_in_pool(_parse_archived, fetches, settings, workers)
+
+
+def main() -> None:
+    configure_logging()
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="Inspect or reparse the raw page archive.")
+    parser.add_argument(
+        "--archive-dir",
+        default=settings.archive_dir,
+        help="Archive directory (defaults to ARCHIVE_DIR).",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show archive size and de-duplication.")
+    reparse = commands.add_parser(
+        "reparse", help="Stream archived pages back through the parser into the DB."
+    )
+    reparse.add_argument("--url-prefix", help="Only pages whose URL starts with this.")
+    reparse.add_argument("--since", help="Only pages fetched at or after this ISO time.")
+    reparse.add_argument("--until", help="Only pages fetched before this ISO time.")
+    reparse.add_argument(
+        "--latest-only",
+        action="store_true",
+        help="Reparse only the most recent fetch of each URL.",
+    )
+    reparse.add_argument("--workers", type=int, default=None, help="Parser processes.")
+    args = parser.parse_args()
+    if not args.archive_dir:
+        parser.error("Set ARCHIVE_DIR or pass --archive-dir.")
+
+    if args.command == "stats":
+        stats = get_archive(args.archive_dir).stats()
+        ratio = stats["raw_bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0.0
+        print(
+            f"{stats['fetches']} fetches, {stats['pages']} unique pages, "
+            f"{stats['raw_bytes']} bytes raw, {stats['stored_bytes']} bytes stored "
+            f"({ratio:.1f}x)"
+        )
+        return
+    report = reparse_archive(
+        settings,
+        args.archive_dir,
+        url_prefix=args.url_prefix,
+        since=args.since,
+        until=args.until,
+        latest_only=args.latest_only,
+        workers=args.workers,
+    )
+    print(
+        f"Reparsed {report.pages} pages in {report.seconds:.1f}s "
+        f"({report.pages_per_second:.1f} pages/s): {report.unique_listings} listings, "
+        f"{report.new} new, {report.changed} changed, {report.stale} older than stored, "
+        f"{len(report.blocked)} blocked, "
+        f"{len(report.failed)} failed"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable, TypeVar
+
+from src.common.config import Settings
+from src.common.metrics import INGEST_PAGES_TOTAL
+from src.db.database import Listing, init_db, upsert_listings_with_result
+from src.db.sharding import connect
+from src.ingest.parser import is_blocked, parse_listing_cards
+from src.jobs.matcher import match_pending_changes
+
+logger = logging.getLogger(__name__)
+
+HTML_SUFFIXES = {".html", ".htm"}
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class PageResult:
+    path: str
+    listings: list[Listing]
+    blocked: bool = False
+    error: str | None = None
+
+
+@dataclass
+class BulkIngestReport:
+    pages: int = 0
+    listings: int = 0
+    unique_listings: int = 0
+    written: int = 0
+    new: int = 0
+    changed: int = 0
+    stale: int = 0
+    blocked: list[str] = field(default_factory=list)
+    empty: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+
+def find_html_pages(html_dir: str | None = None, html_glob: str | None = None) -> list[Path]:
+    paths: set[Path] = set()
+    if html_dir:
+        for root, _, files in os.walk(html_dir):
+            for name in files:
+                if Path(name).suffix.lower() in HTML_SUFFIXES:
+                    paths.add(Path(root, name))
+    if html_glob:
+        paths.update(Path(match) for match in glob.glob(html_glob, recursive=True))
+    # Oldest first, so a later scrape of the same listing overrides an earlier one.
+    return sorted(
+        (path for path in paths if path.is_file()),
+        key=lambda path: (path.stat().st_mtime_ns, str(path)),
+    )
+
+
+def parse_page(path: str) -> PageResult:
+    try:
+        html = Path(path).read_text(encoding="utf-8", errors="replace")
+        scraped_at = datetime.fromtimestamp(os.stat(path).st_mtime, timezone.utc).isoformat()
+    except OSError as exc:
+        return PageResult(path, [], error=f"{type(exc).__name__}: {exc}")
+    return parse_html(path, html, scraped_at)
+
+
+def parse_html(source: str, html: str, scraped_at: str) -> PageResult:
+    if is_blocked(html):
+        return PageResult(source, [], blocked=True)
+    try:
+        listings = [
+            replace(listing, scraped_at=scraped_at) for listing in parse_listing_cards(html)
+        ]
+    except Exception as exc:
+        return PageResult(source, [], error=f"{type(exc).__name__}: {exc}")
+    return PageResult(source, listings)
+
+
+def bulk_ingest(
+    paths: list[Path],
+    settings: Settings,
+    workers: int | None = None,
+    batch_size: int = 2000,
+) -> BulkIngestReport:
+    return ingest_in_pool(parse_page, [str(path) for path in paths], settings, workers, batch_size)
+
+
+def ingest_in_pool(
+    parse: Callable[[T], PageResult],
+    items: list[T],
+    settings: Settings,
+    workers: int | None = None,
+    batch_size: int = 2000,
+) -> BulkIngestReport:
+    # Several chunks per worker keep the pool busy while batching the IPC.
+    chunksize = max(1, min(64, len(items) // ((workers or os.cpu_count() or 1) * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(parse, items, chunksize=chunksize)
+        return ingest_page_results(results, settings, batch_size)
+
+
+def ingest_page_results(
+    results: Iterable[PageResult], settings: Settings, batch_size: int = 2000
+) -> BulkIngestReport:
+    report = BulkIngestReport()
+    latest: dict[str, Listing] = {}
+    start = time.perf_counter()
+    for result in results:
+        report.pages += 1
+        if result.blocked:
+            INGEST_PAGES_TOTAL.inc(outcome="blocked")
+            report.blocked.append(result.path)
+            continue
+        if result.error:
+            INGEST_PAGES_TOTAL.inc(outcome="failed")
+            report.failed[result.path] = result.error
+            continue
+        INGEST_PAGES_TOTAL.inc(outcome="ok")
+        if not result.listings:
+            report.empty.append(result.path)
+        report.listings += len(result.listings)
+        for listing in result.listings:
+            current = latest.get(listing.id)
+            if current is None or (listing.scraped_at or "") >= (current.scraped_at or ""):
+                latest[listing.id] = listing
+    report.unique_listings = len(latest)
+
+    conn = connect(settings)
+    init_db(conn)
+    pending = list(latest.values())
+    for offset in range(0, len(pending), batch_size):
+        result = upsert_listings_with_result(conn, pending[offset : offset + batch_size])
+        report.written += result.rows
+        report.new += len(result.new_ids)
+        report.changed += len(result.changed_ids)
+        report.stale += result.stale
+    match_pending_changes(conn)
+    conn.close()
+    report.seconds = time.perf_counter() - start
+
+    for path in report.blocked:
+        logger.warning("Blocked page skipped: %s", path)
+    for path, error in report.failed.items():
+        logger.warning("Failed to parse %s: %s", path, error)
+    for path in report.empty:
+        logger.warning("No listings found in %s", path)
+    logger.info(
+        "Bulk ingest: %s pages (%.1f pages/s), %s listings, %s unique, %s new, %s changed, "
+        "%s older than stored, %s blocked, %s failed, %s empty",
+        report.pages,
+        report.pages_per_second,
+        report.listings,
+        report.unique_listings,
+        report.new,
+        report.changed,
+        report.stale,
+        len(report.blocked),
+        len(report.failed),
+        len(report.empty),
+    )
+    return report
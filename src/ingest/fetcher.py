@@ -4,6 +4,9 @@ from typing import Any
 import requests
 
 from src.common.config import Settings
+from src.common.metrics import FETCH_SECONDS, FETCH_TOTAL
+from src.common.tracing import traced
+from src.ingest.archive import archive_page
 
 
 def build_headers(settings: Settings) -> dict[str, str]:
@@ -18,19 +21,33 @@ def build_headers(settings: Settings) -> dict[str, str]:
     return headers
 
 
+@traced("fetch_html")
 def fetch_html(url: str, settings: Settings, session: requests.Session | None = None) -> str:
-    client = session or requests.Session()
-    headers = build_headers(settings)
-    response = client.get(url, headers=headers, timeout=20)
-    response.raise_for_status()
+    response = _get(url, settings, session)
+    archive_page(settings, url, response.text, response.status_code)
     time.sleep(settings.request_delay_seconds)
     return response.text
 
 
+@traced("fetch_json")
 def fetch_json(url: str, settings: Settings, session: requests.Session | None = None) -> Any:
-    client = session or requests.Session()
-    headers = build_headers(settings)
-    response = client.get(url, headers=headers, timeout=20)
-    response.raise_for_status()
+    response = _get(url, settings, session)
     time.sleep(settings.request_delay_seconds)
     return response.json()
+
+
+def _get(
+    url: str, settings: Settings, session: requests.Session | None
+) -> requests.Response:
+    client = session or requests.Session()
+    headers = build_headers(settings)
+    start = time.perf_counter()
+    status = "error"
+    try:
+        response = client.get(url, headers=headers, timeout=20)
+        status = str(response.status_code)
+        response.raise_for_status()
+        return response
+    finally:
+        FETCH_SECONDS.observe(time.perf_counter() - start, status=status)
+        FETCH_TOTAL.inc(status=status)
@@ -2,43 +2,83 @@ import hashlib
 import json
 import re
 from datetime import datetime, timezone
-from typing import Any, Iterable
-
-from bs4 import BeautifulSoup
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
 
+from src.common.metrics import PARSE_SECONDS, PARSED_LISTINGS_TOTAL
 from src.common.price import parse_price_range
+from src.common.tracing import span, traced
 from src.db.database import Listing
 
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
 
-def parse_listing_cards(html: str) -> Iterable[Listing]:
-    if _is_blocked(html):
+def parse_listing_cards(html: str) -> Iterator[Listing]:
+    if is_blocked(html):
         raise ValueError("Blocked by anti-bot page. Provide cookies or try later.")
+    return _iter_listing_cards(html)
+
+
+def _iter_listing_cards(html: str) -> Iterator[Listing]:
+    # Listings are handed out as they are built; the span closes once the
+    # consumer exhausts or closes the generator.
+    with span("parse_listing_cards"):
+        yield from _parse_listings(html)
+
+
+def _parse_listings(html: str) -> Iterator[Listing]:
+    # Search pages carry the Argonaut payload, which is parsed straight from the
+    # string; the soup is only built for pages that fall back to JSON-LD or
+    # __NEXT_DATA__.
+    with PARSE_SECONDS.time(path="argonaut"):
+        items = _argonaut_items(html)
+    found = False
+    for listing in _argonaut_listings(items):
+        found = True
+        PARSED_LISTINGS_TOTAL.inc(path="argonaut")
+        yield listing
+    if found:
+        return
 
-    soup = BeautifulSoup(html, "html.parser")
-    listings: dict[str, Listing] = {}
+    from bs4 import BeautifulSoup
 
-    argonaut_listings = list(_parse_argonaut_exchange(html))
-    for listing in argonaut_listings:
+    with PARSE_SECONDS.time(path="html"), span("beautifulsoup"):
+        soup = BeautifulSoup(html, "html.parser")
+    listings: dict[str, Listing] = {}
+    with PARSE_SECONDS.time(path="json_ld"):
+        json_ld_listings = list(_parse_json_ld(soup))
+    PARSED_LISTINGS_TOTAL.inc(len(json_ld_listings), path="json_ld")
+    for listing in json_ld_listings:
         listings[listing.id] = listing
 
-    if not argonaut_listings:
-        for listing in _parse_json_ld(soup):
-            listings[listing.id] = listing
-
+    with PARSE_SECONDS.time(path="next_data"):
         next_data = _load_next_data(soup)
-        if next_data:
-            for listing in _parse_next_data(next_data):
-                listings[listing.id] = listing
+        next_data_listings = list(_parse_next_data(next_data)) if next_data else []
+    PARSED_LISTINGS_TOTAL.inc(len(next_data_listings), path="next_data")
+    for listing in next_data_listings:
+        listings[listing.id] = listing
+    del soup
+    yield from listings.values()
 
-    return list(listings.values())
+
+def _argonaut_listings(items: list[dict[str, Any]]) -> Iterator[Listing]:
+    # A listing repeated within the payload keeps its last occurrence.
+    last_index = {_argonaut_item_id(item): index for index, item in enumerate(items)}
+    for index, item in enumerate(items):
+        if last_index[_argonaut_item_id(item)] != index:
+            continue
+        listing = _listing_from_argonaut_item(item)
+        if listing:
+            yield listing
 
 
-def _is_blocked(html: str) -> bool:
+def is_blocked(html: str) -> bool:
     markers = ["Pardon Our Interruption", "Access Denied", "window.KPSDK={}", "KPSDK.now"]
     return any(marker in html for marker in markers)
 
 
-def _parse_json_ld(soup: BeautifulSoup) -> Iterable[Listing]:
+@traced("parse_json_ld")
+def _parse_json_ld(soup: "BeautifulSoup") -> Iterable[Listing]:
     listings: list[Listing] = []
     for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
         try:
@@ -52,7 +92,8 @@ def _parse_json_ld(soup: BeautifulSoup) -> Iterable[Listing]:
     return listings
 
 
-def _parse_argonaut_exchange(html: str) -> Iterable[Listing]:
+@traced("parse_argonaut_exchange")
+def _argonaut_items(html: str) -> list[dict[str, Any]]:
     marker = "window.ArgonautExchange="
     start = html.find(marker)
     if start == -1:
@@ -81,7 +122,7 @@ def _parse_argonaut_exchange(html: str) -> Iterable[Listing]:
     except json.JSONDecodeError:
         return []
 
-    listings: list[Listing] = []
+    items: list[dict[str, Any]] = []
     for entry in cache.values():
         data_str = entry.get("data") if isinstance(entry, dict) else None
         if not data_str or "buySearch" not in data_str:
@@ -93,12 +134,8 @@ def _parse_argonaut_exchange(html: str) -> Iterable[Listing]:
 
         results = data.get("buySearch", {}).get("results", {})
         exact = results.get("exact", {})
-        items = exact.get("items", [])
-        for item in items:
-            listing = _listing_from_argonaut_item(item)
-            if listing:
-                listings.append(listing)
-    return listings
+        items.extend(exact.get("items", []))
+    return items
 
 
 def _iter_jsonld_items(payload: Any) -> Iterable[dict[str, Any]]:
@@ -163,10 +200,16 @@ def _listing_from_jsonld_item(item: dict[str, Any]) -> Listing | None:
         price_max=price_max,
         property_type=item.get("@type"),
         scraped_at=now_utc_iso(),
-        raw_json=item,
+        raw_json=_encode_raw_json(item),
     )
 
 
+def _argonaut_item_id(item: Any) -> Any:
+    if isinstance(item, dict) and isinstance(item.get("listing"), dict):
+        return str(item["listing"].get("id"))
+    return None
+
+
 def _listing_from_argonaut_item(item: dict[str, Any]) -> Listing | None:
     if not isinstance(item, dict):
         return None
@@ -208,11 +251,12 @@ def _listing_from_argonaut_item(item: dict[str, Any]) -> Listing | None:
         property_type=listing.get("propertyType", {}).get("display"),
         land_size=_safe_int(_extract_land_size(sizes)),
         scraped_at=now_utc_iso(),
-        raw_json=listing,
+        raw_json=_encode_raw_json(listing),
     )
 
 
-def _load_next_data(soup: BeautifulSoup) -> dict[str, Any] | None:
+@traced("load_next_data")
+def _load_next_data(soup: "BeautifulSoup") -> dict[str, Any] | None:
     script = soup.find("script", id="__NEXT_DATA__")
     if not script or not script.string:
         return None
@@ -222,6 +266,7 @@ def _load_next_data(soup: BeautifulSoup) -> dict[str, Any] | None:
         return None
 
 
+@traced("parse_next_data")
 def _parse_next_data(data: dict[str, Any]) -> Iterable[Listing]:
     listings: list[Listing] = []
     for obj in _walk_json(data):
@@ -274,7 +319,7 @@ def _extract_candidate_listing(data: dict[str, Any]) -> Listing | None:
         land_size=_safe_int(data.get("landSize")),
         listing_status=data.get("status"),
         scraped_at=now_utc_iso(),
-        raw_json=data,
+        raw_json=_encode_raw_json(data),
     )
 
 
@@ -315,6 +360,10 @@ def _extract_land_size(sizes: dict[str, Any]) -> str | None:
     return size.get("displayValue")
 
 
+def _encode_raw_json(payload: dict[str, Any]) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
 def _safe_int(value: Any) -> int | None:
     try:
         if value is None:
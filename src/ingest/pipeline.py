@@ -3,27 +3,36 @@ import re
 
 from src.common.config import Settings, load_settings
 from src.common.logging import configure_logging
-from src.db.database import get_connection, init_db, upsert_listings
-from src.ingest.fetcher import fetch_html
+from src.common.metrics import INGEST_PAGES_TOTAL, summary_json
+from src.common.tracing import capture
+from src.db.database import init_db, upsert_listings
+from src.db.sharding import connect
+from src.jobs.matcher import match_pending_changes
 from src.ingest.parser import parse_listing_cards
 
 
 def run_ingest(seed_url: str, settings: Settings) -> int:
-    html = fetch_html(seed_url, settings)
-    listings = list(parse_listing_cards(html))
+    from src.ingest.fetcher import fetch_html
 
-    conn = get_connection(settings.db_path)
-    init_db(conn)
-    count = upsert_listings(conn, listings)
-    conn.close()
-    return count
+    try:
+        html = fetch_html(seed_url, settings)
+    except Exception:
+        INGEST_PAGES_TOTAL.inc(outcome="failed")
+        raise
+    return run_ingest_html(html, settings)
 
 
 def run_ingest_html(html: str, settings: Settings) -> int:
-    listings = list(parse_listing_cards(html))
-    conn = get_connection(settings.db_path)
+    conn = connect(settings)
     init_db(conn)
-    count = upsert_listings(conn, listings)
+    try:
+        count = upsert_listings(conn, parse_listing_cards(html))
+    except Exception:
+        INGEST_PAGES_TOTAL.inc(outcome="failed")
+        conn.close()
+        raise
+    INGEST_PAGES_TOTAL.inc(outcome="ok")
+    match_pending_changes(conn)
     conn.close()
     return count
 
@@ -61,6 +70,20 @@ def main() -> None:
         "--html-file",
         help="Path to a saved HTML search results page.",
     )
+    parser.add_argument(
+        "--html-dir",
+        help="Directory of saved HTML pages to re-ingest in bulk.",
+    )
+    parser.add_argument(
+        "--html-glob",
+        help="Glob of saved HTML pages to re-ingest in bulk (e.g. 'pages/**/*.html').",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parser processes for bulk re-ingest (defaults to CPU count).",
+    )
     parser.add_argument(
         "--pages",
         type=int,
@@ -74,12 +97,27 @@ def main() -> None:
         help="Start page number for pagination.",
     )
     args = parser.parse_args()
-    if args.html_file:
-        with open(args.html_file, "r", encoding="utf-8") as handle:
-            html = handle.read()
-        run_ingest_html(html, settings)
-    else:
-        run_ingest_pages(args.url, args.pages, args.page_start, settings)
+    try:
+        with capture("ingest", settings):
+            if args.html_dir or args.html_glob:
+                from src.ingest.bulk import bulk_ingest, find_html_pages
+
+                paths = find_html_pages(args.html_dir, args.html_glob)
+                report = bulk_ingest(paths, settings, workers=args.workers)
+                print(
+                    f"Ingested {report.pages} pages in {report.seconds:.1f}s "
+                    f"({report.pages_per_second:.1f} pages/s): "
+                    f"{report.unique_listings} listings, {len(report.blocked)} blocked, "
+                    f"{len(report.failed)} failed, {len(report.empty)} empty"
+                )
+            elif args.html_file:
+                with open(args.html_file, "r", encoding="utf-8") as handle:
+                    html = handle.read()
+                run_ingest_html(html, settings)
+            else:
+                run_ingest_pages(args.url, args.pages, args.page_start, settings)
+    finally:
+        print(summary_json())
 
 
 if __name__ == "__main__":
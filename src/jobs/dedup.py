@@ -0,0 +1,45 @@
+import argparse
+import logging
+import time
+
+from src.common.config import Settings, load_settings
+from src.common.logging import configure_logging
+from src.db.database import assign_property_ids, init_db
+from src.db.sharding import connect
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_property_ids(settings: Settings, batch_size: int = 1000) -> int:
+    conn = connect(settings)
+    init_db(conn)
+    assigned = 0
+    while True:
+        count = assign_property_ids(conn, batch_size)
+        assigned += count
+        if count < batch_size:
+            break
+    conn.close()
+    return assigned
+
+
+def main() -> None:
+    configure_logging()
+    settings = load_settings()
+    parser = argparse.ArgumentParser(
+        description="Cluster stored listings that have no property_id yet."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Listings per transaction.",
+    )
+    args = parser.parse_args()
+    start = time.perf_counter()
+    assigned = backfill_property_ids(settings, args.batch_size)
+    print(f"Assigned property ids to {assigned} listings in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import logging
+import sqlite3
+import time
+
+from src.common.config import Settings, load_settings
+from src.common.logging import configure_logging
+from src.db.database import (
+    archive_delisted,
+    enable_incremental_vacuum,
+    init_db,
+    optimize_database,
+    prune_full_crawls,
+)
+from src.db.sharding import ShardedConnection, connect
+
+logger = logging.getLogger(__name__)
+
+
+def run_lifecycle(settings: Settings, batch_size: int = 500, vacuum: bool = False) -> int:
+    conn = connect(settings)
+    init_db(conn)
+    if isinstance(conn, ShardedConnection):
+        primary = conn.catalog
+        databases = [primary, *(conn.shard(name) for name in conn.shard_names())]
+    else:
+        primary = conn
+        databases = [conn]
+    try:
+        archived = sum(
+            archive_delisted(db, settings.delist_after_crawls, batch_size, queue=primary)
+            for db in databases
+        )
+        prune_full_crawls(primary, settings.delist_after_crawls)
+        freed = 0
+        for db in databases:
+            if vacuum and enable_incremental_vacuum(db):
+                logger.info("Rebuilt %s with incremental auto-vacuum", _database_file(db))
+            freed += optimize_database(db)
+    finally:
+        conn.close()
+    logger.info("Archived %s delisted listings, freed %s pages", archived, freed)
+    return archived
+
+
+def _database_file(conn: sqlite3.Connection) -> str:
+    for row in conn.execute("PRAGMA database_list"):
+        if row["name"] == "main":
+            return row["file"] or ":memory:"
+    return "?"
+
+
+def main() -> None:
+    configure_logging()
+    settings = load_settings()
+    parser = argparse.ArgumentParser(
+        description="Archive delisted listings and run database maintenance."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=500,
+        help="Listings moved to the archive per transaction.",
+    )
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help=(
+            "Rebuild databases created without incremental auto-vacuum so freed "
+            "pages can be returned to the filesystem. Locks the database while it runs."
+        ),
+    )
+    args = parser.parse_args()
+    start = time.perf_counter()
+    archived = run_lifecycle(settings, args.batch_size, args.vacuum)
+    print(f"Archived {archived} delisted listings in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import json
+import logging
+import sqlite3
+from datetime import datetime, timezone
+
+from src.common.percolator import Percolator, compile_search
+from src.db.database import (
+    get_change_cursor,
+    latest_change_seq,
+    list_saved_searches,
+    neighbour_radius_limit,
+    neighbours_within,
+    prune_listing_changes,
+    queue_notifications,
+    read_listing_changes,
+    set_change_cursor,
+)
+from src.db.sharding import ShardedConnection
+
+logger = logging.getLogger(__name__)
+
+CONSUMER = "notifications"
+
+
+def build_percolator(
+    conn: sqlite3.Connection | ShardedConnection, saved: list | None = None
+) -> Percolator:
+    if saved is None:
+        saved = list_saved_searches(conn)
+
+    radius_limit = neighbour_radius_limit(conn)
+
+    def neighbours(suburb: str, radius_km: float) -> list[str]:
+        return neighbours_within(conn, suburb, radius_km)
+
+    searches = []
+    for row in saved:
+        criteria = parse_criteria(row["criteria_json"])
+        radius_km = criteria.get("radius_km")
+        if radius_km and radius_limit is not None and float(radius_km) > radius_limit:
+            logger.warning(
+                "Saved search %s uses a %s km radius but neighbours are only stored "
+                "up to %s km; matching within %s km",
+                row["id"],
+                radius_km,
+                radius_limit,
+                radius_limit,
+            )
+        searches.append(compile_search(row["id"], criteria, None, neighbours))
+    return Percolator(searches)
+
+
+def match_pending_changes(
+    conn: sqlite3.Connection | ShardedConnection, batch_size: int = 1000
+) -> int:
+    percolator = build_percolator(conn)
+    if isinstance(conn, ShardedConnection):
+        # Every shard keeps its own change log, so each one has its own cursor
+        # in the catalog next to the queue the matches go to.
+        queued = sum(
+            _match_changes(conn.shard(name), conn, f"{CONSUMER}:{name}", percolator, batch_size)
+            for name in conn.shard_names()
+        )
+    else:
+        queued = _match_changes(conn, conn, CONSUMER, percolator, batch_size)
+    if queued:
+        logger.info("Queued %s saved-search matches", queued)
+    return queued
+
+
+def _match_changes(
+    source: sqlite3.Connection,
+    conn: sqlite3.Connection | ShardedConnection,
+    consumer: str,
+    percolator: Percolator,
+    batch_size: int,
+) -> int:
+    cursor = get_change_cursor(conn, consumer)
+    queued = 0
+    if not len(percolator):
+        cursor = max(cursor, latest_change_seq(source))
+        set_change_cursor(conn, consumer, cursor)
+        conn.commit()
+    else:
+        while True:
+            changes = read_listing_changes(source, cursor, batch_size)
+            if not changes:
+                break
+            now = datetime.now(timezone.utc).isoformat()
+            matches = [
+                (search_id, change["listing_id"])
+                for change in changes
+                if change["id"] is not None
+                for search_id in percolator.match(change)
+            ]
+            queued += queue_notifications(conn, matches, now)
+            cursor = changes[-1]["seq"]
+            set_change_cursor(conn, consumer, cursor)
+            conn.commit()
+    # A shard's log is read by this consumer alone, so it can be pruned up to
+    # its cursor; the primary database prunes behind its slowest consumer.
+    prune_listing_changes(source, cursor if source is not conn else None)
+    source.commit()
+    return queued
+
+
+def parse_criteria(payload: str) -> dict:
+    try:
+        data = json.loads(payload)
+        if isinstance(data, dict):
+            return data
+    except json.JSONDecodeError:
+        pass
+    return {}
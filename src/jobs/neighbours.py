@@ -0,0 +1,43 @@
+import argparse
+import logging
+import sqlite3
+
+from src.common.config import Settings, load_settings
+from src.common.gazetteer import get_gazetteer
+from src.common.logging import configure_logging
+from src.db.database import get_connection, init_db, sync_suburb_neighbours
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_suburb_neighbours(
+    conn: sqlite3.Connection, settings: Settings, full: bool = False
+) -> int:
+    profiles = get_gazetteer(settings).profiles
+    written = sync_suburb_neighbours(
+        conn, profiles, settings.neighbour_max_radius_km, full=full
+    )
+    if written:
+        logger.info("Wrote %s suburb neighbour rows", written)
+    return written
+
+
+def main() -> None:
+    configure_logging()
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="Build the suburb neighbourhood table.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rebuild every suburb instead of only those whose profile changed.",
+    )
+    args = parser.parse_args()
+    conn = get_connection(settings.db_path)
+    init_db(conn)
+    written = refresh_suburb_neighbours(conn, settings, full=args.full)
+    conn.close()
+    print(f"Wrote {written} neighbour rows (max radius {settings.neighbour_max_radius_km} km)")
+
+
+if __name__ == "__main__":
+    main()
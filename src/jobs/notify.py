@@ -1,60 +1,221 @@
-import json
+import argparse
+import logging
+import os
+import socket
+import sqlite3
 import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
+from functools import partial
 
-from apscheduler.schedulers.background import BackgroundScheduler
-
-from src.common.config import load_settings
-from src.common.emailer import send_email
+from src.common.config import Settings, load_settings
+from src.common.dedup import collapse_duplicates
+from src.common.emailer import OutgoingEmail, max_delivery_seconds, send_emails
 from src.common.logging import configure_logging
+from src.common.metrics import summary_json
 from src.db.database import (
-    get_connection,
+    claim_due_searches,
+    clear_pending_notifications,
+    complete_saved_search,
     init_db,
-    list_saved_searches,
-    query_listings,
-    update_saved_search_last_run,
+    iter_listings_since,
+    pending_notifications,
+    renew_claims,
 )
+from src.db.sharding import ShardedConnection, connect
+from src.jobs.matcher import build_percolator, match_pending_changes, parse_criteria
+from src.jobs.neighbours import refresh_suburb_neighbours
+from src.jobs.schedule import CLAIM_LEASE, RETRY_DELAY, next_run_after
+
+logger = logging.getLogger(__name__)
 
 
 def run_saved_searches() -> None:
     settings = load_settings()
-    conn = get_connection(settings.db_path)
+    run_notification_tick(settings)
+
+
+def run_notification_tick(settings: Settings, workers: int = 1) -> int:
+    prepare_notifications(settings)
+    if workers <= 1:
+        return process_due_searches(settings)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return sum(
+            executor.map(
+                partial(process_due_searches, settings, shards=workers), range(workers)
+            )
+        )
+
+
+def prepare_notifications(settings: Settings) -> None:
+    conn = connect(settings)
     init_db(conn)
-    now = datetime.now(timezone.utc).isoformat()
-    saved = list_saved_searches(conn)
-    for row in saved:
-        criteria = _parse_criteria(row["criteria_json"])
-        rows = query_listings(
+    refresh_suburb_neighbours(conn, settings)
+    match_pending_changes(conn)
+    conn.close()
+
+
+def process_due_searches(
+    settings: Settings, shard: int = 0, shards: int = 1, batch_size: int = 200
+) -> int:
+    worker = f"{socket.gethostname()}:{os.getpid()}:{shard}"
+    conn = connect(settings)
+    processed = 0
+    while True:
+        now = datetime.now(timezone.utc)
+        claimed = claim_due_searches(
             conn,
-            suburb=criteria.get("suburb"),
-            suburbs=criteria.get("suburbs"),
-            min_price=criteria.get("min_price"),
-            max_price=criteria.get("max_price"),
-            bedrooms=criteria.get("bedrooms"),
-            property_type=criteria.get("property_type"),
-            since=row["last_run_at"],
-            limit=50,
+            worker,
+            now.isoformat(),
+            (now + CLAIM_LEASE).isoformat(),
+            batch_size,
+            shard=shard,
+            shards=shards,
+        )
+        if not claimed:
+            break
+        _notify_claimed(conn, settings, worker, claimed, now)
+        processed += len(claimed)
+    conn.close()
+    if processed:
+        logger.info(
+            "Worker %s processed %s saved searches: %s", worker, processed, summary_json()
         )
+    return processed
+
+
+def _notify_claimed(
+    conn: sqlite3.Connection | ShardedConnection,
+    settings: Settings,
+    worker: str,
+    claimed: list[sqlite3.Row],
+    now: datetime,
+) -> None:
+    run_at = now.isoformat()
+    schedules = {row["id"]: row["schedule"] for row in claimed}
+
+    sent_rows: dict[int, list[sqlite3.Row]] = {}
+
+    def finish(search_id: int) -> None:
+        clear_pending_notifications(conn, search_id, sent_rows.get(search_id, []), run_at)
+        next_run = next_run_after(search_id, schedules[search_id], now)
+        complete_saved_search(conn, search_id, worker, run_at, next_run.isoformat())
+
+    def retry_later(search_id: int) -> None:
+        # The queue and last_run_at are left alone so the retry sends the same matches.
+        complete_saved_search(
+            conn, search_id, worker, None, (now + RETRY_DELAY).isoformat()
+        )
+
+    backfill = _backfill_new_searches(
+        conn, [row for row in claimed if row["last_run_at"] is None]
+    )
+    outgoing: list[OutgoingEmail] = []
+    for row in claimed:
+        criteria = parse_criteria(row["criteria_json"])
+        if row["last_run_at"] is None:
+            rows = backfill.get(row["id"], [])
+        else:
+            rows = pending_notifications(conn, row["id"], limit=50)
         if rows:
-            body = _format_listing_email(rows, criteria)
-            try:
-                send_email(
-                    settings,
-                    row["email"],
-                    f"PropertyHunter matches: {row['name']}",
-                    body,
+            sent_rows[row["id"]] = rows
+            outgoing.append(
+                OutgoingEmail(
+                    to_address=row["email"],
+                    subject=f"PropertyHunter matches: {row['name']}",
+                    body=_format_listing_email(rows, criteria),
+                    key=row["id"],
                 )
-            except Exception as exc:
-                print(f"Email failed for search {row['id']}: {exc}")
-        update_saved_search_last_run(conn, row["id"], now)
-    conn.close()
+            )
+        else:
+            finish(row["id"])
+    # Each batch is renewed right before it is sent and is small enough to
+    # finish within the lease, so a batch never goes out twice.
+    batch_size = _emails_per_lease(settings)
+    for start in range(0, len(outgoing), batch_size):
+        batch = outgoing[start : start + batch_size]
+        held = renew_claims(
+            conn,
+            [email.key for email in batch],
+            worker,
+            (datetime.now(timezone.utc) + CLAIM_LEASE).isoformat(),
+        )
+        lost = [email.key for email in batch if email.key not in held]
+        if lost:
+            logger.warning("Lost the claim on saved searches %s, not sending", lost)
+        batch = [email for email in batch if email.key in held]
+        if not batch:
+            continue
+        try:
+            report = send_emails(settings, batch)
+        except ValueError as exc:
+            logger.warning("Notification emails not sent: %s", exc)
+            for email in outgoing[start:]:
+                retry_later(email.key)
+            return
+        for search_id in report.sent:
+            finish(search_id)
+        for search_id, error in report.failed.items():
+            logger.warning("Email failed for search %s: %s", search_id, error)
+            retry_later(search_id)
+
+
+def _emails_per_lease(settings: Settings) -> int:
+    workers = max(1, settings.smtp_pool_size)
+    rounds = int(CLAIM_LEASE.total_seconds() // max_delivery_seconds(settings))
+    return workers * max(1, rounds)
 
 
 def main() -> None:
     configure_logging()
-    _ = load_settings()
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="Send saved-search notifications.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.notify_workers,
+        help="Worker processes; due searches are sharded across them by id.",
+    )
+    parser.add_argument(
+        "--poll-minutes",
+        type=float,
+        default=settings.notify_poll_minutes,
+        help="How often to look for searches that have come due.",
+    )
+    args = parser.parse_args()
+
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    from src.jobs.lifecycle import run_lifecycle
+    from src.jobs.refresh import run_refresh
+
     scheduler = BackgroundScheduler()
-    scheduler.add_job(run_saved_searches, "interval", hours=24)
+    scheduler.add_job(
+        run_notification_tick,
+        "interval",
+        minutes=args.poll_minutes,
+        args=[settings, args.workers],
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.now(timezone.utc),
+    )
+    scheduler.add_job(
+        run_refresh,
+        "interval",
+        minutes=settings.refresh_interval_minutes,
+        args=[settings],
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.now(timezone.utc),
+    )
+    scheduler.add_job(
+        run_lifecycle,
+        "interval",
+        hours=settings.lifecycle_interval_hours,
+        args=[settings],
+        max_instances=1,
+        coalesce=True,
+    )
     scheduler.start()
 
     try:
@@ -64,14 +225,15 @@ def main() -> None:
         scheduler.shutdown()
 
 
-def _parse_criteria(payload: str) -> dict:
-    try:
-        data = json.loads(payload)
-        if isinstance(data, dict):
-            return data
-    except json.JSONDecodeError:
-        pass
-    return {}
+def _backfill_new_searches(
+    conn: sqlite3.Connection | ShardedConnection, saved: list
+) -> dict[int, list]:
+    # A search that has never run has no queue history yet, so it gets one
+    # pass over the current table instead.
+    if not saved:
+        return {}
+    matches = build_percolator(conn, saved).collect(iter_listings_since(conn, None), limit=50)
+    return {search_id: collapse_duplicates(rows) for search_id, rows in matches.items()}
 
 
 def _format_listing_email(rows: list, criteria: dict) -> str:
@@ -79,6 +241,7 @@ def _format_listing_email(rows: list, criteria: dict) -> str:
         "PropertyHunter matches",
         "",
         f"Suburb: {criteria.get('suburb') or 'any'}",
+        f"Radius: {criteria.get('radius_km') or 'n/a'} km",
         f"Min price: {criteria.get('min_price') or 'any'}",
         f"Max price: {criteria.get('max_price') or 'any'}",
         f"Bedrooms: {criteria.get('bedrooms') or 'any'}",
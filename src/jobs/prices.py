@@ -0,0 +1,58 @@
+import argparse
+import logging
+import time
+
+from src.common.config import Settings, load_settings
+from src.common.logging import configure_logging
+from src.common.price import parse_price_range
+from src.db.database import (
+    apply_price_backfill,
+    clear_unpriced_listings,
+    distinct_price_texts,
+    init_db,
+    rebuild_listing_facets,
+)
+from src.db.sharding import connect
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_prices(settings: Settings, batch_size: int = 5000) -> tuple[int, int]:
+    conn = connect(settings)
+    init_db(conn)
+    texts = distinct_price_texts(conn)
+    updated = clear_unpriced_listings(conn)
+    for offset in range(0, len(texts), batch_size):
+        batch = texts[offset : offset + batch_size]
+        updated += apply_price_backfill(
+            conn, [(text, *parse_price_range(text)) for text in batch]
+        )
+    if updated:
+        rebuild_listing_facets(conn)
+    conn.close()
+    return len(texts), updated
+
+
+def main() -> None:
+    configure_logging()
+    settings = load_settings()
+    parser = argparse.ArgumentParser(
+        description="Re-derive price_min/price_max for stored listings from price_text."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=5000,
+        help="Distinct price strings per transaction.",
+    )
+    args = parser.parse_args()
+    start = time.perf_counter()
+    distinct, updated = backfill_prices(settings, args.batch_size)
+    print(
+        f"Parsed {distinct} distinct price strings, updated {updated} listings "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
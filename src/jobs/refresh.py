@@ -0,0 +1,314 @@
+import argparse
+import logging
+import math
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+from urllib.parse import quote
+
+from src.common.config import Settings, load_settings
+from src.common.gazetteer import Gazetteer, get_gazetteer, state_for_postcode
+from src.common.logging import configure_logging
+from src.common.metrics import INGEST_PAGES_TOTAL
+from src.db.database import (
+    init_db,
+    last_full_crawls,
+    list_saved_searches,
+    list_suburb_crawls,
+    record_full_crawl,
+    record_suburb_crawl,
+    refresh_candidates,
+    upsert_listings_with_result,
+)
+from src.db.sharding import ShardedConnection, connect
+from src.ingest.parser import is_blocked, parse_listing_cards
+from src.jobs.matcher import match_pending_changes, parse_criteria
+from src.jobs.schedule import parse_timestamp
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+SEARCH_BASE_URL = "https://www.realestate.com.au/buy"
+CHURN_SMOOTHING = 0.3
+MIN_CHURN_PER_HOUR = 0.05
+MIN_EXPECTED_CHANGES = 0.5
+MIN_OBSERVATION_HOURS = 0.25
+# Before a suburb has been crawled twice, assume its listings turn over
+# roughly once every four weeks.
+PRIOR_LISTING_LIFETIME_HOURS = 28 * 24
+BLOCKED_STATUSES = {401, 403, 429}
+# Delisting needs crawls that read a suburb to the end, so once a day a crawl
+# keeps going past pages with nothing new.
+FULL_CRAWL_INTERVAL = timedelta(days=1)
+
+
+@dataclass(frozen=True)
+class PlannedCrawl:
+    suburb: str
+    url: str
+    expected_changes: float
+    expected_requests: float
+
+    @property
+    def score(self) -> float:
+        return self.expected_changes / max(self.expected_requests, 1.0)
+
+
+@dataclass(frozen=True)
+class CrawlResult:
+    suburb: str
+    requests: int
+    listings: int
+    changes: int
+    started_at: str
+    complete: bool
+    blocked: bool = False
+
+
+def plan_refresh(
+    conn: sqlite3.Connection | ShardedConnection,
+    settings: Settings,
+    now: datetime,
+    budget: int,
+    gazetteer: Gazetteer | None = None,
+) -> list[PlannedCrawl]:
+    gazetteer = gazetteer or get_gazetteer(settings)
+    crawls = list_suburb_crawls(conn)
+    candidates = refresh_candidates(conn)
+    for row in list_saved_searches(conn):
+        criteria = parse_criteria(row["criteria_json"])
+        for suburb in [criteria.get("suburb"), *(criteria.get("suburbs") or [])]:
+            if suburb:
+                candidates.setdefault(suburb, 0)
+
+    fresh: list[tuple[int, PlannedCrawl]] = []
+    stale: list[PlannedCrawl] = []
+    seen: set[str] = set()
+    for suburb, listings in candidates.items():
+        name = gazetteer.canonical(suburb) or suburb
+        if name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        url = suburb_search_url(name, gazetteer)
+        crawl = crawls.get(name.lower())
+        if crawl is None:
+            fresh.append((listings, PlannedCrawl(name, url, math.inf, 1.0)))
+            continue
+        last = parse_timestamp(crawl["last_crawled_at"])
+        if last is None:
+            hours = float(PRIOR_LISTING_LIFETIME_HOURS)
+        else:
+            hours = (now - last).total_seconds() / 3600
+        expected = max(crawl["churn_per_hour"], MIN_CHURN_PER_HOUR) * hours
+        if expected >= MIN_EXPECTED_CHANGES:
+            stale.append(PlannedCrawl(name, url, expected, crawl["requests_per_crawl"]))
+
+    # Never-crawled suburbs go first, busiest first; the rest are ranked by
+    # expected fresh changes per request.
+    fresh.sort(key=lambda item: (-item[0], item[1].suburb))
+    stale.sort(key=lambda planned: (-planned.score, planned.suburb))
+    plan: list[PlannedCrawl] = []
+    spent = 0.0
+    for planned in [planned for _, planned in fresh] + stale:
+        cost = min(float(settings.refresh_max_pages), max(1.0, planned.expected_requests))
+        if spent + cost > budget:
+            continue
+        plan.append(planned)
+        spent += cost
+    return plan
+
+
+def suburb_search_url(suburb: str, gazetteer: Gazetteer, page: int = 1) -> str:
+    slug = quote(suburb.lower().replace(" ", "+"), safe="+-'")
+    postcodes = sorted(gazetteer.postcodes(suburb))
+    state = state_for_postcode(postcodes[0]) if postcodes else ""
+    if not state:
+        state = next(iter(sorted(gazetteer.states(suburb))), "")
+    location = slug
+    if state:
+        location += f",+{state.lower()}"
+    if postcodes:
+        location += f"+{postcodes[0]}"
+    return f"{SEARCH_BASE_URL}/in-{location}/list-{page}?includeSurrounding=false"
+
+
+def crawl_suburb(
+    conn: sqlite3.Connection | ShardedConnection,
+    settings: Settings,
+    planned: PlannedCrawl,
+    pace: "RequestPacer",
+    session: "requests.Session | None" = None,
+    full: bool = False,
+) -> CrawlResult:
+    from src.ingest.fetcher import fetch_html
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    requests_made = 0
+    listings_seen = 0
+    changes = 0
+    complete = False
+    blocked = False
+    for page in range(1, settings.refresh_max_pages + 1):
+        pace.wait()
+        url = re.sub(r"/list-\d+", f"/list-{page}", planned.url, count=1)
+        requests_made += 1
+        try:
+            html = fetch_html(url, settings, session)
+            if is_blocked(html):
+                INGEST_PAGES_TOTAL.inc(outcome="blocked")
+                blocked = True
+                break
+            result = upsert_listings_with_result(conn, parse_listing_cards(html))
+        except Exception:
+            INGEST_PAGES_TOTAL.inc(outcome="failed")
+            raise
+        INGEST_PAGES_TOTAL.inc(outcome="ok")
+        if not result.rows:
+            # An empty first page is as likely a block or a layout change as an
+            # empty suburb, so only a run that found listings counts as complete.
+            complete = listings_seen > 0
+            break
+        listings_seen += result.rows
+        page_changes = len(result.new_ids) + len(result.changed_ids)
+        changes += page_changes
+        # Pages are newest-first, so a page with nothing new means the rest
+        # of the result set is unlikely to pay for its request.
+        if not page_changes and not full:
+            break
+    return CrawlResult(
+        planned.suburb, requests_made, listings_seen, changes, started_at, complete, blocked
+    )
+
+
+class RequestPacer:
+    def __init__(self, requests_per_hour: int) -> None:
+        self.interval = 3600.0 / max(1, requests_per_hour)
+        self._next = time.monotonic()
+
+    def wait(self) -> None:
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next, time.monotonic()) + self.interval
+
+
+def record_crawl(
+    conn: sqlite3.Connection | ShardedConnection,
+    result: CrawlResult,
+    previous: sqlite3.Row | None,
+    now: datetime,
+) -> None:
+    if previous is None:
+        churn = result.listings / PRIOR_LISTING_LIFETIME_HOURS
+        requests_per_crawl = float(result.requests)
+    else:
+        last = parse_timestamp(previous["last_crawled_at"]) or now
+        hours = max((now - last).total_seconds() / 3600, MIN_OBSERVATION_HOURS)
+        churn = _smooth(previous["churn_per_hour"], result.changes / hours)
+        requests_per_crawl = _smooth(previous["requests_per_crawl"], result.requests)
+    record_suburb_crawl(
+        conn,
+        result.suburb,
+        now.isoformat(),
+        churn,
+        requests_per_crawl,
+        result.changes,
+        result.listings,
+    )
+    if result.complete:
+        record_full_crawl(conn, result.suburb, result.started_at)
+
+
+def _full_crawl_due(last_started_at: str | None) -> bool:
+    last = parse_timestamp(last_started_at)
+    return last is None or datetime.now(timezone.utc) - last >= FULL_CRAWL_INTERVAL
+
+
+def _smooth(previous: float, observed: float) -> float:
+    return CHURN_SMOOTHING * observed + (1 - CHURN_SMOOTHING) * previous
+
+
+def run_refresh(settings: Settings) -> int:
+    import requests
+
+    budget = int(settings.refresh_requests_per_hour * settings.refresh_interval_minutes / 60)
+    conn = connect(settings)
+    init_db(conn)
+    plan = plan_refresh(conn, settings, datetime.now(timezone.utc), budget)
+    crawls = list_suburb_crawls(conn)
+    full_crawls = last_full_crawls(conn)
+    pace = RequestPacer(settings.refresh_requests_per_hour)
+    session = requests.Session()
+    changes = 0
+    requests_made = 0
+    crawled = 0
+    for planned in plan:
+        try:
+            full = _full_crawl_due(full_crawls.get(planned.suburb.lower()))
+            result = crawl_suburb(conn, settings, planned, pace, session, full)
+        except requests.HTTPError as exc:
+            status = exc.response.status_code if exc.response is not None else None
+            if status in BLOCKED_STATUSES:
+                logger.warning("Refresh stopped, %s returned %s", planned.url, status)
+                break
+            logger.warning("Refresh of %s failed: %s", planned.suburb, exc)
+            continue
+        except Exception as exc:
+            logger.warning("Refresh of %s failed: %s", planned.suburb, exc)
+            continue
+        changes += result.changes
+        requests_made += result.requests
+        if result.blocked:
+            # Every later request would hit the same anti-bot page.
+            logger.warning("Refresh stopped, %s returned an anti-bot page", planned.url)
+            break
+        record_crawl(
+            conn, result, crawls.get(planned.suburb.lower()), datetime.now(timezone.utc)
+        )
+        crawled += 1
+    if changes:
+        match_pending_changes(conn)
+    conn.close()
+    logger.info(
+        "Refreshed %s of %s planned suburbs with %s requests (budget %s), "
+        "%s new or changed listings",
+        crawled,
+        len(plan),
+        requests_made,
+        budget,
+        changes,
+    )
+    return changes
+
+
+def main() -> None:
+    configure_logging()
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="Refresh suburbs by expected churn.")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the crawl plan for the next interval without fetching.",
+    )
+    args = parser.parse_args()
+    if not args.dry_run:
+        run_refresh(settings)
+        return
+    budget = int(settings.refresh_requests_per_hour * settings.refresh_interval_minutes / 60)
+    conn = connect(settings)
+    init_db(conn)
+    plan = plan_refresh(conn, settings, datetime.now(timezone.utc), budget)
+    conn.close()
+    for planned in plan:
+        expected = planned.expected_changes
+        label = "new" if math.isinf(expected) else f"{expected:.1f}"
+        print(f"{planned.suburb}\t{label}\t{planned.expected_requests:.1f}\t{planned.url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import logging
+import time
+
+from src.common.config import Settings, load_settings
+from src.common.logging import configure_logging
+from src.db.database import init_db
+from src.db.sharding import connect
+
+logger = logging.getLogger(__name__)
+
+
+def reshard_listings(settings: Settings, batch_size: int = 1000) -> int:
+    if not settings.shard_dir:
+        raise ValueError("SHARD_DIR is not set, so there are no shards to move listings into.")
+    conn = connect(settings)
+    try:
+        init_db(conn)
+        return conn.reshard_primary_listings(batch_size)
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    configure_logging()
+    settings = load_settings()
+    parser = argparse.ArgumentParser(
+        description="Move listings stored in the primary database into the state shards."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Listings moved per transaction.",
+    )
+    args = parser.parse_args()
+    if not settings.shard_dir:
+        parser.error("Set SHARD_DIR to the shard directory first.")
+    start = time.perf_counter()
+    moved = reshard_listings(settings, args.batch_size)
+    print(f"Moved {moved} listings into shards in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
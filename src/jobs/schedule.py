@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+
+SCHEDULE_INTERVALS = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+}
+DEFAULT_SCHEDULE = "daily"
+CLAIM_LEASE = timedelta(minutes=15)
+RETRY_DELAY = timedelta(minutes=30)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Fractional part of the golden ratio: consecutive ids land far apart in the
+# window, so slots stay evenly spread however many searches exist.
+_SPREAD = 0.6180339887498949
+
+
+def schedule_interval(schedule: str | None) -> timedelta:
+    key = (schedule or DEFAULT_SCHEDULE).strip().lower()
+    return SCHEDULE_INTERVALS.get(key, SCHEDULE_INTERVALS[DEFAULT_SCHEDULE])
+
+
+def slot_offset(search_id: int, interval: timedelta) -> timedelta:
+    fraction = (search_id * _SPREAD) % 1.0
+    return timedelta(seconds=int(fraction * interval.total_seconds()))
+
+
+def next_run_after(search_id: int, schedule: str | None, last_run: datetime) -> datetime:
+    interval = schedule_interval(schedule)
+    offset = slot_offset(search_id, interval)
+    earliest = last_run + interval / 2
+    periods = (earliest - EPOCH - offset) // interval
+    candidate = EPOCH + offset + periods * interval
+    if candidate < earliest:
+        candidate += interval
+    return candidate
+
+
+def parse_timestamp(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
@@ -1,7 +1,11 @@
 import json
 import re
+import sqlite3
 import sys
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
 
 repo_root = Path(__file__).resolve().parents[2]
 if str(repo_root) not in sys.path:
@@ -9,21 +13,20 @@ if str(repo_root) not in sys.path:
 
 import streamlit as st
 
-from src.common.config import load_settings
-from src.common.criteria import SearchCriteria, parse_search_query
-from src.common.emailer import send_email
-from src.common.suburb_profiles import (
-    load_profiles,
-    suburb_distance_map,
-    suburbs_within_radius,
-)
+from src.common.config import Settings, load_settings
+from src.common.criteria import SearchCriteria, parse_search_query, resolve_suburb
+from src.common.gazetteer import Gazetteer, get_gazetteer
 from src.db.database import (
+    facet_counts,
     get_connection,
     init_db,
     list_saved_searches,
+    neighbour_distances,
+    neighbour_radius_limit,
     query_listings,
     save_search,
 )
+from src.db.sharding import ShardedConnection
 
 
 def main() -> None:
@@ -43,7 +46,25 @@ def main() -> None:
         max_price = st.number_input("Max price", min_value=0, step=10000)
         bedrooms = st.number_input("Bedrooms (min)", min_value=0, step=1)
         property_type = st.text_input("Property type")
-        limit = st.slider("Results limit", min_value=10, max_value=200, value=50)
+        limit = st.slider("Results limit", min_value=10, max_value=1000, value=50)
+        sort = st.selectbox(
+            "Sort by",
+            ["newest", "relevance"],
+            format_func=lambda mode: "Best match" if mode == "relevance" else "Newest",
+        )
+        collapse = st.checkbox(
+            "Hide duplicate listings",
+            value=True,
+            help="Show one listing per property when it is listed more than once.",
+        )
+        if suburb:
+            suburb_match = resolve_suburb(suburb)
+            if suburb_match and suburb_match.name != suburb:
+                st.caption(
+                    f"Using {suburb_match.name} for \"{suburb}\" "
+                    f"({suburb_match.score:.0%} match)"
+                )
+                suburb = suburb_match.name
 
     query_text = st.text_input(
         "Describe what you want",
@@ -53,12 +74,21 @@ def main() -> None:
     use_manual = st.button("Search with filters")
     profiles_only = st.checkbox("Show suburb profiles only (skip listings)")
 
-    parsed_criteria: SearchCriteria | None = None
-    nearby_suburbs: list[str] | None = None
-    suburb_distances: dict[str, float] = {}
-    profiles = []
     if use_query and query_text:
-        parsed_criteria = parse_search_query(query_text)
+        st.session_state["search_mode"] = "query"
+        st.session_state["search_query"] = query_text
+    elif use_manual:
+        st.session_state["search_mode"] = "manual"
+    # Streamlit reruns the script on every widget change, so the active search is
+    # remembered in the session rather than tied to the button press.
+    search_mode = st.session_state.get("search_mode")
+    if not search_mode:
+        return
+
+    parsed_criteria: SearchCriteria | None = None
+    if search_mode == "query":
+        query_text = st.session_state["search_query"]
+        parsed_criteria = _parse_query(query_text)
         suburb = parsed_criteria.suburb or suburb
         min_price = parsed_criteria.min_price or min_price
         max_price = parsed_criteria.max_price or max_price
@@ -66,128 +96,259 @@ def main() -> None:
         property_type = parsed_criteria.property_type or property_type
         if parsed_criteria.radius_km:
             radius_km = parsed_criteria.radius_km
-        if parsed_criteria.radius_km and parsed_criteria.suburb:
-            profiles = load_profiles()
-            matches = suburbs_within_radius(
-                parsed_criteria.suburb, parsed_criteria.radius_km, profiles
-            )
-            nearby_suburbs = [profile.suburb for profile in matches]
-            suburb_distances = suburb_distance_map(parsed_criteria.suburb, profiles)
         st.caption(
             f"Parsed: suburb={suburb}, min_price={min_price}, max_price={max_price}, "
             f"bedrooms={bedrooms}, property_type={property_type}"
         )
+        if parsed_criteria.suburb_confidence is not None and parsed_criteria.suburb_confidence < 1:
+            st.caption(
+                f"Suburb matched approximately ({parsed_criteria.suburb_confidence:.0%})."
+            )
 
-    if use_query or use_manual:
-        settings = load_settings()
-        conn = get_connection(settings.db_path)
-        init_db(conn)
-        if not nearby_suburbs and suburb and radius_km and radius_km > 0:
-            if not profiles:
-                profiles = load_profiles()
-            matches = suburbs_within_radius(suburb, radius_km, profiles)
-            nearby_suburbs = [profile.suburb for profile in matches]
-            suburb_distances = suburb_distance_map(suburb, profiles)
-        if suburb:
-            if not profiles:
-                profiles = load_profiles()
-            center_profile = next(
-                (profile for profile in profiles if profile.suburb == suburb), None
+    settings = _connection()[0]
+    with _db() as conn:
+        radius_limit = neighbour_radius_limit(conn)
+    if suburb and radius_km and radius_limit is not None and radius_km > radius_limit:
+        st.warning(
+            f"Nearby suburbs are only stored up to {radius_limit:g} km, "
+            f"so the search uses {radius_limit:g} km instead of {radius_km:g} km."
+        )
+        radius_km = radius_limit
+    nearby: list[dict] = []
+    suburb_distances: dict[str, float] = {}
+    if suburb and radius_km and radius_km > 0:
+        nearby, suburb_distances = _nearby_suburbs(suburb, float(radius_km))
+    if suburb:
+        center_profile = _gazetteer().profile(suburb)
+        if center_profile:
+            st.subheader("Suburb profile")
+            st.markdown(
+                f"- **{center_profile.suburb}** ({center_profile.state})\n"
+                f"  Median price: {center_profile.median_price or 'n/a'}, "
+                f"Median rent: {center_profile.median_rent or 'n/a'}"
             )
-            if center_profile:
-                st.subheader("Suburb profile")
-                st.markdown(
-                    f"- **{center_profile.suburb}** ({center_profile.state})\n"
-                    f"  Median price: {center_profile.median_price or 'n/a'}, "
-                    f"Median rent: {center_profile.median_rent or 'n/a'}"
-                )
 
-        if nearby_suburbs:
-            st.subheader("Nearby suburbs")
-            if not profiles:
-                profiles = load_profiles()
-            nearby_profiles = [
-                profile for profile in profiles if profile.suburb in nearby_suburbs
-            ]
-            st.caption(f"{len(nearby_profiles)} suburbs within radius")
-            for profile in nearby_profiles:
-                distance = suburb_distances.get(profile.suburb)
-                distance_label = f"{distance:.1f} km" if distance is not None else "n/a"
-                st.markdown(
-                    f"- **{profile.suburb}** ({profile.state}) — {distance_label}\n"
-                    f"  Median price: {profile.median_price or 'n/a'}, "
-                    f"Median rent: {profile.median_rent or 'n/a'}"
-                )
+    if nearby:
+        st.subheader("Nearby suburbs")
+        st.caption(f"{len(nearby)} suburbs within radius")
+        st.dataframe(nearby, use_container_width=True, hide_index=True)
 
-        if not profiles_only:
-            rows = query_listings(
-                conn,
-                suburb=suburb or None,
-                suburbs=nearby_suburbs,
-                min_price=min_price or None,
-                max_price=max_price or None,
-                bedrooms=bedrooms or None,
-                property_type=property_type or None,
-                limit=limit,
-            )
-            if not rows:
-                conn.close()
-                st.info("No results yet. Try another filter or ingest data first.")
-                return
-
-            st.write(f"Found {len(rows)} listings")
-            _render_listings(rows, suburb_distances)
-
-        st.divider()
-        st.subheader("Save this search")
-        name = st.text_input("Search name", value="Glen Iris search")
-        email = st.text_input("Email for alerts")
-        schedule = st.selectbox("Schedule", ["daily", "weekly"])
-        test_email = st.button("Send test email")
-        if test_email:
-            if not _is_valid_email(email):
-                st.error("Enter a valid email to send a test message.")
-            else:
-                try:
-                    send_email(
-                        settings,
-                        email,
-                        "PropertyHunter test email",
-                        "This is a test email from PropertyHunter.",
-                    )
-                    st.success("Test email sent.")
-                except Exception as exc:
-                    st.error(f"Test email failed: {exc}")
-        if st.button("Save search"):
-            if not name.strip():
-                st.error("Search name is required.")
-                conn.close()
-                return
-            if not _is_valid_email(email):
-                st.error("Enter a valid email to save this search.")
-                conn.close()
-                return
-            criteria = {
-                "suburb": suburb or None,
-                "suburbs": nearby_suburbs,
-                "min_price": min_price or None,
-                "max_price": max_price or None,
-                "bedrooms": bedrooms or None,
-                "property_type": property_type or None,
-                "radius_km": parsed_criteria.radius_km if parsed_criteria else None,
-            }
-            if parsed_criteria:
-                criteria["query_text"] = query_text
+    if not profiles_only:
+        filters = (
+            suburb or None,
+            min_price or None,
+            max_price or None,
+            bedrooms or None,
+            property_type or None,
+            collapse,
+            float(radius_km) if radius_km else None,
+        )
+        rows = _search_listings(*filters, limit=limit, sort=sort)
+        with st.sidebar:
+            _render_facets(_facet_counts(*filters))
+        if not rows:
+            st.info("No results yet. Try another filter or ingest data first.")
+            return
+
+        st.write(f"Found {len(rows)} listings")
+        _render_listings(rows, suburb_distances)
+
+    st.divider()
+    st.subheader("Save this search")
+    name = st.text_input("Search name", value="Glen Iris search")
+    email = st.text_input("Email for alerts")
+    schedule = st.selectbox("Schedule", ["daily", "weekly"])
+    test_email = st.button("Send test email")
+    if test_email:
+        if not _is_valid_email(email):
+            st.error("Enter a valid email to send a test message.")
+        else:
+            from src.common.emailer import send_email
+
+            try:
+                send_email(
+                    settings,
+                    email,
+                    "PropertyHunter test email",
+                    "This is a test email from PropertyHunter.",
+                )
+                st.success("Test email sent.")
+            except Exception as exc:
+                st.error(f"Test email failed: {exc}")
+    if st.button("Save search"):
+        if not name.strip():
+            st.error("Search name is required.")
+            return
+        if not _is_valid_email(email):
+            st.error("Enter a valid email to save this search.")
+            return
+        # Radius searches store the centre and radius; the neighbourhood table
+        # expands them at run time so they follow profile updates.
+        criteria = {
+            "suburb": suburb or None,
+            "min_price": min_price or None,
+            "max_price": max_price or None,
+            "bedrooms": bedrooms or None,
+            "property_type": property_type or None,
+            "radius_km": radius_km if suburb and radius_km else None,
+        }
+        if parsed_criteria:
+            criteria["query_text"] = query_text
+        with _db() as conn:
             search_id = save_search(conn, name, json.dumps(criteria), schedule, email)
-            st.success(f"Saved search #{search_id}")
+        st.success(f"Saved search #{search_id}")
 
-        st.subheader("Saved searches")
+    st.subheader("Saved searches")
+    with _db() as conn:
         saved = list_saved_searches(conn)
-        if saved:
-            st.dataframe([dict(row) for row in saved], use_container_width=True)
-        else:
-            st.caption("No saved searches yet.")
-        conn.close()
+    if saved:
+        st.dataframe([dict(row) for row in saved], use_container_width=True)
+    else:
+        st.caption("No saved searches yet.")
+
+
+@st.cache_resource
+def _connection() -> tuple[Settings, sqlite3.Connection, threading.Lock]:
+    settings = load_settings()
+    conn = get_connection(settings.db_path, check_same_thread=False)
+    init_db(conn)
+    # The connection is shared by every session's script thread, so each use
+    # holds the lock to keep their statements and transactions apart.
+    return settings, conn, threading.Lock()
+
+
+@contextmanager
+def _db() -> Iterator[sqlite3.Connection]:
+    _, conn, lock = _connection()
+    with lock:
+        yield conn
+
+
+@st.cache_resource
+def _sharded_db() -> ShardedConnection | None:
+    settings = load_settings()
+    if not settings.shard_dir:
+        return None
+    conn = ShardedConnection(settings.db_path, settings.shard_dir)
+    init_db(conn)
+    return conn
+
+
+@contextmanager
+def _listings_db() -> Iterator[sqlite3.Connection | ShardedConnection]:
+    # The sharded handle serialises access to each of its databases itself.
+    sharded = _sharded_db()
+    if sharded is not None:
+        yield sharded
+        return
+    with _db() as conn:
+        yield conn
+
+
+@st.cache_resource
+def _gazetteer() -> Gazetteer:
+    return get_gazetteer(_connection()[0])
+
+
+@st.cache_data(max_entries=256)
+def _parse_query(query_text: str) -> SearchCriteria:
+    return parse_search_query(query_text)
+
+
+@st.cache_data(ttl=60, max_entries=256)
+def _nearby_suburbs(suburb: str, radius_km: float) -> tuple[list[dict], dict[str, float]]:
+    # Read from the same neighbour table the listings query joins against, so
+    # the list shown matches the suburbs searched.
+    with _db() as conn:
+        distances = neighbour_distances(conn, suburb, radius_km)
+    gazetteer = _gazetteer()
+    nearby = []
+    for name, distance in sorted(distances.items(), key=lambda item: item[1]):
+        profile = gazetteer.profile(name)
+        if profile is None:
+            continue
+        nearby.append(
+            {
+                "suburb": profile.suburb,
+                "state": profile.state,
+                "distance_km": round(distance, 1),
+                "median_price": profile.median_price,
+                "median_rent": profile.median_rent,
+            }
+        )
+    return nearby, distances
+
+
+@st.cache_data(ttl=60, max_entries=256)
+def _search_listings(
+    suburb: str | None,
+    min_price: int | None,
+    max_price: int | None,
+    bedrooms: int | None,
+    property_type: str | None,
+    collapse_duplicates: bool,
+    radius_km: float | None,
+    limit: int,
+    sort: str = "newest",
+) -> list[dict]:
+    with _listings_db() as conn:
+        rows = query_listings(
+            conn,
+            suburb=suburb,
+            min_price=min_price,
+            max_price=max_price,
+            bedrooms=bedrooms,
+            property_type=property_type,
+            limit=limit,
+            collapse_duplicates=collapse_duplicates,
+            sort=sort,
+            radius_km=radius_km,
+        )
+        return [dict(row) for row in rows]
+
+
+@st.cache_data(ttl=60, max_entries=256)
+def _facet_counts(
+    suburb: str | None,
+    min_price: int | None,
+    max_price: int | None,
+    bedrooms: int | None,
+    property_type: str | None,
+    collapse_duplicates: bool,
+    radius_km: float | None,
+) -> dict[str, dict[str, int]]:
+    with _listings_db() as conn:
+        return facet_counts(
+            conn,
+            suburb=suburb,
+            min_price=min_price,
+            max_price=max_price,
+            bedrooms=bedrooms,
+            property_type=property_type,
+            collapse_duplicates=collapse_duplicates,
+            radius_km=radius_km,
+        )
+
+
+FACET_LABELS = {
+    "property_type": "Property type",
+    "bedrooms": "Bedrooms",
+    "price_band": "Price",
+    "suburb": "Suburb",
+}
+
+
+def _render_facets(facets: dict[str, dict[str, int]], top: int = 6) -> None:
+    if not any(facets.values()):
+        return
+    st.subheader("Matching listings")
+    for facet, label in FACET_LABELS.items():
+        values = list(facets.get(facet, {}).items())
+        if not values:
+            continue
+        shown = ", ".join(f"{value}: {count}" for value, count in values[:top])
+        more = f", +{len(values) - top} more" if len(values) > top else ""
+        st.caption(f"**{label}** - {shown}{more}")
 
 
 def _is_valid_email(email: str) -> bool:
@@ -196,24 +357,56 @@ def _is_valid_email(email: str) -> bool:
     return re.match(r"^[^@\\s]+@[^@\\s]+\\.[^@\\s]+$", email) is not None
 
 
-def _render_listings(rows: list, suburb_distances: dict[str, float]) -> None:
-    for row in rows:
-        distance = None
-        if row["suburb"]:
-            distance = suburb_distances.get(row["suburb"])
-        distance_label = f"{distance:.1f} km" if distance is not None else None
-        lines = [
-            f"**{row['title'] or row['address'] or 'Listing'}**",
-            "",
-            f"- Price: {row['price_text'] or 'Price on request'}",
-            f"- Beds: {row['bedrooms'] or 'n/a'} | Baths: {row['bathrooms'] or 'n/a'} "
-            f"| Parking: {row['parking'] or 'n/a'}",
-            f"- Address: {row['address'] or 'n/a'}",
-        ]
-        if distance_label:
-            lines.append(f"- Distance: {distance_label}")
-        lines.append(f"- URL: {row['url']}")
-        st.markdown("\n".join(lines))
+def _render_listings(rows: list[dict], suburb_distances: dict[str, float]) -> None:
+    table = [
+        {
+            "title": row["title"] or row["address"] or "Listing",
+            "price": row["price_text"] or "Price on request",
+            "beds": row["bedrooms"],
+            "baths": row["bathrooms"],
+            "parking": row["parking"],
+            "suburb": row["suburb"],
+            "distance_km": _distance(row, suburb_distances),
+            "url": row["url"],
+        }
+        for row in rows
+    ]
+    st.dataframe(
+        table,
+        use_container_width=True,
+        hide_index=True,
+        column_config={"url": st.column_config.LinkColumn("URL")},
+    )
+    selected = st.selectbox(
+        "Listing details",
+        range(len(rows)),
+        format_func=lambda index: f"{index + 1}. {table[index]['title']}",
+    )
+    if selected is not None:
+        with st.expander("Details", expanded=True):
+            _render_listing(rows[selected], table[selected]["distance_km"])
+
+
+def _render_listing(row: dict, distance: float | None) -> None:
+    lines = [
+        f"**{row['title'] or row['address'] or 'Listing'}**",
+        "",
+        f"- Price: {row['price_text'] or 'Price on request'}",
+        f"- Beds: {row['bedrooms'] or 'n/a'} | Baths: {row['bathrooms'] or 'n/a'} "
+        f"| Parking: {row['parking'] or 'n/a'}",
+        f"- Address: {row['address'] or 'n/a'}",
+    ]
+    if distance is not None:
+        lines.append(f"- Distance: {distance:.1f} km")
+    lines.append(f"- URL: {row['url']}")
+    st.markdown("\n".join(lines))
+
+
+def _distance(row: dict, suburb_distances: dict[str, float]) -> float | None:
+    if not row["suburb"]:
+        return None
+    distance = suburb_distances.get(row["suburb"].lower())
+    return round(distance, 1) if distance is not None else None
 
 
 if __name__ == "__main__":
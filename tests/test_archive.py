@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from src.common.config import load_settings
+from src.db.database import Listing, get_connection, init_db, upsert_listings
+from src.ingest.archive import get_archive, reparse_archive
+
+URL = "https://www.realestate.com.au/buy/in-malvern,+vic+3144/list-1"
+
+
+def _page(price: str) -> str:
+    payload = {
+        "props": {
+            "listing": {
+                "id": "111",
+                "url": "/property-house-vic-malvern-111",
+                "address": "12 High Street, Malvern VIC 3144",
+                "suburb": "Malvern",
+                "postcode": "3144",
+                "price": price,
+            }
+        }
+    }
+    return (
+        '<html><body><script id="__NEXT_DATA__" type="application/json">'
+        f"{json.dumps(payload)}</script></body></html>"
+    )
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "listings.db"))
+    monkeypatch.setenv("ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.delenv("SHARD_DIR", raising=False)
+    return load_settings()
+
+
+def _current(settings, price_text: str, scraped_at: str) -> None:
+    conn = get_connection(settings.db_path)
+    init_db(conn)
+    upsert_listings(
+        conn,
+        [
+            Listing(
+                id="111",
+                url="https://www.realestate.com.au/property-house-vic-malvern-111",
+                address="12 High Street, Malvern VIC 3144",
+                suburb="Malvern",
+                postcode="3144",
+                price_text=price_text,
+                scraped_at=scraped_at,
+            )
+        ],
+    )
+    conn.close()
+
+
+def _snapshot(settings) -> tuple:
+    conn = get_connection(settings.db_path)
+    try:
+        rows = conn.execute("SELECT price_text, scraped_at FROM listings").fetchall()
+        # listing_changes is pruned once matched, so compare the sequence high-water mark.
+        changes = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'listing_changes'"
+        ).fetchone()[0]
+        history = conn.execute("SELECT COUNT(*) FROM listing_history").fetchone()[0]
+        return [tuple(row) for row in rows], changes, history
+    finally:
+        conn.close()
+
+
+def test_reparse_of_older_archive_does_not_roll_back(settings) -> None:
+    get_archive(settings.archive_dir).store(
+        URL, _page("$900,000"), fetched_at="2026-01-01T00:00:00+00:00"
+    )
+    _current(settings, "$1,000,000", "2026-02-01T00:00:00+00:00")
+    before = _snapshot(settings)
+
+    report = reparse_archive(settings, settings.archive_dir, workers=1)
+
+    assert report.stale == 1
+    assert report.changed == 0
+    assert _snapshot(settings) == before
+    assert before[0] == [("$1,000,000", "2026-02-01T00:00:00+00:00")]
+
+
+def test_reparse_of_newer_archive_updates_listing(settings) -> None:
+    _current(settings, "$900,000", "2026-01-01T00:00:00+00:00")
+    get_archive(settings.archive_dir).store(
+        URL, _page("$1,000,000"), fetched_at="2026-02-01T00:00:00+00:00"
+    )
+
+    report = reparse_archive(settings, settings.archive_dir, workers=1)
+
+    assert report.stale == 0
+    assert report.changed == 1
+    assert _snapshot(settings)[0] == [("$1,000,000", "2026-02-01T00:00:00+00:00")]
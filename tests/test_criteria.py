@@ -0,0 +1,49 @@
+import pytest
+
+from src.common.criteria import parse_search_query, resolve_suburb
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "North",
+        "South",
+        "East",
+        "West",
+        "Beach",
+        "Park",
+        "Hill",
+        "Lake",
+        "Creek",
+        "Bay",
+        "Mount",
+        "Valley",
+        "Springs",
+        "Heights",
+    ],
+)
+def test_generic_place_words_do_not_resolve(text: str) -> None:
+    assert resolve_suburb(text) is None
+
+
+@pytest.mark.parametrize(
+    ("text", "suburb"),
+    [
+        ("Malvren", "Malvern"),
+        ("Brunswik", "Brunswick"),
+        ("Sant Kilda", "St Kilda"),
+        ("Hawthorn Est", "Hawthorn East"),
+        ("Camberwel", "Camberwell"),
+    ],
+)
+def test_misspelt_suburbs_resolve(text: str, suburb: str) -> None:
+    match = resolve_suburb(text)
+    assert match is not None
+    assert match.name == suburb
+
+
+def test_generic_word_in_query_is_not_resolved_to_a_longer_suburb() -> None:
+    criteria = parse_search_query("townhouse in north")
+    assert criteria.suburb != "North Cape"
+    assert criteria.suburb_confidence is None
+    assert criteria.property_type == "Townhouse"
@@ -0,0 +1,55 @@
+from src.common.dedup import address_key, block_key, duplicate_score
+from src.db.database import Listing, get_connection, init_db, upsert_listings
+
+
+def _keys(address: str, suburb: str, postcode: str) -> dict:
+    key = address_key(address, suburb)
+    return {
+        "address_key": key,
+        "block_key": block_key(key, suburb, postcode),
+        "suburb": suburb,
+        "bedrooms": None,
+        "bathrooms": None,
+    }
+
+
+def test_same_street_in_suburbs_sharing_a_postcode_is_not_a_duplicate() -> None:
+    malvern = _keys("12 High Street, Malvern", "Malvern", "3144")
+    kooyong = _keys("12 High Street, Kooyong", "Kooyong", "3144")
+    assert malvern["block_key"] != kooyong["block_key"]
+    assert duplicate_score(malvern, kooyong) == 0.0
+
+
+def test_same_address_in_one_suburb_is_a_duplicate() -> None:
+    left = _keys("12 High Street, Malvern", "Malvern", "3144")
+    right = _keys("12 High St, Malvern", "Malvern", "3144")
+    assert left["block_key"] == right["block_key"]
+    assert duplicate_score(left, right) == 1.0
+
+
+def test_upsert_keeps_shared_postcode_properties_apart() -> None:
+    conn = get_connection(":memory:")
+    init_db(conn)
+    upsert_listings(
+        conn,
+        [
+            Listing(
+                id="malvern",
+                url="https://example.com/malvern",
+                address="12 High Street, Malvern VIC 3144",
+                suburb="Malvern",
+                postcode="3144",
+                scraped_at="2026-01-01T00:00:00+00:00",
+            ),
+            Listing(
+                id="kooyong",
+                url="https://example.com/kooyong",
+                address="12 High Street, Kooyong VIC 3144",
+                suburb="Kooyong",
+                postcode="3144",
+                scraped_at="2026-01-02T00:00:00+00:00",
+            ),
+        ],
+    )
+    rows = dict(conn.execute("SELECT id, property_id FROM listings").fetchall())
+    assert rows["malvern"] != rows["kooyong"]
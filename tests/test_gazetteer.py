@@ -0,0 +1,38 @@
+import json
+from dataclasses import replace
+
+from src.common.config import load_settings
+from src.common.gazetteer import _read_snapshot, _write_snapshot, build_gazetteer, sources_for
+
+
+def _sources(tmp_path, monkeypatch):
+    monkeypatch.setenv("GAZETTEER_SNAPSHOT_PATH", str(tmp_path / "gazetteer.json"))
+    return sources_for(load_settings())
+
+
+def test_snapshot_round_trips_as_plain_json(tmp_path, monkeypatch) -> None:
+    sources = _sources(tmp_path, monkeypatch)
+    signature = sources.signature()
+    built = build_gazetteer(sources, signature)
+    _write_snapshot(sources, built)
+
+    with open(sources.snapshot_path, encoding="utf-8") as handle:
+        assert set(json.load(handle)) == {"version", "signature", "suburbs", "postcodes", "profiles"}
+    loaded = _read_snapshot(sources, signature)
+    assert loaded is not None
+    assert loaded.suburbs == built.suburbs
+    assert loaded.postcodes_by_key == built.postcodes_by_key
+    assert loaded.profiles == built.profiles
+    assert loaded.fuzzy_index.resolve("Brunswik").name == "Brunswick"
+
+
+def test_unreadable_or_outdated_snapshot_is_ignored(tmp_path, monkeypatch) -> None:
+    sources = _sources(tmp_path, monkeypatch)
+    signature = sources.signature()
+    with open(sources.snapshot_path, "wb") as handle:
+        handle.write(b"\x80\x05not json")
+    assert _read_snapshot(sources, signature) is None
+
+    _write_snapshot(sources, build_gazetteer(sources, signature))
+    changed = replace(sources, suburb_paths=(*sources.suburb_paths, str(tmp_path / "extra.csv")))
+    assert _read_snapshot(changed, changed.signature()) is None
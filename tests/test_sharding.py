@@ -0,0 +1,103 @@
+from dataclasses import replace
+
+import pytest
+
+from src.common.config import load_settings
+from src.db.database import (
+    Listing,
+    get_connection,
+    init_db,
+    listing_history,
+    query_listings,
+    queue_notifications,
+    record_full_crawl,
+    upsert_listings,
+)
+from src.db.sharding import ShardedConnection
+from src.jobs.lifecycle import run_lifecycle
+from src.jobs.reshard import reshard_listings
+
+
+def _listing(listing_id: str, suburb: str, state: str, postcode: str, price: str) -> Listing:
+    return Listing(
+        id=listing_id,
+        url=f"https://example.com/{listing_id}",
+        address=f"1 Main Street, {suburb} {state} {postcode}",
+        suburb=suburb,
+        state=state,
+        postcode=postcode,
+        price_text=price,
+        scraped_at="2026-01-01T00:00:00+00:00",
+    )
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "listings.db"))
+    monkeypatch.setenv("SHARD_DIR", str(tmp_path / "shards"))
+    monkeypatch.setenv("DELIST_AFTER_CRAWLS", "1")
+    return load_settings()
+
+
+def test_reshard_moves_primary_listings_into_state_shards(settings) -> None:
+    primary = get_connection(settings.db_path)
+    init_db(primary)
+    upsert_listings(
+        primary,
+        [
+            _listing("vic-1", "Malvern", "VIC", "3144", "$900,000"),
+            _listing("nsw-1", "Newtown", "NSW", "2042", "$1,200,000"),
+        ],
+    )
+    upsert_listings(
+        primary,
+        [
+            replace(
+                _listing("vic-1", "Malvern", "VIC", "3144", "$850,000"),
+                scraped_at="2026-01-02T00:00:00+00:00",
+            )
+        ],
+    )
+    primary.close()
+
+    assert reshard_listings(settings, batch_size=1) == 2
+
+    conn = ShardedConnection(settings.db_path, settings.shard_dir)
+    try:
+        assert conn.shard_names() == ["nsw", "vic"]
+        assert conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0] == 0
+        assert [row["id"] for row in query_listings(conn, suburb="Malvern")] == ["vic-1"]
+        assert [row["id"] for row in query_listings(conn, suburb="Newtown")] == ["nsw-1"]
+        assert len(query_listings(conn, collapse_duplicates=True)) == 2
+        assert listing_history(conn, "vic-1")
+    finally:
+        conn.close()
+
+
+def test_archiving_a_sharded_listing_clears_its_catalog_notifications(settings) -> None:
+    conn = ShardedConnection(settings.db_path, settings.shard_dir)
+    init_db(conn)
+    conn.upsert(
+        [
+            _listing("gone", "Malvern", "VIC", "3144", "$900,000"),
+            replace(
+                _listing("kept", "Malvern", "VIC", "3144", "$950,000"),
+                scraped_at="2026-01-20T00:00:00+00:00",
+            ),
+        ]
+    )
+    record_full_crawl(conn.catalog, "Malvern", "2026-01-15T00:00:00+00:00")
+    queue_notifications(
+        conn.catalog, [(1, "gone"), (1, "kept")], "2026-01-10T00:00:00+00:00"
+    )
+    conn.commit()
+    conn.close()
+
+    assert run_lifecycle(settings) == 1
+
+    catalog = get_connection(settings.db_path)
+    try:
+        queued = catalog.execute("SELECT listing_id FROM pending_notifications").fetchall()
+        assert [row["listing_id"] for row in queued] == ["kept"]
+    finally:
+        catalog.close()